@@ -6,6 +6,8 @@ from .models import (
     Module,
     Assessment,
     AssessmentQuestion,
+    QuestionVersion,
+    ShortAnswerGrade,
     Topic,
     TopicParagraph,
 )
@@ -15,6 +17,8 @@ admin.site.register(Course)
 admin.site.register(Module)
 admin.site.register(Assessment)
 admin.site.register(AssessmentQuestion)
+admin.site.register(QuestionVersion)
+admin.site.register(ShortAnswerGrade)
 admin.site.register(Topic)
 admin.site.register(TopicParagraph)
 admin.site.register(CourseDescription)
@@ -8,6 +8,10 @@ class Course(models.Model):
         ("Intermediate", "Intermediate"),
         ("Advanced", "Advanced"),
     ]
+    DELIVERY_MODE_CHOICES = [
+        ("paragraph", "One paragraph per message"),
+        ("chunked", "Paragraphs packed into chunks"),
+    ]
 
     course_id = models.UUIDField(
         primary_key=True, default=uuid.uuid4, editable=False, unique=True
@@ -21,6 +25,17 @@ class Course(models.Model):
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES)
     tags = models.JSONField(default=list, blank=True)
     is_active = models.BooleanField(default=False)
+    delivery_mode = models.CharField(
+        max_length=20, choices=DELIVERY_MODE_CHOICES, default="paragraph"
+    )
+    # Pre-rendered WhatsApp message segments, written by ContentPublishService
+    rendered_intro = models.JSONField(default=list, blank=True)
+    # BM25 keyword index over ContentChunk rows, maintained by CourseCompiler:
+    # {"postings": {term: {chunk_id: tf}}, "lengths": {chunk_id: n}, "avgLength"}
+    search_index = models.JSONField(default=dict, blank=True)
+    search_version = models.PositiveIntegerField(default=0)
+    # Bumped by ModuleIndexService.invalidate; part of the module index cache key
+    module_index_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.course_name
@@ -76,6 +91,10 @@ class Module(models.Model):
     title = models.CharField(max_length=100)
     content = models.TextField()
     order = models.PositiveIntegerField()
+    rendered_intro = models.JSONField(default=list, blank=True)
+    # Bumped whenever the module or one of its topics changes; caches of
+    # content-derived data (e.g. tutor answers) are keyed on it.
+    content_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -91,6 +110,10 @@ class Assessment(models.Model):
         ("assessment", "Assessment"),
         ("quiz", "Quiz"),
     ]
+    GRADING_MODE_CHOICES = [
+        ("immediate", "Grade each answer immediately"),
+        ("deferred", "Grade open answers at the end"),
+    ]
 
     assessment_id = models.UUIDField(
         primary_key=True, default=uuid.uuid4, editable=False, unique=True
@@ -115,6 +138,10 @@ class Assessment(models.Model):
     type = models.CharField(
         max_length=10, choices=ASSESSMENT_TYPE_CHOICES, default="assessment"
     )
+    # deferred: open answers are graded together when the attempt completes
+    grading_mode = models.CharField(
+        max_length=10, choices=GRADING_MODE_CHOICES, default="immediate"
+    )
 
     class Meta:
         ordering = ["created_at"]
@@ -142,11 +169,72 @@ class AssessmentQuestion(models.Model):
     correct_answer = models.TextField(
         blank=True, null=True
     )  # TODO: Need to implement this for open in frontend
+    order = models.PositiveIntegerField(default=0)
+    rendered_segments = models.JSONField(default=list, blank=True)
+    # MCQ reply -> option index table, built by McqAnswerMatcher on save
+    answer_lookup = models.JSONField(default=dict, blank=True)
+    # content currently shown to learners; responses reference it
+    version = models.ForeignKey(
+        "courses.QuestionVersion",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+
+    class Meta:
+        # pk breaks ties between questions saved before order existed
+        ordering = ["order", "pk"]
 
     def __str__(self):
         return self.question_text
 
 
+class QuestionVersion(models.Model):
+    """
+    Immutable content of a question as learners saw it. Stored once per
+    distinct content (content_hash) and shared by every response to it.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content_hash = models.CharField(max_length=32, unique=True)
+    type = models.CharField(max_length=10)
+    question_text = models.TextField()
+    options = models.JSONField(blank=True, null=True)
+    correct_answer = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.question_text[:50]} ({self.content_hash[:8]})"
+
+
+class ShortAnswerGrade(models.Model):
+    """
+    LLM grade of one normalized open-ended answer, shared by every learner
+    who gives the same answer to the same version of a question.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # not a FK: grades of reworded or removed questions are dropped by
+    # ShortAnswerGradeCache.invalidate when an assessment is edited
+    question_id = models.UUIDField()
+    question_version = models.CharField(max_length=32)
+    answer_hash = models.CharField(max_length=40)
+    normalized_answer = models.TextField()
+    result = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [("question_id", "question_version", "answer_hash")]
+        indexes = [
+            models.Index(fields=["question_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.normalized_answer[:50]} -> {self.result.get('score')}"
+
+
 class Topic(models.Model):
     topic_id = models.UUIDField(
         primary_key=True, default=uuid.uuid4, editable=False, unique=True
@@ -157,6 +245,14 @@ class Topic(models.Model):
     title = models.CharField(max_length=255)
     order = models.PositiveIntegerField()
     is_active = models.BooleanField(default=True)
+    # Consecutive paragraph ids packed into one message for chunked delivery,
+    # e.g. [["<id1>", "<id2>"], ["<id3>"]]. Rebuilt whenever paragraphs change.
+    paragraph_chunks = models.JSONField(default=list, blank=True)
+    # Rendered segments per chunk, keyed by the chunk's last paragraph id
+    rendered_chunks = models.JSONField(default=dict, blank=True)
+    # Position of this topic in the enrollment completed-topics bitmap.
+    # Unique within a course and never reused.
+    progress_bit = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -164,6 +260,14 @@ class Topic(models.Model):
         ordering = ["order"]
         unique_together = [("module", "order")]
 
+    def save(self, *args, **kwargs):
+        if self.progress_bit is None:
+            max_bit = Topic.objects.filter(
+                module__course_id=self.module.course_id
+            ).aggregate(models.Max("progress_bit"))["progress_bit__max"]
+            self.progress_bit = 0 if max_bit is None else max_bit + 1
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} (Module: {self.module.title})"
 
@@ -177,6 +281,7 @@ class TopicParagraph(models.Model):
     )
     content = models.TextField()  # each paragraph text
     order = models.PositiveIntegerField(default=1)
+    rendered_segments = models.JSONField(default=list, blank=True)
 
     class Meta:
         ordering = ["order"]
@@ -184,3 +289,40 @@ class TopicParagraph(models.Model):
 
     def __str__(self):
         return f"Paragraph {self.order} of Topic: {self.topic.title}"
+
+
+class ContentChunk(models.Model):
+    """
+    One retrieval passage of a course: a block of module content or a topic
+    paragraph, with its term frequencies computed when the course is compiled.
+    """
+
+    KIND_CHOICES = [
+        ("module", "Module content"),
+        ("paragraph", "Topic paragraph"),
+    ]
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="content_chunks"
+    )
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="+")
+    # SET_NULL: paragraphs are recreated on every topic edit; an orphaned
+    # chunk is re-pointed at an identical new paragraph instead of re-indexed
+    paragraph = models.ForeignKey(
+        TopicParagraph, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    position = models.PositiveIntegerField(default=0)  # block index in module content
+    source = models.CharField(max_length=500)
+    text = models.TextField()
+    terms = models.JSONField(default=dict)
+    length = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=40)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["course", "kind"]),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.kind})"
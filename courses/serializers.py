@@ -56,6 +56,7 @@ class CourseSerializer(serializers.ModelSerializer):
             "level",
             "tags",
             "is_active",
+            "delivery_mode",
             "descriptions",
         ]
 
@@ -1,9 +1,29 @@
 import logging
+from typing import List
+
 from courses.models import Assessment, AssessmentQuestion
+from courses.services.grading_cache import ShortAnswerGradeCache
+from courses.services.mcq_matcher import McqAnswerMatcher
+from courses.services.publishing import ContentPublishService
+from courses.services.question_versions import QuestionVersionService
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 
 logger = logging.getLogger(__name__)
 
+# Columns written by AssessmentService.sync_questions
+QUESTION_SYNC_FIELDS = [
+    "order",
+    "type",
+    "question_text",
+    "marks",
+    "options",
+    "correct_answer",
+    "rendered_segments",
+    "answer_lookup",
+    "version_id",
+]
+
 
 class AssessmentService:
     @classmethod
@@ -30,6 +50,7 @@ class AssessmentService:
             "createdAt": assessment.created_at,
             "updatedAt": assessment.updated_at,
             "type": assessment.type,
+            "gradingMode": assessment.grading_mode,
         }
 
     @classmethod
@@ -58,25 +79,14 @@ class AssessmentService:
                 # questions=data.get("questions", []),
                 is_active=data.get("isActive", True),
                 type=data.get("type", "assessment"),
+                grading_mode=data.get("gradingMode", "immediate"),
                 # Note: You'll need to handle course and module relationships here
                 course_id=data.get("courseId"),
                 module_id=data.get("moduleId"),
             )
 
             # Save questions
-            questions = data.get("questions", [])
-            for q in questions:
-                AssessmentQuestion.objects.create(
-                    assessment=assessment,
-                    question_id=q.get("questionId"),
-                    type=q.get("type"),
-                    question_text=q.get("questionText"),
-                    marks=q.get("marks", 0),
-                    options=q.get("options") if q.get("type") == "mcq" else None,
-                    correct_answer=(
-                        q.get("correctAnswer") if q.get("type") == "open" else None
-                    ),
-                )
+            cls.sync_questions(assessment, data.get("questions", []))
             return {
                 "success": True,
                 "data": cls.to_dict(assessment),
@@ -85,6 +95,82 @@ class AssessmentService:
             logger.exception("Error creating assessment")
             return {"success": False, "data": None, "error": str(e)}
 
+    @classmethod
+    def sync_questions(cls, assessment, questions_data) -> List[str]:
+        """
+        Make the assessment's questions match `questions_data` (in order)
+        with one delete, one bulk_update and one bulk_create; rows that did
+        not change are not written. Rendered messages and MCQ lookups are
+        built in memory first. Returns the ids of removed questions and of
+        questions whose text or answer changed.
+        """
+        existing = {str(q.question_id): q for q in assessment.questions.all()}
+        total = len(questions_data)
+
+        to_create, to_update, stale, kept = [], [], [], set()
+        edited, changed_fields = [], set()
+        for order, q in enumerate(questions_data, start=1):
+            q_type = q.get("type")
+            question_id = str(q["questionId"]) if q.get("questionId") else None
+            question = existing.get(question_id)
+            if question is None:
+                question = AssessmentQuestion(assessment=assessment)
+                if question_id:
+                    question.question_id = question_id
+                to_create.append(question)
+            else:
+                kept.add(question_id)
+                edited.append(
+                    (
+                        question,
+                        {name: getattr(question, name) for name in QUESTION_SYNC_FIELDS},
+                    )
+                )
+
+            question.order = order
+            question.type = q_type
+            question.question_text = q.get("questionText")
+            question.marks = q.get("marks", 0)
+            question.options = q.get("options") if q_type == "mcq" else None
+            question.correct_answer = (
+                q.get("correctAnswer") if q_type == "open" else None
+            )
+            question.rendered_segments = ContentPublishService.render_question(
+                question, order, total
+            )
+            question.answer_lookup = (
+                McqAnswerMatcher.build_lookup(question.options) if q_type == "mcq" else {}
+            )
+
+        QuestionVersionService.assign(to_create + [question for question, _ in edited])
+
+        for question, before in edited:
+            changed = {
+                name
+                for name in QUESTION_SYNC_FIELDS
+                if getattr(question, name) != before[name]
+            }
+            if changed:
+                to_update.append(question)
+                changed_fields |= changed
+                if changed & {"question_text", "correct_answer"}:
+                    stale.append(str(question.question_id))
+
+        removed = [question_id for question_id in existing if question_id not in kept]
+
+        with transaction.atomic():
+            if removed:
+                AssessmentQuestion.objects.filter(question_id__in=removed).delete()
+            if to_update:
+                AssessmentQuestion.objects.bulk_update(
+                    to_update,
+                    [name for name in QUESTION_SYNC_FIELDS if name in changed_fields],
+                )
+            if to_create:
+                AssessmentQuestion.objects.bulk_create(to_create)
+
+        return stale + removed
+
     @classmethod
     def update_assessment(cls, assessment_id, data):
         """Update an existing assessment"""
@@ -97,6 +183,7 @@ class AssessmentService:
                 "description": "description",
                 "isActive": "is_active",
                 "type": "type",
+                "gradingMode": "grading_mode",
                 "courseId": "course_id",
                 "moduleId": "module_id",
             }
@@ -148,21 +235,11 @@ class AssessmentService:
 
             assessment.save()
 
-            # Replace questions (if provided)
+            # Sync questions (if provided)
             if "questions" in data:
-                assessment.questions.all().delete()
-                for q in data["questions"]:
-                    AssessmentQuestion.objects.create(
-                        assessment=assessment,
-                        question_id=q.get("questionId"),
-                        type=q.get("type"),
-                        question_text=q.get("questionText"),
-                        marks=q.get("marks", 0),
-                        options=q.get("options") if q.get("type") == "mcq" else None,
-                        correct_answer=(
-                            q.get("correctAnswer") if q.get("type") == "open" else None
-                        ),
-                    )
+                stale = cls.sync_questions(assessment, data["questions"])
+                # drop cached grades of removed or reworded questions
+                ShortAnswerGradeCache.invalidate(stale)
 
             return {
                 "success": True,
@@ -181,6 +258,9 @@ class AssessmentService:
         """Delete an assessment"""
         try:
             assessment = Assessment.objects.get(assessment_id=assessment_id)
+            ShortAnswerGradeCache.invalidate(
+                assessment.questions.values_list("question_id", flat=True)
+            )
             assessment.delete()
             return {"success": True, "data": None}
         except ObjectDoesNotExist:
@@ -208,6 +288,11 @@ class AssessmentService:
         try:
             assessments = Assessment.objects.filter(module__module_id=module_id)
             count = assessments.count()
+            ShortAnswerGradeCache.invalidate(
+                AssessmentQuestion.objects.filter(assessment__in=assessments).values_list(
+                    "question_id", flat=True
+                )
+            )
             assessments.delete()
             return {
                 "success": True,
@@ -1,9 +1,11 @@
 import logging
 from typing import Dict
 import uuid
-from courses.models import Course, CourseDescription, CourseDescriptionImage
+from courses.models import Course, CourseDescription, CourseDescriptionImage, Topic
 from django.db import transaction
 from courses.services.modules import ModuleService
+from courses.services.topics import TopicService
+from courses.services.publishing import ContentPublishService
 from django.db.models import Max
 from ..models import CourseDescription, CourseDescriptionImage
 
@@ -50,6 +52,7 @@ class CourseService:
             "level": course.level,
             "tags": course.tags,
             "isActive": course.is_active,
+            "deliveryMode": course.delivery_mode,
         }
 
     @classmethod
@@ -81,18 +84,30 @@ class CourseService:
     def create_or_update_course(cls, course_id, data):
         """Create or update a course"""
         try:
+            defaults = {
+                "course_name": data.get("courseName"),
+                "description": data.get("description"),
+                "category": data.get("category"),
+                "duration_in_weeks": data.get("durationInWeeks"),
+                "level": data.get("level"),
+                "tags": data.get("tags", []),
+                "is_active": data.get("isActive", True),
+            }
+            # only touch delivery mode when the client sends it
+            if data.get("deliveryMode"):
+                defaults["delivery_mode"] = data.get("deliveryMode")
+
             course, created = Course.objects.update_or_create(
                 course_id=course_id,
-                defaults={
-                    "course_name": data.get("courseName"),
-                    "description": data.get("description"),
-                    "category": data.get("category"),
-                    "duration_in_weeks": data.get("durationInWeeks"),
-                    "level": data.get("level"),
-                    "tags": data.get("tags", []),
-                    "is_active": data.get("isActive", True),
-                },
+                defaults=defaults,
             )
+            if course.delivery_mode == "chunked":
+                # content saved before chunking existed has no chunks yet
+                for topic in Topic.objects.filter(
+                    module__course=course, paragraph_chunks=[]
+                ):
+                    TopicService.refresh_delivery_content(topic)
+
             # Process descriptions if provided
             incoming = data.get("descriptions", None)
             if incoming is not None:
@@ -133,6 +148,8 @@ class CourseService:
                     # empty list incoming -> remove all
                     course.descriptions.all().delete()
 
+            ContentPublishService.publish_course_intro(course)
+
             action = "created" if created else "updated"
             return {
                 "success": True,
@@ -212,6 +229,13 @@ class CourseService:
                         + "\n".join(pending_modules),
                     }
 
+                publish_result = ContentPublishService.publish_course(course)
+                if not publish_result["success"]:
+                    return {
+                        "success": False,
+                        "error": f"Cannot activate course: publishing failed ({publish_result['error']})",
+                    }
+
             course.is_active = is_active
             course.save()
 
@@ -283,6 +307,7 @@ class CourseService:
                     duration_in_weeks=src_course.duration_in_weeks,
                     level=src_course.level,
                     tags=src_course.tags,
+                    delivery_mode=src_course.delivery_mode,
                     is_active=False,  
                 )
 
@@ -295,6 +320,8 @@ class CourseService:
                             include_topics=include_topics,
                         )
 
+                ContentPublishService.publish_course_intro(duplicated_course)
+
             return {
                 "success": True,
                 "data": cls.to_dict(duplicated_course),
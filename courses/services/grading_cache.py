@@ -0,0 +1,77 @@
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from courses.models import AssessmentQuestion, ShortAnswerGrade
+from courses.services.mcq_matcher import normalize_answer
+
+logger = logging.getLogger(__name__)
+
+
+def question_version(question: AssessmentQuestion, threshold: float) -> str:
+    """Changes whenever the question, its reference answer or the pass threshold does"""
+    source = f"{question.question_text}\x00{question.correct_answer or ''}\x00{threshold}"
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def answer_hash(normalized_answer: str) -> str:
+    return hashlib.sha1(normalized_answer.encode("utf-8")).hexdigest()
+
+
+class ShortAnswerGradeCache:
+    """
+    Persisted LLM grades for open-ended answers, keyed by (question_id,
+    question version, normalized answer) so identical answers from different
+    learners are graded once.
+    """
+
+    @staticmethod
+    def get(question: AssessmentQuestion, user_answer: str, threshold: float) -> Optional[Dict]:
+        normalized = normalize_answer(user_answer)
+        if not normalized:
+            return None
+        lookup = {
+            "question_id": question.question_id,
+            "question_version": question_version(question, threshold),
+            "answer_hash": answer_hash(normalized),
+        }
+        try:
+            grade = ShortAnswerGrade.objects.filter(**lookup).only("result").first()
+            if grade is None:
+                return None
+            ShortAnswerGrade.objects.filter(pk=grade.pk).update(hits=F("hits") + 1)
+        except Exception:
+            logger.exception("Short answer grade cache read failed")
+            return None
+
+        logger.info(f"Short answer grade cache hit for question {question.question_id}")
+        return {**grade.result, "user_answer": user_answer}
+
+    @staticmethod
+    def store(
+        question: AssessmentQuestion, user_answer: str, threshold: float, result: Dict
+    ) -> None:
+        normalized = normalize_answer(user_answer)
+        if not normalized:
+            return
+        try:
+            with transaction.atomic():
+                ShortAnswerGrade.objects.create(
+                    question_id=question.question_id,
+                    question_version=question_version(question, threshold),
+                    answer_hash=answer_hash(normalized),
+                    normalized_answer=normalized,
+                    result={k: v for k, v in result.items() if k != "user_answer"},
+                )
+        except IntegrityError:
+            pass  # another worker graded the same answer first
+        except Exception:
+            logger.exception("Short answer grade cache write failed")
+
+    @staticmethod
+    def invalidate(question_ids: Iterable) -> int:
+        deleted, _ = ShortAnswerGrade.objects.filter(question_id__in=list(question_ids)).delete()
+        return deleted
@@ -1,4 +1,3 @@
-import boto3
 import os
 import tempfile
 from whatsapp_bot import settings
@@ -10,6 +9,8 @@ logger = logging.getLogger(__name__)
 class ImageService:
     @staticmethod
     def _get_s3_client():
+        import boto3
+
         return boto3.client(
             "s3",
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
@@ -0,0 +1,152 @@
+import logging
+import string
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+from courses.models import Assessment, AssessmentQuestion
+
+logger = logging.getLogger(__name__)
+
+# Lead-in phrases learners put before their choice ("I think it's B")
+ANSWER_PREFIXES = [
+    "i would say",
+    "i will go with",
+    "ill go with",
+    "i go with",
+    "i choose",
+    "i chose",
+    "i pick",
+    "i think",
+    "i guess",
+    "my answer is",
+    "the answer is",
+    "answer is",
+    "final answer",
+    "answer",
+    "it is",
+    "its",
+    "it s",
+    "option",
+    "choice",
+    "number",
+    "no",
+    "is",
+]
+
+# Words that turn a mentioned option into one being ruled out ("not paris");
+# normalize_answer splits "isn't" into "isn t"
+NEGATIONS = {
+    "not", "no", "never", "nope", "neither", "nor", "cannot",
+    "isn", "aren", "wasn", "weren", "don", "doesn", "didn",
+}
+
+# Bump when build_lookup changes; stored lookups of older versions are rebuilt
+LOOKUP_VERSION = 2
+
+FUZZY_MIN_RATIO = 0.85
+FUZZY_MIN_MARGIN = 0.1
+
+
+def normalize_answer(text: str) -> str:
+    text = (text or "").lower().replace("’", "'").replace("'", " ")
+    text = text.translate(str.maketrans(string.punctuation, " " * len(string.punctuation)))
+    return " ".join(text.split())
+
+
+def strip_prefixes(text: str) -> str:
+    changed = True
+    while changed and text:
+        changed = False
+        for prefix in ANSWER_PREFIXES:
+            if text == prefix:
+                return ""
+            if text.startswith(prefix + " "):
+                text = text[len(prefix) + 1 :]
+                changed = True
+                break
+    return text
+
+
+class McqAnswerMatcher:
+    """
+    Maps a learner's reply to an MCQ option without the LLM: option numbers,
+    letters, exact or near-exact option text and common phrasings. The lookup
+    table is computed when the assessment is saved and stored on the question.
+    """
+
+    @staticmethod
+    def build_lookup(options: List[Dict]) -> Dict:
+        texts = [normalize_answer(option.get("text", "")) for option in options or []]
+        # numbers and letters first: learners are asked to reply with the
+        # number, so "4" means option 4 even when option 1's text is "4"
+        keys = {}
+        for index in range(len(texts)):
+            keys[str(index + 1)] = index
+            keys[string.ascii_lowercase[index]] = index
+        for index, text in enumerate(texts):
+            # the first option claims text shared with a later one
+            if text:
+                keys.setdefault(text, index)
+        return {"keys": keys, "texts": texts, "version": LOOKUP_VERSION}
+
+    @classmethod
+    def publish_lookups(cls, assessment: Assessment) -> None:
+        questions = list(assessment.questions.filter(type="mcq"))
+        for question in questions:
+            question.answer_lookup = cls.build_lookup(question.options)
+        AssessmentQuestion.objects.bulk_update(questions, ["answer_lookup"])
+
+    @classmethod
+    def match(cls, question: AssessmentQuestion, user_input: str) -> Optional[int]:
+        """Index of the chosen option, or None when the reply can't be parsed"""
+        lookup = question.answer_lookup
+        if not lookup or lookup.get("version") != LOOKUP_VERSION:
+            lookup = cls.build_lookup(question.options)
+        keys, texts = lookup["keys"], lookup["texts"]
+
+        text = normalize_answer(user_input)
+        if text in keys:
+            return keys[text]
+        negated = any(word in NEGATIONS for word in text.split())
+        text = strip_prefixes(text)
+        if not text:
+            return None
+        if text in keys:
+            # "no 2" is option 2, but "no paris" may rule Paris out
+            is_marker = text.isdigit() or len(text) == 1
+            if negated and not is_marker:
+                return None
+            return keys[text]
+
+        # "b paris", "2 paris": a marker, optionally followed by its own text
+        marker, _, rest = text.partition(" ")
+        if marker in keys and len(marker) <= 2:
+            index = keys[marker]
+            rest = strip_prefixes(rest)
+            if rest == texts[index] or rest.startswith(texts[index]):
+                return index
+            # "c london" names two different options; let the LLM decide
+            return None
+
+        # typos in the option text
+        ratios = sorted(
+            ((SequenceMatcher(None, text, option).ratio(), i) for i, option in enumerate(texts)),
+            reverse=True,
+        )
+        if ratios and ratios[0][0] >= FUZZY_MIN_RATIO:
+            runner_up = ratios[1][0] if len(ratios) > 1 else 0.0
+            if ratios[0][0] - runner_up >= FUZZY_MIN_MARGIN:
+                return ratios[0][1]
+
+        # exactly one option text mentioned in a longer reply, unless it may
+        # be ruled out ("definitely not paris"); the LLM reads those
+        if negated:
+            return None
+        padded = f" {text} "
+        mentioned = [
+            i for i, option in enumerate(texts) if len(option) >= 3 and f" {option} " in padded
+        ]
+        if len(mentioned) == 1:
+            return mentioned[0]
+
+        return None
@@ -0,0 +1,95 @@
+import logging
+from typing import List, Optional
+
+from django.core.cache import cache
+from django.db.models import F
+
+from courses.models import Course, Module
+
+logger = logging.getLogger(__name__)
+
+# Keyed by the course's module_index_version, so a module change made in any
+# process is seen by every worker on its next lookup; the TTL only evicts
+# superseded versions.
+MODULE_INDEX_TTL = 60 * 60
+
+
+class ModuleIndex:
+    """Ordered module ids of one course with O(1) position lookups"""
+
+    def __init__(self, module_ids: List[str]):
+        self.module_ids = module_ids
+        self._positions = {module_id: i for i, module_id in enumerate(module_ids)}
+
+    @property
+    def total(self) -> int:
+        return len(self.module_ids)
+
+    def position(self, module_id) -> Optional[int]:
+        """1-based position of the module in the course, None if unknown"""
+        index = self._positions.get(str(module_id))
+        return None if index is None else index + 1
+
+    def next_id(self, module_id=None) -> Optional[str]:
+        """Id of the module after `module_id`, or the first one when None"""
+        if module_id is None:
+            return self.module_ids[0] if self.module_ids else None
+        index = self._positions.get(str(module_id))
+        if index is None or index + 1 >= len(self.module_ids):
+            return None
+        return self.module_ids[index + 1]
+
+    def previous_id(self, module_id) -> Optional[str]:
+        index = self._positions.get(str(module_id))
+        if not index:
+            return None
+        return self.module_ids[index - 1]
+
+
+class ModuleIndexService:
+    @staticmethod
+    def _cache_key(course_id, version: int) -> str:
+        return f"courses:module-index:{course_id}:v{version}"
+
+    @classmethod
+    def get_index(cls, course_id) -> ModuleIndex:
+        version = (
+            Course.objects.filter(course_id=course_id)
+            .values_list("module_index_version", flat=True)
+            .first()
+        )
+        key = cls._cache_key(course_id, version or 0)
+        module_ids = cache.get(key)
+        if module_ids is None:
+            module_ids = [
+                str(module_id)
+                for module_id in Module.objects.filter(course_id=course_id)
+                .order_by("order")
+                .values_list("module_id", flat=True)
+            ]
+            cache.set(key, module_ids, MODULE_INDEX_TTL)
+        return ModuleIndex(module_ids)
+
+    @classmethod
+    def invalidate(cls, course_id) -> None:
+        """Move every process to a fresh index by bumping the course's version"""
+        Course.objects.filter(course_id=course_id).update(
+            module_index_version=F("module_index_version") + 1
+        )
+
+    @classmethod
+    def get_next_module(cls, course_id, module: Optional[Module] = None):
+        """Module after `module` (first module when None), or None at the end"""
+        next_id = cls.get_index(course_id).next_id(
+            module.module_id if module else None
+        )
+        return Module.objects.filter(module_id=next_id).first() if next_id else None
+
+    @classmethod
+    def get_previous_module(cls, course_id, module: Module):
+        previous_id = cls.get_index(course_id).previous_id(module.module_id)
+        return (
+            Module.objects.filter(module_id=previous_id).first()
+            if previous_id
+            else None
+        )
@@ -2,6 +2,9 @@ import logging
 import uuid
 from courses.models import Course, Module, Topic, TopicParagraph
 from .topics import TopicService
+from .publishing import ContentPublishService
+from .module_index import ModuleIndexService
+from .retrieval import CourseCompiler
 from typing import Dict, Any, Optional
 from django.db.models import Max
 from django.db import transaction
@@ -73,7 +76,7 @@ class ModuleService:
             course.is_active = False
             course.save()
 
-            with transaction.atomic():
+            with CourseCompiler.batch(), transaction.atomic():
                 module, created = Module.objects.update_or_create(
                     module_id=module_id,
                     defaults={
@@ -140,6 +143,11 @@ class ModuleService:
                     # renumber after all updates
                     TopicService._renumber_topics(module)
 
+                ContentPublishService.publish_module(module)
+                ContentPublishService.publish_course_intro(course)
+
+            ModuleIndexService.invalidate(course.course_id)
+
             action = "created" if created else "updated"
             return {
                 "success": True,
@@ -158,7 +166,11 @@ class ModuleService:
         """Delete a module"""
         try:
             module = Module.objects.get(module_id=module_id)
+            course = module.course
             module.delete()
+            ModuleIndexService.invalidate(course.course_id)
+            CourseCompiler.module_deleted(course)
+            ContentPublishService.publish_course_intro(course)
             return {
                 "success": True,
                 "message": "Module deleted successfully",
@@ -194,7 +206,7 @@ class ModuleService:
             else:
                 dest_course = src_module.course
 
-            with transaction.atomic():
+            with CourseCompiler.batch(), transaction.atomic():
                 # determine order in destination course
                 current_max = (
                     Module.objects.filter(course=dest_course).aggregate(
@@ -233,10 +245,16 @@ class ModuleService:
                                 TopicParagraph.objects.create(
                                     topic=duplicated, content=para.content, order=idx
                                 )
+                        TopicService.refresh_delivery_content(duplicated)
 
                     # renumber to be safe
                     TopicService._renumber_topics(duplicated_module)
 
+                ContentPublishService.publish_module(duplicated_module)
+                ContentPublishService.publish_course_intro(dest_course)
+
+            ModuleIndexService.invalidate(dest_course.course_id)
+
             return {
                 "success": True,
                 "data": cls.to_dict(duplicated_module, include_topics=True),
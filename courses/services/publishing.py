@@ -0,0 +1,180 @@
+import logging
+from typing import Dict, List, Optional
+
+from django.db.models import F
+
+from courses.models import (
+    Assessment,
+    AssessmentQuestion,
+    Course,
+    Module,
+    Topic,
+    TopicParagraph,
+)
+from courses.services.retrieval import CourseCompiler
+
+logger = logging.getLogger(__name__)
+
+# WhatsApp Cloud API limit for a text message body.
+MESSAGE_BODY_LIMIT = 4096
+
+
+class ContentPublishService:
+    """
+    Renders course content into the final WhatsApp message bodies and stores
+    them next to the content, split into segments that each fit in one
+    message. Delivery code then only looks the segments up and sends them.
+    """
+
+    @classmethod
+    def split_message(cls, text: str, limit: int = MESSAGE_BODY_LIMIT) -> List[str]:
+        """Split text into segments of at most `limit` characters, preferring
+        paragraph breaks, then line breaks, then spaces."""
+        text = (text or "").strip()
+        segments = []
+        while len(text) > limit:
+            window = text[:limit]
+            for separator in ("\n\n", "\n", " "):
+                cut = window.rfind(separator)
+                if cut > limit // 2:
+                    break
+            else:
+                cut = limit
+            segments.append(text[:cut].rstrip())
+            text = text[cut:].lstrip()
+        if text:
+            segments.append(text)
+        return segments
+
+    # ---- renderers (also used as a fallback for unpublished content) ----
+
+    @classmethod
+    def paragraph_header(cls, topic: Topic) -> str:
+        """Heading sent above paragraph content when delivering a topic"""
+        return f"📖 *{topic.title}*\n\n"
+
+    @classmethod
+    def render_paragraphs(
+        cls, topic: Topic, paragraphs: List[TopicParagraph]
+    ) -> List[str]:
+        body = "\n\n".join(p.content or "" for p in paragraphs)
+        return cls.split_message(f"{cls.paragraph_header(topic)}{body}")
+
+    @classmethod
+    def render_module_intro(cls, module: Module) -> List[str]:
+        return cls.split_message(f"📚 *{module.title}*\n\n{module.content}")
+
+    @classmethod
+    def render_course_intro(cls, course: Course) -> List[str]:
+        modules = list(course.modules.all().order_by("order"))
+        tags = ", ".join(course.tags) if course.tags else "None"
+        module_titles = "\n".join(
+            [f"  • {i+1}. {m.title}" for i, m in enumerate(modules)]
+        )
+        message = (
+            f"🎓 *Course: {course.course_name}*\n"
+            f"📚 *Category:* {course.category}\n"
+            f"📈 *Level:* {course.level}\n"
+            f"⏳ *Duration:* {course.duration_in_weeks} week(s)\n"
+            f"📦 *Modules:* {len(modules)} module(s)\n"
+            f"🏷️ *Tags:* {tags}\n"
+            f"📖 *Modules Overview:*\n{module_titles}\n\n"
+            f"👉 Let's begin your learning journey!\n"
+        )
+        return cls.split_message(message)
+
+    @classmethod
+    def render_question(
+        cls, question: AssessmentQuestion, position: int, total: int
+    ) -> List[str]:
+        if question.type == "mcq":
+            options = "\n".join(
+                f"{i+1}. {opt['text']}" for i, opt in enumerate(question.options or [])
+            )
+            message = (
+                f"Question {position}/{total}:\n"
+                f"{question.question_text}\n\n"
+                f"Options:\n{options}\n\n"
+                f"Reply with the NUMBER of your answer."
+            )
+        else:
+            message = (
+                f"Question {position}/{total}:\n"
+                f"{question.question_text}\n\n"
+                f"Please type your answer."
+            )
+        return cls.split_message(message)
+
+    # ---- publish steps ----
+
+    @classmethod
+    def content_changed(cls, module: Module, topic: Optional[Topic] = None) -> None:
+        """Drop data derived from the module's content and recompile what
+        changed (only `topic` when given)"""
+        Module.objects.filter(pk=module.pk).update(
+            content_version=F("content_version") + 1
+        )
+        CourseCompiler.content_edited(module, topic)
+
+    @classmethod
+    def publish_topic(cls, topic: Topic) -> None:
+        """Render every paragraph and every paragraph chunk of a topic"""
+        paragraphs = list(topic.paragraphs.all().order_by("order"))
+        by_id = {str(p.paragraph_id): p for p in paragraphs}
+
+        for paragraph in paragraphs:
+            paragraph.rendered_segments = cls.render_paragraphs(topic, [paragraph])
+        TopicParagraph.objects.bulk_update(paragraphs, ["rendered_segments"])
+
+        # chunks are keyed by their last paragraph, which is where the
+        # delivery cursor rests while a chunk is on screen
+        rendered_chunks: Dict[str, List[str]] = {}
+        for chunk in topic.paragraph_chunks or []:
+            members = [by_id[pid] for pid in chunk if pid in by_id]
+            if members:
+                rendered_chunks[str(members[-1].paragraph_id)] = (
+                    cls.render_paragraphs(topic, members)
+                )
+        topic.rendered_chunks = rendered_chunks
+        topic.save(update_fields=["rendered_chunks"])
+        cls.content_changed(topic.module, topic)
+
+    @classmethod
+    def publish_module(cls, module: Module) -> None:
+        module.rendered_intro = cls.render_module_intro(module)
+        module.save(update_fields=["rendered_intro"])
+        cls.content_changed(module)
+
+    @classmethod
+    def publish_course_intro(cls, course: Course) -> None:
+        course.rendered_intro = cls.render_course_intro(course)
+        course.save(update_fields=["rendered_intro"])
+
+    @classmethod
+    def publish_assessment(cls, assessment: Assessment) -> None:
+        questions = list(assessment.questions.all())
+        for position, question in enumerate(questions, start=1):
+            question.rendered_segments = cls.render_question(
+                question, position, len(questions)
+            )
+        AssessmentQuestion.objects.bulk_update(questions, ["rendered_segments"])
+
+    @classmethod
+    def publish_course(cls, course: Course) -> Dict:
+        """Render every message body and compile the search artifacts of a
+        course (run when it is activated)"""
+        try:
+            # per-module and per-topic compiles fold into the one full compile
+            with CourseCompiler.batch():
+                cls.publish_course_intro(course)
+                for module in course.modules.all():
+                    cls.publish_module(module)
+                    for topic in module.topics.all():
+                        cls.publish_topic(topic)
+                    for assessment in module.assessments.all():
+                        cls.publish_assessment(assessment)
+                CourseCompiler.request_compile(course)
+            return {"success": True}
+        except Exception as e:
+            logger.exception(f"Error publishing course {course.course_id}")
+            return {"success": False, "error": str(e)}
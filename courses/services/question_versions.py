@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+from typing import Dict, Iterable, Optional
+
+from courses.models import AssessmentQuestion, QuestionVersion
+
+logger = logging.getLogger(__name__)
+
+
+def version_content(
+    type: str, question_text: str, options=None, correct_answer: Optional[str] = None
+) -> Dict:
+    """Fields of a QuestionVersion; options are kept for MCQs only"""
+    return {
+        "type": type,
+        "question_text": question_text or "",
+        "options": options if type == "mcq" else None,
+        "correct_answer": correct_answer or "",
+    }
+
+
+def question_content(question: AssessmentQuestion) -> Dict:
+    """Version content of a question; an MCQ's correct answer is the text of
+    its correct option, as it is graded"""
+    correct_answer = question.correct_answer
+    if question.type == "mcq":
+        correct_option = next(
+            (opt for opt in question.options or [] if opt.get("isCorrect")), None
+        )
+        correct_answer = correct_option["text"] if correct_option else ""
+    return version_content(
+        question.type, question.question_text, question.options, correct_answer
+    )
+
+
+def content_hash(content: Dict) -> str:
+    source = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class QuestionVersionService:
+    """
+    Content-addressed question versions: identical content always resolves
+    to the same QuestionVersion row, which is never modified afterwards.
+    """
+
+    @staticmethod
+    def resolve(contents: Iterable[Dict]) -> Dict[str, str]:
+        """{content hash: version id} for the given contents, creating the
+        missing versions with one bulk insert"""
+        by_hash = {content_hash(content): content for content in contents}
+        if not by_hash:
+            return {}
+
+        ids = dict(
+            QuestionVersion.objects.filter(content_hash__in=by_hash).values_list(
+                "content_hash", "id"
+            )
+        )
+        missing = [digest for digest in by_hash if digest not in ids]
+        if missing:
+            # a concurrent writer may create the same version; keep theirs
+            QuestionVersion.objects.bulk_create(
+                [
+                    QuestionVersion(content_hash=digest, **by_hash[digest])
+                    for digest in missing
+                ],
+                ignore_conflicts=True,
+            )
+            ids.update(
+                QuestionVersion.objects.filter(content_hash__in=missing).values_list(
+                    "content_hash", "id"
+                )
+            )
+        return ids
+
+    @classmethod
+    def assign(cls, questions: Iterable[AssessmentQuestion]) -> None:
+        """Point each (unsaved) question at the version of its content"""
+        questions = list(questions)
+        contents = [question_content(question) for question in questions]
+        ids = cls.resolve(contents)
+        for question, content in zip(questions, contents):
+            question.version_id = ids[content_hash(content)]
+
+    @classmethod
+    def for_question(cls, question: AssessmentQuestion):
+        """Version id of the question, resolved for questions saved before
+        versions existed"""
+        if question.version_id is None:
+            cls.assign([question])
+            if question.pk:
+                AssessmentQuestion.objects.filter(pk=question.pk).update(
+                    version_id=question.version_id
+                )
+        return question.version_id
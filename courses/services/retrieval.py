@@ -0,0 +1,438 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from courses.models import ContentChunk, Course, Module, Topic, TopicParagraph
+
+logger = logging.getLogger(__name__)
+
+# Keyed by the course's search_version, so edits never serve a stale index;
+# the TTL only bounds memory for courses nobody asks about.
+RETRIEVAL_INDEX_TTL = 24 * 60 * 60
+
+# Module content is split into chunks of roughly this many characters
+MODULE_CHUNK_CHARS = 800
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does",
+    "for", "from", "how", "i", "in", "is", "it", "its", "me", "my", "of",
+    "on", "or", "so", "that", "the", "this", "to", "was", "what", "when",
+    "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token
+        for token in re.findall(r"[a-z0-9]+", (text or "").lower())
+        if token not in STOPWORDS
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def content_hash(source: str, text: str) -> str:
+    return hashlib.blake2b(f"{source}\x00{text}".encode("utf-8"), digest_size=20).hexdigest()
+
+
+def split_module_content(content: str) -> List[str]:
+    """Module content as blocks of roughly MODULE_CHUNK_CHARS, split on blank lines"""
+    chunks, current = [], ""
+    for block in re.split(r"\n\s*\n", content or ""):
+        block = block.strip()
+        if not block:
+            continue
+        if current and len(current) + len(block) > MODULE_CHUNK_CHARS:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class CourseCompiler:
+    """
+    Compiles a course's searchable artifacts: chunk boundaries and term
+    frequencies (ContentChunk rows) and the BM25 keyword index with length
+    statistics (Course.search_index). Runs in full when a course is
+    activated; content edits recompile only the edited module or topic, and
+    only chunks whose text changed are tokenized again.
+
+    Every compile rewrites the course's index once, so multi-step publishes
+    run inside batch(): edits are collected and compiled together on exit.
+    """
+
+    _batches = threading.local()
+
+    @staticmethod
+    def _module_chunks(module: Module) -> List[Dict]:
+        return [
+            {
+                "key": ("module", module.pk, position),
+                "module_id": module.pk,
+                "paragraph_id": None,
+                "kind": "module",
+                "position": position,
+                "source": module.title,
+                "text": text,
+            }
+            for position, text in enumerate(split_module_content(module.content))
+        ]
+
+    @staticmethod
+    def _paragraph_chunks(paragraphs) -> List[Dict]:
+        return [
+            {
+                "key": ("paragraph", paragraph.pk),
+                "module_id": paragraph.topic.module_id,
+                "paragraph_id": paragraph.pk,
+                "kind": "paragraph",
+                "position": 0,
+                "source": f"{paragraph.topic.module.title} / {paragraph.topic.title}",
+                "text": paragraph.content,
+            }
+            for paragraph in paragraphs
+        ]
+
+    @staticmethod
+    def _row_key(row: ContentChunk):
+        if row.kind == "module":
+            return ("module", row.module_id, row.position)
+        return ("paragraph", row.paragraph_id) if row.paragraph_id else None
+
+    @classmethod
+    def compile_course(cls, course: Course) -> Dict:
+        modules = list(Module.objects.filter(course=course).order_by("order"))
+        expected = [chunk for module in modules for chunk in cls._module_chunks(module)]
+        expected += cls._paragraph_chunks(
+            TopicParagraph.objects.filter(
+                topic__module__course=course, topic__is_active=True
+            ).select_related("topic", "topic__module")
+        )
+        return cls._sync(course, expected, ContentChunk.objects.filter(course=course))
+
+    @classmethod
+    def compile_module(cls, module: Module, topic: Optional[Topic] = None) -> Dict:
+        """Recompile one module, or just one of its topics"""
+        paragraphs = TopicParagraph.objects.filter(topic__is_active=True).select_related(
+            "topic", "topic__module"
+        )
+        if topic is not None:
+            expected = cls._paragraph_chunks(paragraphs.filter(topic=topic))
+            existing = ContentChunk.objects.filter(paragraph__topic=topic)
+        else:
+            expected = cls._module_chunks(module) + cls._paragraph_chunks(
+                paragraphs.filter(topic__module=module)
+            )
+            existing = ContentChunk.objects.filter(module=module)
+        # chunks orphaned by deleted or recreated paragraphs
+        existing = existing | ContentChunk.objects.filter(
+            course_id=module.course_id, kind="paragraph", paragraph__isnull=True
+        )
+        return cls._sync(module.course, expected, existing)
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """Defer compiles requested inside the block to one per course on exit"""
+        outer = getattr(cls._batches, "pending", None)
+        if outer is not None:
+            yield
+            return
+        cls._batches.pending = pending = {}
+        try:
+            yield
+        finally:
+            cls._batches.pending = None
+        for course_id, edits in pending.items():
+            cls._compile_edits(course_id, edits)
+
+    @classmethod
+    def _compile_edits(cls, course_id, edits: Dict) -> None:
+        course = Course.objects.get(pk=course_id)
+        if edits["full"]:
+            cls.compile_course(course)
+            return
+        if not Course.objects.filter(pk=course_id).exclude(search_index={}).exists():
+            return  # uncompiled courses wait for activation
+        modules = {module.pk: module for module, _ in edits["targets"]}
+        if len(modules) != 1:
+            cls.compile_course(course)
+            return
+        topics = {topic for _, topic in edits["targets"]}
+        (module,) = modules.values()
+        if None in topics or len(topics) > 1:
+            cls.compile_module(module)
+        else:
+            cls.compile_module(module, topics.pop())
+
+    @classmethod
+    def _defer(cls, course_id, full=False, target=None) -> bool:
+        """Record work for the open batch; False when there is none"""
+        pending = getattr(cls._batches, "pending", None)
+        if pending is None:
+            return False
+        edits = pending.setdefault(course_id, {"full": False, "targets": []})
+        edits["full"] = edits["full"] or full
+        if target is not None:
+            edits["targets"].append(target)
+        return True
+
+    @classmethod
+    def request_compile(cls, course: Course) -> None:
+        """Full compile, deferred to the end of the open batch if any"""
+        if not cls._defer(course.pk, full=True):
+            cls.compile_course(course)
+
+    @classmethod
+    def content_edited(cls, module: Module, topic: Optional[Topic] = None) -> None:
+        """Keep a compiled course's artifacts current; uncompiled courses wait for activation"""
+        if cls._defer(module.course_id, target=(module, topic)):
+            return
+        if Course.objects.filter(pk=module.course_id).exclude(search_index={}).exists():
+            cls.compile_module(module, topic)
+
+    @classmethod
+    def module_deleted(cls, course: Course) -> None:
+        # the module's chunks are gone with it; this prunes them from the index
+        if Course.objects.filter(pk=course.pk).exclude(search_index={}).exists():
+            cls._sync(course, [], ContentChunk.objects.none())
+
+    @classmethod
+    def _sync(cls, course: Course, expected: List[Dict], existing) -> Dict:
+        stats = {"tokenized": 0, "moved": 0, "removed": 0, "unchanged": 0}
+        with transaction.atomic():
+            course = Course.objects.select_for_update().get(pk=course.pk)
+            index = course.search_index or {"postings": {}, "lengths": {}}
+            postings, lengths = index["postings"], index["lengths"]
+
+            def unindex(row):
+                for term in row.terms:
+                    entries = postings.get(term, {})
+                    entries.pop(str(row.pk), None)
+                    if not entries:
+                        postings.pop(term, None)
+                lengths.pop(str(row.pk), None)
+
+            def reindex(row):
+                for term, frequency in row.terms.items():
+                    postings.setdefault(term, {})[str(row.pk)] = frequency
+                lengths[str(row.pk)] = row.length
+
+            rows_by_key, pool = {}, []
+            for row in existing.distinct():
+                key = cls._row_key(row)
+                if key is None or key in rows_by_key:
+                    pool.append(row)
+                else:
+                    rows_by_key[key] = row
+
+            unmatched = []
+            for chunk in expected:
+                chunk["hash"] = content_hash(chunk["source"], chunk["text"])
+                row = rows_by_key.pop(chunk["key"], None)
+                if row is None:
+                    unmatched.append(chunk)
+                elif row.content_hash == chunk["hash"]:
+                    stats["unchanged"] += 1
+                else:
+                    unindex(row)
+                    cls._fill(row, chunk, tokenize_text=True)
+                    row.save()
+                    reindex(row)
+                    stats["tokenized"] += 1
+            pool.extend(rows_by_key.values())
+
+            # text that only moved (e.g. paragraphs recreated by a topic edit)
+            # keeps its row, id and postings
+            pool_by_hash = defaultdict(list)
+            for row in pool:
+                pool_by_hash[row.content_hash].append(row)
+            for chunk in unmatched:
+                if pool_by_hash[chunk["hash"]]:
+                    row = pool_by_hash[chunk["hash"]].pop()
+                    cls._fill(row, chunk, tokenize_text=False)
+                    row.save()
+                    stats["moved"] += 1
+                else:
+                    row = ContentChunk(course=course)
+                    cls._fill(row, chunk, tokenize_text=True)
+                    row.save()
+                    reindex(row)
+                    stats["tokenized"] += 1
+
+            leftovers = [row for rows in pool_by_hash.values() for row in rows]
+            for row in leftovers:
+                unindex(row)
+            ContentChunk.objects.filter(pk__in=[row.pk for row in leftovers]).delete()
+            stats["removed"] = len(leftovers)
+
+            # chunks deleted with their module
+            live = {str(pk) for pk in ContentChunk.objects.filter(course=course).values_list("pk", flat=True)}
+            for chunk_id in set(lengths) - live:
+                for term in list(postings):
+                    postings[term].pop(chunk_id, None)
+                    if not postings[term]:
+                        del postings[term]
+                lengths.pop(chunk_id, None)
+                stats["removed"] += 1
+
+            index["avgLength"] = sum(lengths.values()) / len(lengths) if lengths else 0.0
+            course.search_index = index
+            course.search_version += 1
+            course.save(update_fields=["search_index", "search_version"])
+
+        logger.info(f"Compiled course {course.course_id}: {stats}")
+        return stats
+
+    @staticmethod
+    def _fill(row: ContentChunk, chunk: Dict, tokenize_text: bool) -> None:
+        row.module_id = chunk["module_id"]
+        row.paragraph_id = chunk["paragraph_id"]
+        row.kind = chunk["kind"]
+        row.position = chunk["position"]
+        row.source = chunk["source"][:500]
+        row.text = chunk["text"]
+        row.content_hash = chunk["hash"]
+        if tokenize_text:
+            terms = tokenize(f"{chunk['source']} {chunk['text']}")
+            row.terms = dict(Counter(terms))
+            row.length = len(terms)
+
+
+class CourseRetrievalService:
+    """
+    BM25 search over a course's compiled chunks, used to give the tutor only
+    the passages relevant to a learner's question. Nothing here tokenizes
+    course content; CourseCompiler did that at publish time.
+    """
+
+    @staticmethod
+    def _cache_key(course_id, version: int) -> str:
+        return f"courses:retrieval-index:{course_id}:v{version}"
+
+    @classmethod
+    def get_index(cls, course: Course) -> Dict:
+        # only the version is read per question; the postings JSON is loaded
+        # and parsed on a cache miss
+        version = (
+            Course.objects.filter(pk=course.pk)
+            .values_list("search_version", flat=True)
+            .get()
+        )
+        index = cache.get(cls._cache_key(course.pk, version))
+        if index is not None:
+            return index
+
+        version, search_index = (
+            Course.objects.filter(pk=course.pk)
+            .values_list("search_version", "search_index")
+            .get()
+        )
+        if not search_index:
+            # never compiled (activated before search artifacts existed):
+            # answer without passages and compile off the request path
+            logger.warning(f"Course {course.pk} has no search index; queueing a compile")
+            cls._queue_compile(course.pk)
+            return {"postings": {}, "lengths": {}, "avgLength": 0.0, "chunks": {}}
+
+        index = dict(search_index)
+        index["chunks"] = {
+            str(chunk["id"]): {
+                "moduleId": str(chunk["module_id"]),
+                "source": chunk["source"],
+                "text": chunk["text"],
+            }
+            for chunk in ContentChunk.objects.filter(course_id=course.pk).values(
+                "id", "module_id", "source", "text"
+            )
+        }
+        cache.set(cls._cache_key(course.pk, version), index, RETRIEVAL_INDEX_TTL)
+        return index
+
+    @staticmethod
+    def _queue_compile(course_id) -> None:
+        # one compile per course at a time across the workers sharing the cache
+        if not cache.add(f"courses:retrieval-compile:{course_id}", True, 10 * 60):
+            return
+
+        def run():
+            from django.db import close_old_connections
+
+            try:
+                CourseCompiler.compile_course(Course.objects.get(pk=course_id))
+            except Exception:
+                logger.exception(f"Background compile of course {course_id} failed")
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=run, name="course-compile", daemon=True).start()
+
+    @classmethod
+    def search(
+        cls,
+        course: Course,
+        query: str,
+        top_k: int = 5,
+        token_budget: int = 800,
+        prefer_module_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Highest scoring chunks for `query`, at most `top_k` of them and no
+        more than `token_budget` estimated tokens in total. Chunks from
+        `prefer_module_id` (the learner's current module) get a small boost.
+        """
+        index = cls.get_index(course)
+        chunks = index["chunks"]
+        if not chunks:
+            return []
+
+        total = len(index["lengths"])
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = index["postings"].get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                length_norm = 1 - BM25_B + BM25_B * (
+                    index["lengths"][chunk_id] / (index["avgLength"] or 1)
+                )
+                scores[chunk_id] += idf * (
+                    frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                )
+
+        if prefer_module_id:
+            for chunk_id in scores:
+                chunk = chunks.get(chunk_id)
+                if chunk and chunk["moduleId"] == str(prefer_module_id):
+                    scores[chunk_id] *= 1.2
+
+        selected, used = [], 0
+        for chunk_id in sorted(scores, key=scores.get, reverse=True):
+            chunk = chunks.get(chunk_id)
+            if chunk is None:
+                continue
+            cost = estimate_tokens(chunk["text"])
+            if used + cost > token_budget:
+                continue
+            selected.append({**chunk, "score": round(scores[chunk_id], 3)})
+            used += cost
+            if len(selected) >= top_k:
+                break
+        return selected
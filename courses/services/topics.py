@@ -5,6 +5,7 @@ from typing import Optional, Dict, List
 from django.db import transaction
 from courses.models import Topic, Module, TopicParagraph
 from django.db.models import Max, Case, When, IntegerField, F
+from courses.services.publishing import ContentPublishService, MESSAGE_BODY_LIMIT
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +95,8 @@ class TopicService:
                             topic=topic, content=p.get("content"), order=idx
                         )
 
+                cls.refresh_delivery_content(topic)
+
                 return {"success": True, "data": cls.to_dict(topic)}
 
         except Exception as e:
@@ -108,6 +111,7 @@ class TopicService:
                 topic = Topic.objects.get(topic_id=topic_id)
                 module = topic.module
                 topic.delete()
+                ContentPublishService.content_changed(module)
 
                 # Renumber remaining topics
                 cls._renumber_topics(module)
@@ -202,6 +206,57 @@ class TopicService:
                 topic.order = order
                 topic.save()
 
+    @classmethod
+    def rebuild_paragraph_chunks(cls, topic: Topic) -> List[List[str]]:
+        """
+        Pack consecutive paragraphs of a topic into groups whose combined
+        message (topic header + paragraphs separated by blank lines) fits in
+        one WhatsApp text body. A paragraph that is too long on its own gets
+        a group to itself. Stored on the topic for chunked delivery mode.
+        """
+        header_length = len(ContentPublishService.paragraph_header(topic))
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_length = header_length
+
+        for paragraph in topic.paragraphs.all().order_by("order"):
+            length = len(paragraph.content or "")
+            separator = 2 if current else 0  # "\n\n" between paragraphs
+            if current and current_length + separator + length > MESSAGE_BODY_LIMIT:
+                chunks.append(current)
+                current, current_length, separator = [], header_length, 0
+            current.append(str(paragraph.paragraph_id))
+            current_length += separator + length
+
+        if current:
+            chunks.append(current)
+
+        topic.paragraph_chunks = chunks
+        topic.save(update_fields=["paragraph_chunks"])
+        return chunks
+
+    @classmethod
+    def refresh_delivery_content(cls, topic: Topic) -> None:
+        """Rebuild chunks and pre-rendered messages after paragraphs change"""
+        cls.rebuild_paragraph_chunks(topic)
+        ContentPublishService.publish_topic(topic)
+
+    @classmethod
+    def get_paragraph_chunk(
+        cls, topic: Topic, paragraph: TopicParagraph
+    ) -> List[TopicParagraph]:
+        """
+        Return the ordered paragraphs sharing a chunk with `paragraph`.
+        Falls back to the paragraph alone when chunks have not been built.
+        """
+        paragraph_id = str(paragraph.paragraph_id)
+        for chunk in topic.paragraph_chunks or []:
+            if paragraph_id in chunk:
+                return list(
+                    topic.paragraphs.filter(paragraph_id__in=chunk).order_by("order")
+                )
+        return [paragraph]
+
     @classmethod
     def duplicate_topic(
         cls, topic_id: str, dest_module_id: Optional[str] = None
@@ -249,6 +304,7 @@ class TopicService:
                         TopicParagraph.objects.create(
                             topic=duplicated, content=para.content, order=idx
                         )
+                cls.refresh_delivery_content(duplicated)
 
                 # ensure contiguous ordering (defensive)
                 cls._renumber_topics(dest_module)
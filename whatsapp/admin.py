@@ -1,7 +1,10 @@
 from django.contrib import admin
 from .models import (
     AutomationRule,
+    IntentDecisionLog,
+    LLMCallLog,
     ModuleDeliveryProgress,
+    QuestionItemStats,
     TopicDeliveryProgress,
     UserMessageLog,
     WhatsappUser,
@@ -19,3 +22,6 @@ admin.site.register(UserAssessmentAttempt)
 admin.site.register(UserQuestionResponse)
 admin.site.register(AutomationRule)
 admin.site.register(UserMessageLog)
+admin.site.register(IntentDecisionLog)
+admin.site.register(LLMCallLog)
+admin.site.register(QuestionItemStats)
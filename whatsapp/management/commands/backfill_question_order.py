@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from courses.models import Assessment, AssessmentQuestion
+from courses.services.publishing import ContentPublishService
+
+
+class Command(BaseCommand):
+    help = (
+        "Number the questions of assessments saved before questions had an "
+        "order (tied order values), keeping their current (order, pk) sequence"
+    )
+
+    def handle(self, *args, **options):
+        tied = {
+            row["assessment_id"]
+            for row in AssessmentQuestion.objects.order_by()
+            .values("assessment_id", "order")
+            .annotate(count=Count("pk"))
+            .filter(count__gt=1)
+        }
+        renumbered = 0
+        for assessment in Assessment.objects.filter(pk__in=tied):
+            with transaction.atomic():
+                questions = list(
+                    assessment.questions.select_for_update().order_by("order", "pk")
+                )
+                for order, question in enumerate(questions, start=1):
+                    question.order = order
+                AssessmentQuestion.objects.bulk_update(questions, ["order"])
+                # "Question i/n" is baked into the rendered segments
+                ContentPublishService.publish_assessment(assessment)
+            renumbered += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Renumbered the questions of {renumbered} assessment(s)")
+        )
@@ -0,0 +1,113 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.models import AssessmentQuestion, QuestionVersion
+from courses.services.question_versions import (
+    QuestionVersionService,
+    content_hash,
+    version_content,
+)
+from whatsapp.models import UserQuestionResponse
+
+
+class Command(BaseCommand):
+    help = (
+        "Point questions and responses saved before question versions existed "
+        "at the content-hashed QuestionVersion of their snapshot, and empty "
+        "the per-response snapshot copies"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows converted per transaction",
+        )
+        parser.add_argument(
+            "--keep-snapshots",
+            action="store_true",
+            help="Link versions but leave the snapshot columns filled",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        versions_before = QuestionVersion.objects.count()
+
+        questions = self.backfill_questions(batch_size)
+        self.stdout.write(f"Linked {questions} question(s) to their version")
+
+        remaining = UserQuestionResponse.objects.filter(
+            question_version__isnull=True
+        ).count()
+        converted = 0
+        while True:
+            with transaction.atomic():
+                batch = self.backfill_responses(batch_size, options["keep_snapshots"])
+            if not batch:
+                break
+            converted += batch
+            self.stdout.write(f"Converted {converted}/{remaining} response(s)")
+
+        created = QuestionVersion.objects.count() - versions_before
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{converted} response(s) now share {created} new question version(s)"
+            )
+        )
+
+    def backfill_questions(self, batch_size: int) -> int:
+        linked = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    AssessmentQuestion.objects.filter(version__isnull=True)
+                    .select_for_update()
+                    .order_by("pk")[:batch_size]
+                )
+                if not batch:
+                    return linked
+                QuestionVersionService.assign(batch)
+                AssessmentQuestion.objects.bulk_update(batch, ["version_id"])
+            linked += len(batch)
+
+    def backfill_responses(self, batch_size: int, keep_snapshots: bool) -> int:
+        """Convert the next batch of unversioned responses; converted rows
+        leave the filter, so no offset is needed"""
+        batch = list(
+            UserQuestionResponse.objects.filter(question_version__isnull=True)
+            .select_for_update()
+            .order_by("pk")
+            .only(
+                "id",
+                "question_type_snapshot",
+                "question_text_snapshot",
+                "options_snapshot",
+                "correct_answer_snapshot",
+            )[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        contents = [
+            version_content(
+                response.question_type_snapshot,
+                response.question_text_snapshot,
+                response.options_snapshot,
+                response.correct_answer_snapshot,
+            )
+            for response in batch
+        ]
+        ids = QuestionVersionService.resolve(contents)
+
+        fields = ["question_version_id"]
+        if not keep_snapshots:
+            fields += ["question_text_snapshot", "options_snapshot", "correct_answer_snapshot"]
+        for response, content in zip(batch, contents):
+            response.question_version_id = ids[content_hash(content)]
+            if not keep_snapshots:
+                response.question_text_snapshot = ""
+                response.options_snapshot = None
+                response.correct_answer_snapshot = ""
+        UserQuestionResponse.objects.bulk_update(batch, fields)
+        return len(batch)
@@ -0,0 +1,93 @@
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from whatsapp.services.certificate_stamping import CertificateStamper
+from whatsapp.services.cretificates_service import CertificateService
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-learner certificate and badge generation: full WeasyPrint "
+        "render against stamping the course's cached background"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count", type=int, default=20, help="Learners rendered per path"
+        )
+        parser.add_argument("--course", default="Introduction to Data Analysis")
+
+    def _run(self, label, render, count):
+        """Median ms per learner (certificate + badge) and peak Python memory"""
+        timings = []
+        tracemalloc.start()
+        for i in range(count):
+            start = time.perf_counter()
+            paths = render(f"Learner Number {i}")
+            timings.append((time.perf_counter() - start) * 1000)
+            for path in paths:
+                os.remove(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        timings.sort()
+        return {
+            "label": label,
+            "median": timings[len(timings) // 2],
+            "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            "peak_mb": peak / 1024 / 1024,
+            "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+
+    def handle(self, *args, **options):
+        count = max(1, options["count"])
+        course = options["course"]
+        completed_at = datetime.now()
+
+        def weasyprint(name):
+            return (
+                CertificateService.generate_certificate(name, course, completed_at),
+                CertificateService.generate_badge(name, course, completed_at),
+            )
+
+        def stamped(name):
+            return (
+                CertificateStamper.certificate(name, course, completed_at),
+                CertificateStamper.badge(name, course, completed_at),
+            )
+
+        with tempfile.TemporaryDirectory() as template_dir, override_settings(
+            CERTIFICATE_TEMPLATE_DIR=template_dir
+        ):
+            CertificateStamper._memo.clear()
+            start = time.perf_counter()
+            for path in stamped("Warm Up"):
+                os.remove(path)
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            # stamping first: max RSS only grows, so the WeasyPrint run
+            # cannot inflate the stamping figure
+            rows = [
+                self._run("stamped", stamped, count),
+                self._run("weasyprint", weasyprint, count),
+            ]
+            CertificateStamper._memo.clear()
+
+        self.stdout.write(
+            f"First learner of a course (renders both backgrounds): {cold_ms:.1f} ms"
+        )
+        self.stdout.write(
+            f"{'path':<11}  {'median ms':>10}  {'p95 ms':>8}  "
+            f"{'py peak MB':>10}  {'max RSS MB':>10}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['label']:<11}  {row['median']:>10.1f}  {row['p95']:>8.1f}  "
+                f"{row['peak_mb']:>10.1f}  {row['rss_mb']:>10.1f}"
+            )
@@ -0,0 +1,141 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Assessment, AssessmentQuestion, Course, Module
+from courses.services.assesments import AssessmentService
+from courses.services.mcq_matcher import McqAnswerMatcher
+from courses.services.publishing import ContentPublishService
+
+
+class _Rollback(Exception):
+    pass
+
+
+def build_questions(count, revision=0):
+    """Question payloads as the dashboard sends them; `revision` rewords
+    every fifth question"""
+    questions = []
+    for i in range(count):
+        text = f"Question {i}" + (f" (rev {revision})" if revision and i % 5 == 0 else "")
+        if i % 2:
+            questions.append(
+                {
+                    "questionId": str(uuid.UUID(int=i + 1)),
+                    "type": "open",
+                    "questionText": text,
+                    "marks": 1,
+                    "correctAnswer": f"Answer {i}",
+                }
+            )
+        else:
+            questions.append(
+                {
+                    "questionId": str(uuid.UUID(int=i + 1)),
+                    "type": "mcq",
+                    "questionText": text,
+                    "marks": 1,
+                    "options": [
+                        {"text": f"Option {i}-{j}", "isCorrect": j == 0} for j in range(4)
+                    ],
+                }
+            )
+    return questions
+
+
+def legacy_save(assessment, questions):
+    """The previous write path: delete everything, one INSERT per question,
+    then re-render and rebuild lookups"""
+    assessment.questions.all().delete()
+    for order, q in enumerate(questions, start=1):
+        AssessmentQuestion.objects.create(
+            assessment=assessment,
+            question_id=q.get("questionId"),
+            order=order,
+            type=q.get("type"),
+            question_text=q.get("questionText"),
+            marks=q.get("marks", 0),
+            options=q.get("options") if q.get("type") == "mcq" else None,
+            correct_answer=q.get("correctAnswer") if q.get("type") == "open" else None,
+        )
+    ContentPublishService.publish_assessment(assessment)
+    McqAnswerMatcher.publish_lookups(assessment)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time saving an assessment's questions (initial save and an edit of "
+        "every fifth question) with the bulk sync and the old per-row path. "
+        "Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10,50,200,1000",
+            help="Comma separated question counts",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per size; the best run is reported"
+        )
+
+    def _measure(self, module, save, questions, edited):
+        best = None
+        for _ in range(self.repeat):
+            assessment = Assessment.objects.create(
+                title="benchmark", course=module.course, module=module, is_active=False
+            )
+            timings = []
+            for payload in (questions, edited):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    save(assessment, payload)
+                    elapsed = (time.perf_counter() - start) * 1000
+                timings.append((elapsed, len(queries)))
+            assessment.delete()
+            if best is None or sum(t for t, _ in timings) < sum(t for t, _ in best):
+                best = timings
+        return best
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        self.repeat = max(1, options["repeat"])
+
+        paths = {
+            "bulk": AssessmentService.sync_questions,
+            "legacy": legacy_save,
+        }
+        rows = []
+        try:
+            with transaction.atomic():
+                course = Course.objects.create(
+                    course_name="Question sync benchmark",
+                    category="benchmark",
+                    duration_in_weeks=1,
+                    level="Beginner",
+                )
+                module = Module.objects.create(course=course, title="benchmark", order=1)
+                for size in sizes:
+                    questions = build_questions(size)
+                    edited = build_questions(size, revision=1)
+                    for name, save in paths.items():
+                        (create_ms, create_q), (edit_ms, edit_q) = self._measure(
+                            module, save, questions, edited
+                        )
+                        rows.append((size, name, create_ms, create_q, edit_ms, edit_q))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(
+            f"{'questions':>9}  {'path':<6}  {'create ms':>10}  {'queries':>7}"
+            f"  {'edit ms':>10}  {'queries':>7}"
+        )
+        for size, name, create_ms, create_q, edit_ms, edit_q in rows:
+            self.stdout.write(
+                f"{size:>9}  {name:<6}  {create_ms:>10.1f}  {create_q:>7}"
+                f"  {edit_ms:>10.1f}  {edit_q:>7}"
+            )
@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+DEFAULT_MODULES = [
+    "courses.services.course",
+    "courses.services.modules",
+    "courses.services.topics",
+    "courses.services.assesments",
+    "courses.services.image_service",
+    "whatsapp.services.ai_reponse_interpreter",
+    "whatsapp.services.messaging",
+    "whatsapp.services.emailing_service",
+    "whatsapp.services.enrollment_service",
+    "whatsapp.services.module_delivery_service",
+    "whatsapp.services.cretificates_service",
+    "whatsapp.services.assessment_service",
+    "whatsapp.services.post_course_manager",
+    "whatsapp.services.course_delivery_manager",
+    "whatsapp.services.orientation_manager",
+    "whatsapp.services.onboarding_manager",
+    "whatsapp.views",
+    "courses.views",
+]
+
+# Third-party packages that used to be imported eagerly by the service layer.
+HEAVY_DEPENDENCIES = ["openai", "weasyprint", "boto3"]
+
+# Runs in a fresh interpreter so every measurement starts from a cold
+# sys.modules; django.setup() is excluded from the timed section.
+PROBE = """
+import importlib, json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "whatsapp_bot.settings")
+import django
+django.setup()
+before = set(sys.modules)
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+if hasattr(module, "AIResponseInterpreter"):
+    module.AIResponseInterpreter(api_key=None)
+heavy = [name for name in sys.argv[2:] if name in sys.modules and name not in before]
+print(json.dumps({"ms": elapsed * 1000, "heavy": heavy}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Report the cold import time of each service module (one fresh interpreter per module)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "modules",
+            nargs="*",
+            help="Dotted module paths to measure (defaults to the service layer and views)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per module; the best run is reported",
+        )
+        parser.add_argument(
+            "--include-deps",
+            action="store_true",
+            help="Also measure the heavy third-party packages on their own",
+        )
+
+    def _measure(self, module_name):
+        env = os.environ.copy()
+        env.setdefault("DJANGO_SETTINGS_MODULE", "whatsapp_bot.settings")
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, module_name, *HEAVY_DEPENDENCIES],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()
+            raise RuntimeError(error[-1] if error else "import failed")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or list(DEFAULT_MODULES)
+        if options["include_deps"]:
+            modules += HEAVY_DEPENDENCIES
+        repeat = max(1, options["repeat"])
+
+        rows = []
+        for module_name in modules:
+            try:
+                runs = [self._measure(module_name) for _ in range(repeat)]
+            except RuntimeError as e:
+                self.stderr.write(f"{module_name}: {e}")
+                continue
+            best = min(runs, key=lambda run: run["ms"])
+            rows.append((module_name, best["ms"], best["heavy"]))
+
+        width = max((len(name) for name, _, _ in rows), default=10)
+        self.stdout.write(f"{'module'.ljust(width)}  {'import ms':>10}  heavy deps loaded")
+        for name, ms, heavy in sorted(rows, key=lambda row: row[1], reverse=True):
+            self.stdout.write(
+                f"{name.ljust(width)}  {ms:>10.1f}  {', '.join(heavy) or '-'}"
+            )
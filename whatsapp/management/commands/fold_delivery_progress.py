@@ -0,0 +1,127 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from courses.models import Course, Topic
+from whatsapp.models import (
+    ModuleDeliveryProgress,
+    TopicDeliveryProgress,
+    UserEnrollment,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold ModuleDeliveryProgress/TopicDeliveryProgress rows into the "
+        "cursor and completed-topics bitmap stored on each enrollment"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Enrollments folded per transaction",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the progress rows once they are folded",
+        )
+
+    def handle(self, *args, **options):
+        assigned = self.assign_progress_bits()
+        self.stdout.write(f"Assigned bitmap positions to {assigned} topic(s)")
+
+        enrollment_ids = set(
+            ModuleDeliveryProgress.objects.values_list("enrollment_id", flat=True)
+        ) | set(TopicDeliveryProgress.objects.values_list("enrollment_id", flat=True))
+        enrollment_ids = sorted(enrollment_ids)
+
+        batch_size = options["batch_size"]
+        folded = 0
+        for start in range(0, len(enrollment_ids), batch_size):
+            batch = enrollment_ids[start : start + batch_size]
+            with transaction.atomic():
+                for enrollment in UserEnrollment.objects.filter(id__in=batch):
+                    self.fold_enrollment(enrollment)
+                if options["delete"]:
+                    ModuleDeliveryProgress.objects.filter(
+                        enrollment_id__in=batch
+                    ).delete()
+                    TopicDeliveryProgress.objects.filter(
+                        enrollment_id__in=batch
+                    ).delete()
+            folded += len(batch)
+            self.stdout.write(f"Folded {folded}/{len(enrollment_ids)} enrollment(s)")
+
+        self.stdout.write(self.style.SUCCESS("Delivery progress folded"))
+
+    def assign_progress_bits(self) -> int:
+        """Give every topic saved before the bitmap existed a position in it"""
+        assigned = 0
+        for course in Course.objects.all():
+            topics = list(
+                Topic.objects.filter(module__course=course, progress_bit__isnull=True)
+                .order_by("module__order", "order")
+            )
+            if not topics:
+                continue
+            max_bit = Topic.objects.filter(module__course=course).aggregate(
+                Max("progress_bit")
+            )["progress_bit__max"]
+            next_bit = 0 if max_bit is None else max_bit + 1
+            for topic in topics:
+                topic.progress_bit = next_bit
+                next_bit += 1
+            Topic.objects.bulk_update(topics, ["progress_bit"])
+            assigned += len(topics)
+        return assigned
+
+    def fold_enrollment(self, enrollment: UserEnrollment) -> None:
+        module_rows = list(
+            ModuleDeliveryProgress.objects.filter(enrollment=enrollment).order_by(
+                "-last_updated"
+            )
+        )
+        topic_rows = {
+            row.topic_id: row
+            for row in TopicDeliveryProgress.objects.filter(
+                enrollment=enrollment
+            ).select_related("topic")
+        }
+
+        # state already written through the cursor is newer than any row
+        for row in module_rows:
+            enrollment.module_states.setdefault(str(row.module_id), row.state)
+
+        for row in topic_rows.values():
+            if row.state == "content_delivered":
+                enrollment.set_topic_completed(row.topic)
+
+        if enrollment.cursor_topic_id is None:
+            candidates = [row for row in module_rows if row.current_topic_id]
+            current = next(
+                (
+                    row
+                    for row in candidates
+                    if row.module_id == enrollment.current_module_id
+                ),
+                candidates[0] if candidates else None,
+            )
+            if current:
+                enrollment.cursor_topic_id = current.current_topic_id
+                topic_row = topic_rows.get(current.current_topic_id)
+                if topic_row:
+                    enrollment.cursor_paragraph_id = topic_row.current_paragraph_id
+                    enrollment.cursor_topic_state = topic_row.state
+
+        enrollment.save(
+            update_fields=[
+                "module_states",
+                "completed_topics",
+                "cursor_topic",
+                "cursor_paragraph",
+                "cursor_topic_state",
+            ]
+        )
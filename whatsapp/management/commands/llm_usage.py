@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from whatsapp.services.llm_metrics import LLMUsageService
+
+
+class Command(BaseCommand):
+    help = "LLM calls, cache hits, latency, tokens and estimated cost per call site"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Report on calls made in the last N days",
+        )
+
+    def handle(self, *args, **options):
+        result = LLMUsageService.get_usage(days=options["days"])
+        if not result["success"]:
+            raise CommandError(result["error"])
+
+        data = result["data"]
+        self.stdout.write(
+            f"{'call site':<15}{'calls':>8}{'failed':>8}{'cached':>8}"
+            f"{'avg ms':>9}{'max ms':>9}{'tokens in':>11}{'tokens out':>12}{'cost $':>10}"
+        )
+        for site in data["callSites"]:
+            self.stdout.write(
+                f"{site['callSite']:<15}{site['calls']:>8}{site['failures']:>8}"
+                f"{site['cacheHits']:>8}{site['avgLatencyMs']:>9}{site['maxLatencyMs']:>9}"
+                f"{site['promptTokens']:>11}{site['completionTokens']:>12}"
+                f"{site['costUsd']:>10.4f}"
+            )
+        self.stdout.write(
+            f"\n{data['totalCalls']} call(s) in the last {data['days']} day(s), "
+            f"estimated cost ${data['totalCostUsd']:.4f}"
+        )
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from whatsapp.services.intent_classifier import IntentClassifier
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete logged intent decisions older than the retention period; the "
+        "classifier only trains on the most recent ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.INTENT_LOG_RETENTION_DAYS,
+            help="Keep decisions from the last N days",
+        )
+
+    def handle(self, *args, **options):
+        deleted = IntentClassifier.prune(options["days"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} intent decision(s) older than {options['days']} days"
+            )
+        )
@@ -5,6 +5,7 @@ from courses.models import (
     AssessmentQuestion,
     Course,
     Module,
+    QuestionVersion,
     Topic,
     TopicParagraph,
 )
@@ -199,6 +200,27 @@ class UserEnrollment(models.Model):
         related_name="active_enrollment",
     )
 
+    # Compact delivery progress. `current_module` is the module cursor; the
+    # topic/paragraph cursor points at the topic being delivered. Delivered
+    # topics are bits in `completed_topics` (indexed by Topic.progress_bit)
+    # and per-module states live in `module_states` keyed by module id.
+    cursor_topic = models.ForeignKey(
+        Topic, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    cursor_paragraph = models.ForeignKey(
+        TopicParagraph,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    cursor_topic_state = models.CharField(max_length=50, default="not_started")
+    module_states = models.JSONField(default=dict, blank=True)
+    completed_topics = models.BinaryField(default=b"", blank=True)
+
+    # Tutor conversation: {"summary": str, "turns": [{"q", "a"}], "folded": int}
+    tutor_memory = models.JSONField(default=dict, blank=True)
+
     conversation_state = models.CharField(
         max_length=50,
         default="idle",  # other states: 'awaiting_user_query', 'offer_quiz_or_content', etc.
@@ -263,6 +285,30 @@ class UserEnrollment(models.Model):
 
         return enrollment
 
+    def has_completed_topic(self, topic: Topic) -> bool:
+        bit = topic.progress_bit
+        if bit is None:
+            return False
+        bitmap = bytes(self.completed_topics or b"")
+        return bit // 8 < len(bitmap) and bool(bitmap[bit // 8] & (1 << bit % 8))
+
+    def set_topic_completed(self, topic: Topic, completed: bool = True) -> None:
+        """Set or clear the topic's bit. Caller saves `completed_topics`."""
+        if topic.progress_bit is None:
+            # topics created before the bitmap existed get their bit lazily
+            topic.save(update_fields=["progress_bit"])
+        byte, mask = topic.progress_bit // 8, 1 << topic.progress_bit % 8
+        bitmap = bytearray(self.completed_topics or b"")
+        if byte >= len(bitmap):
+            if not completed:
+                return
+            bitmap.extend(bytes(byte + 1 - len(bitmap)))
+        if completed:
+            bitmap[byte] |= mask
+        else:
+            bitmap[byte] &= ~mask & 0xFF
+        self.completed_topics = bytes(bitmap)
+
     @classmethod
     def increment_intro_step(cls, enrollment_id: str, step: int = 1):
         """
@@ -281,6 +327,9 @@ class UserEnrollment(models.Model):
         return enrollment.on_intro_step
 
 
+# ModuleDeliveryProgress and TopicDeliveryProgress are superseded by the cursor
+# fields on UserEnrollment. They are kept so `fold_delivery_progress` can fold
+# existing rows; new progress is no longer written to them.
 class ModuleDeliveryProgress(models.Model):
     STATE_CHOICES = [
         ("not_started", "Not Started"),
@@ -377,6 +426,10 @@ class UserAssessmentAttempt(models.Model):
     )
     score = models.FloatField(null=True, blank=True)
     passed = models.BooleanField(null=True, blank=True)
+    # Maintained with F() updates as responses are recorded; `score` is the
+    # marks earned so far
+    correct_count = models.PositiveIntegerField(default=0)
+    max_marks = models.FloatField(default=0)
 
     # Progress tracking
     current_question_index = models.PositiveIntegerField(default=0)
@@ -390,6 +443,12 @@ class UserAssessmentAttempt(models.Model):
             models.Index(fields=["enrollment"]),
         ]
 
+    @property
+    def percentage(self) -> float:
+        if not self.max_marks:
+            return 0.0
+        return (self.score or 0) / self.max_marks * 100
+
     def __str__(self):
         return f"{self.user.whatsapp_id} - {self.assessment.title}"
 
@@ -401,11 +460,20 @@ class UserQuestionResponse(models.Model):
     )
     question = models.ForeignKey(AssessmentQuestion, on_delete=models.CASCADE)
 
-    # Snapshot of question at time of answering
-    question_text_snapshot = models.TextField()
+    # Question as it was when answered; shared with every other response to
+    # the same content
+    question_version = models.ForeignKey(
+        QuestionVersion,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
     question_type_snapshot = models.CharField(max_length=10)
+    # Legacy per-response copies, emptied by backfill_question_versions
+    question_text_snapshot = models.TextField(blank=True, default="")
     options_snapshot = models.JSONField(blank=True, null=True)
-    correct_answer_snapshot = models.TextField()
+    correct_answer_snapshot = models.TextField(blank=True, default="")
 
     # User response
     user_answer = models.TextField(blank=True, null=True)
@@ -419,8 +487,59 @@ class UserQuestionResponse(models.Model):
             models.Index(fields=["attempt"]),
         ]
 
+    def snapshot(self) -> dict:
+        """The question as the learner saw it"""
+        if self.question_version_id:
+            version = self.question_version
+            return {
+                "questionText": version.question_text,
+                "type": version.type,
+                "options": version.options,
+                "correctAnswer": version.correct_answer,
+            }
+        return {
+            "questionText": self.question_text_snapshot,
+            "type": self.question_type_snapshot,
+            "options": self.options_snapshot,
+            "correctAnswer": self.correct_answer_snapshot,
+        }
+
+    def __str__(self):
+        return f"Response to {self.snapshot()['questionText'][:50]}"
+
+
+class QuestionItemStats(models.Model):
+    """
+    Running item statistics of one question, updated as responses are
+    recorded (ItemAnalyticsService) so analytics never scan the responses.
+    The total_* sums cover completed attempts only and give the
+    discrimination (correlation of the item with the attempt percentage).
+    """
+
+    question = models.OneToOneField(
+        AssessmentQuestion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="item_stats",
+    )
+    assessment = models.ForeignKey(
+        Assessment, on_delete=models.CASCADE, related_name="item_stats"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    # {answer: count}, the most frequent wrong answers (bounded)
+    wrong_answers = models.JSONField(default=dict, blank=True)
+
+    completed_attempts = models.PositiveIntegerField(default=0)
+    completed_correct = models.PositiveIntegerField(default=0)
+    total_sum = models.FloatField(default=0)
+    total_sq_sum = models.FloatField(default=0)
+    correct_total_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"Response to {self.question_text_snapshot[:50]}"
+        return f"Stats for {self.question_id}"
 
 
 class AutomationRule(models.Model):
@@ -439,3 +558,60 @@ class UserMessageLog(models.Model):
 
     class Meta:
         db_table = "user_message_log"
+
+
+class IntentDecisionLog(models.Model):
+    """One conversation intent decision; training data for the local classifier"""
+
+    SOURCE_CHOICES = [
+        ("keyword", "Keyword match"),
+        ("model", "N-gram model"),
+        ("cache", "Decision cache"),
+        ("llm", "LLM"),
+        ("error", "LLM failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    text = models.CharField(max_length=255)  # normalized user input
+    conversation_state = models.CharField(max_length=50, blank=True, null=True)
+    intent = models.CharField(max_length=50)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    confidence = models.FloatField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["source", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.text} -> {self.intent} ({self.source})"
+
+
+class LLMCallLog(models.Model):
+    """One LLM completion, or one answer served from a cache instead of the LLM"""
+
+    OUTCOME_CHOICES = [
+        ("ok", "Completed"),
+        ("timeout", "Deadline exceeded"),
+        ("error", "Failed"),
+        ("cache_hit", "Served from cache"),
+    ]
+
+    call_site = models.CharField(max_length=30)
+    model = models.CharField(max_length=50, blank=True)
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+    latency_ms = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["call_site", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.call_site} {self.model} {self.outcome} ({self.latency_ms}ms)"
@@ -36,6 +36,7 @@ class UserAssessmentAttemptSerializer(serializers.ModelSerializer):
     enrollment = serializers.PrimaryKeyRelatedField(read_only=True)
     assessment = AssessmentSerializer(read_only=True)
     module = ModuleSerializer(read_only=True)
+    percentage = serializers.FloatField(read_only=True)
 
     class Meta:
         model = UserAssessmentAttempt
@@ -47,6 +48,7 @@ class UserAssessmentAttemptWithResponsesSerializer(serializers.ModelSerializer):
     enrollment = serializers.PrimaryKeyRelatedField(read_only=True)
     assessment = AssessmentSerializer(read_only=True)
     module = ModuleSerializer(read_only=True)
+    percentage = serializers.FloatField(read_only=True)
     responses = serializers.SerializerMethodField()
 
     class Meta:
@@ -54,18 +56,33 @@ class UserAssessmentAttemptWithResponsesSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_responses(self, obj):
-        questions_responses = UserQuestionResponse.objects.filter(attempt=obj)
+        questions_responses = UserQuestionResponse.objects.filter(
+            attempt=obj
+        ).select_related("question_version")
         return UserQuestionResponseSerializer(questions_responses, many=True).data
 
 
 class UserQuestionResponseSerializer(serializers.ModelSerializer):
     attempt = serializers.PrimaryKeyRelatedField(read_only=True)
     question = serializers.PrimaryKeyRelatedField(read_only=True)
+    # served from the referenced question version
+    question_text_snapshot = serializers.SerializerMethodField()
+    options_snapshot = serializers.SerializerMethodField()
+    correct_answer_snapshot = serializers.SerializerMethodField()
 
     class Meta:
         model = UserQuestionResponse
         fields = "__all__"
 
+    def get_question_text_snapshot(self, obj):
+        return obj.snapshot()["questionText"]
+
+    def get_options_snapshot(self, obj):
+        return obj.snapshot()["options"]
+
+    def get_correct_answer_snapshot(self, obj):
+        return obj.snapshot()["correctAnswer"]
+
 
 class AutomationRuleSerializer(serializers.ModelSerializer):
     daysInactive = serializers.IntegerField(source="days_inactive")
@@ -1,10 +1,23 @@
 import json
 import logging
-from openai import OpenAI
-from openai.types.chat import ChatCompletionMessageParam
+import time
+
+from django.conf import settings
+
+from whatsapp.services.intent_cache import IntentDecisionCache
+from whatsapp.services.intent_classifier import VALID_INTENTS, intent_classifier
+from whatsapp.services.llm_backends import get_llm_backend
+from whatsapp.services.llm_metrics import LLMUsageService
+from whatsapp.services.llm_runtime import LLMDeadlineExceeded, LLMRuntime
 
 logger = logging.getLogger(__name__)
 
+# Sent instead of a tutor answer when the LLM misses its deadline or fails
+TUTOR_FALLBACK_REPLY = (
+    "That's a great question! I can't answer it right now, please ask me "
+    "again in a moment. Meanwhile you can continue with the course."
+)
+
 
 class AIResponseInterpreter:
     """
@@ -46,12 +59,65 @@ class AIResponseInterpreter:
 
     """
 
+    # Shared by every interpreter in the process
+    decision_cache = IntentDecisionCache(
+        max_size=settings.INTENT_CACHE_SIZE,
+        ttl=settings.INTENT_CACHE_TTL,
+        shared_alias=settings.INTENT_CACHE_ALIAS,
+    )
+
+    # Every completion runs on one process-wide event loop with a concurrency cap
+    runtime = LLMRuntime(max_concurrency=settings.LLM_MAX_CONCURRENCY)
+
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self._backend = None
+
+    @property
+    def backend(self):
+        """OpenAI, or the offline scripted stand-in (settings.LLM_BACKEND)"""
+        if self._backend is None:
+            self._backend = get_llm_backend(self.api_key)
+        return self._backend
+
+    def _complete(self, call_site: str, **kwargs):
+        """
+        Chat completion bounded by the call site's deadline (LLM_DEADLINES).
+        Raises LLMDeadlineExceeded when it passes; callers fall back. Every
+        call is recorded by LLMUsageService.
+        """
+        deadline = settings.LLM_DEADLINES.get(
+            call_site, settings.LLM_DEADLINES["default"]
+        )
+        model = kwargs.get("model", "")
+        if self.backend.name != "openai":
+            model = f"{self.backend.name}:{model}"  # kept out of cost estimates
+        started = time.perf_counter()
+        try:
+            response = self.runtime.run(
+                lambda: self.backend.complete(call_site, **kwargs),
+                deadline=deadline,
+                label=call_site,
+            )
+        except LLMDeadlineExceeded:
+            LLMUsageService.record(
+                call_site, model, "timeout", (time.perf_counter() - started) * 1000
+            )
+            raise
+        except Exception:
+            LLMUsageService.record(
+                call_site, model, "error", (time.perf_counter() - started) * 1000
+            )
+            raise
+        LLMUsageService.record_completion(
+            call_site, model, (time.perf_counter() - started) * 1000, response
+        )
+        return response
 
     def answer_user_question(self, prompt: str) -> str:
         try:
-            response = self.client.chat.completions.create(
+            response = self._complete(
+                "tutor",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a helpful tutor."},
@@ -64,6 +130,39 @@ class AIResponseInterpreter:
             logger.exception("Error in get_ai_answer")
             return None
 
+    def summarize_conversation(self, summary: str, turns: list, max_tokens: int):
+        """
+        Fold older tutor turns into the running summary of what the learner
+        has asked and been told. Returns None when the call fails.
+        """
+        transcript = "\n".join(f"Student: {turn['q']}\nTutor: {turn['a']}" for turn in turns)
+        try:
+            response = self._complete(
+                "summary",
+                model="gpt-3.5-turbo",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "You keep a short running summary of a student's conversation with a tutor. "
+                            "Merge the new exchanges into the existing summary. Keep the topics the student "
+                            "asked about, what they struggled with and key facts they were told. "
+                            f"Reply with the summary only, under {max_tokens} tokens."
+                        ),
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Existing summary: {summary or '(none)'}\n\nNew exchanges:\n{transcript}",
+                    },
+                ],
+                temperature=0.2,
+                max_tokens=max_tokens,
+            )
+            return response.choices[0].message.content.strip()
+        except Exception:
+            logger.exception("Error in summarize_conversation")
+            return None
+
     def analyze_next_step(
         self,
         question: str,
@@ -89,7 +188,8 @@ class AIResponseInterpreter:
         )
 
         try:
-            completion = self.client.chat.completions.create(
+            completion = self._complete(
+                "decision",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -108,7 +208,8 @@ class AIResponseInterpreter:
         Wrapper for answering user questions with AI (alias for answer_user_question).
         """
         try:
-            response = self.client.chat.completions.create(
+            response = self._complete(
+                "tutor",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a helpful tutor."},
@@ -145,7 +246,8 @@ class AIResponseInterpreter:
         )
 
         try:
-            completion = self.client.chat.completions.create(
+            completion = self._complete(
+                "extract",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -171,64 +273,20 @@ class AIResponseInterpreter:
         'greeting', 'continue', 'quiz', 'module', 'question', 'cancel', 'unknown'
         """
         try:
-            lower_user_input = user_input.lower().strip()
             intent = None
+            source, confidence = "llm", None
+
+            # Local classifier first; the LLM only sees low-confidence inputs
+            prediction = intent_classifier.classify(user_input)
+            if prediction.confidence >= settings.INTENT_CONFIDENCE_THRESHOLD:
+                intent = prediction.intent
+                source, confidence = prediction.source, prediction.confidence
 
-            # ✅ Exact match / keyword arrays
-            continues = [
-                "next",
-                "ready",
-                "continue",
-                "go ahead",
-                "move on",
-                "start",
-                "proceed",
-            ]
-            assessments = [
-                "assessment",
-                "quiz",
-                "test",
-                "exam",
-                "start quiz",
-                "start test",
-            ]
-            modules = ["module", "lesson", "study", "content", "chapter", "material"]
-            prevs = ["prev", "previous", "last", "back", "earlier"]
-            homes = ["home", "menu", "main menu", "options", "more options"]
-            intros = [
-                "intro",
-                "introduction",
-                "course intro",
-                "course-intro",
-                "course introduction",
-                "about course",
-            ]
-            progresses = [
-                "progress",
-                "status",
-                "my journey",
-                "course progress",
-                "course-progress",
-                "how am i doing",
-            ]
-            cancels = ["cancel", "stop", "exit", "quit", "end", "pause"]
-
-            if lower_user_input in continues:
-                intent = "continue"
-            elif lower_user_input in assessments:
-                intent = "assessment"
-            elif lower_user_input in modules:
-                intent = "module"
-            elif lower_user_input in prevs:
-                intent = "prev"
-            elif lower_user_input in homes:
-                intent = "home"
-            elif lower_user_input in intros:
-                intent = "course-intro"
-            elif lower_user_input in progresses:
-                intent = "course-progress"
-            elif lower_user_input in cancels:
-                intent = "cancel"
+            if not intent:
+                intent = self.decision_cache.get(user_input, current_state)
+                if intent:
+                    source = "cache"
+                    LLMUsageService.record_cache_hit("intent")
 
             if not intent:
 
@@ -255,7 +313,9 @@ class AIResponseInterpreter:
                     """
 
                 try:
-                    completion = self.client.chat.completions.create(
+                    started = time.perf_counter()
+                    completion = self._complete(
+                        "intent",
                         model="gpt-3.5-turbo",  # Fast and cost-effective for this task
                         messages=[
                             {
@@ -271,6 +331,7 @@ class AIResponseInterpreter:
                     )
 
                     intent = completion.choices[0].message.content.strip().lower()
+                    llm_latency_ms = (time.perf_counter() - started) * 1000
 
                     print("AI content:", intent)
 
@@ -278,21 +339,25 @@ class AIResponseInterpreter:
                     logger.exception(
                         f"AI intent detection failed for input: {user_input}"
                     )
-                    return "unknown"
-            valid_intents = {
-                "greeting",
-                "continue",
-                "assessment",
-                "module",
-                "question",
-                "cancel",
-                "prev",
-                "home",
-                "course-intro",
-                "course-progress",
-                "unknown",
-            }
-            return intent if intent in valid_intents else "unknown"
+                    # deadline passed or the call failed: best local guess
+                    intent_classifier.record(
+                        user_input,
+                        current_state,
+                        prediction.intent,
+                        "error",
+                        prediction.confidence,
+                    )
+                    return prediction.intent
+
+            intent = intent if intent in VALID_INTENTS else "unknown"
+            if source == "llm":
+                self.decision_cache.set(
+                    user_input, current_state, intent, llm_latency_ms
+                )
+            intent_classifier.record(
+                user_input, current_state, intent, source, confidence
+            )
+            return intent
 
         except Exception as e:
             logger.exception(f"AI intent detection failed for input: {user_input}")
@@ -317,7 +382,8 @@ class AIResponseInterpreter:
         user_prompt = f"User response: {user_input}"
 
         try:
-            response = cls.client.chat.completions.create(
+            response = cls._complete(
+                "grading",
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -381,7 +447,8 @@ class AIResponseInterpreter:
         """
 
         try:
-            response = cls.client.chat.completions.create(
+            response = cls._complete(
+                "grading",
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -417,4 +484,80 @@ class AIResponseInterpreter:
                 "correct_answer": correct_answer,
                 "is_ai_corrected": True,
                 "feedback": "Automatic feedback unavailable. Please review the answer manually.",
+                "error": str(e),
+            }
+
+    def _ai_evaluate_short_answers(self, items, threshold):
+        """
+        Grade several short answers in one request. `items` are dicts with
+        id, question_text, correct_answer and user_answer; returns results
+        keyed by id in the shape of _ai_evaluate_short_answer. Items missing
+        from the reply are left out so the caller can grade them one by one.
+        """
+        if not items:
+            return {}
+
+        system_prompt = """You are an educational assessment system. For each item, evaluate the student's answer compared to the reference answer.
+
+        Consider:
+        - Conceptual accuracy
+        - Alternative phrasing
+        - Partial correctness
+        - Relevance and depth
+
+        Respond with a JSON object {"results": [...]} holding one entry per item with:
+        - id (string): the item id, unchanged
+        - score (float between 0.0 and 1.0): How correct the student's answer is
+        - confidence (float between 0.0 and 1.0): How confident you are in your judgment
+        - explanation (string): Why the answer got that score
+        - suggested_feedback (string): Constructive feedback to help the student improve
+
+        You must only respond with valid JSON.
+        """
+        payload = [
+            {
+                "id": item["id"],
+                "question": item["question_text"],
+                "reference_answer": item["correct_answer"],
+                "student_answer": item["user_answer"],
+            }
+            for item in items
+        ]
+
+        try:
+            response = self._complete(
+                "grading_batch",
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": json.dumps(payload)},
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+            )
+            evaluations = json.loads(response.choices[0].message.content)["results"]
+        except Exception as e:
+            logger.error(f"AI batch short answer evaluation failed: {str(e)}")
+            return {}
+
+        by_id = {item["id"]: item for item in items}
+        results = {}
+        for evaluation in evaluations:
+            item = by_id.get(str(evaluation.get("id")))
+            if item is None:
+                continue
+            try:
+                score = float(evaluation.get("score", 0))
+                confidence = float(evaluation.get("confidence", 0))
+            except (TypeError, ValueError):
+                continue
+            results[item["id"]] = {
+                "success": confidence >= threshold,
+                "message": f"{'Correct!' if confidence >= threshold else 'Partially correct or incorrect.'} {evaluation.get('explanation', '')}",
+                "score": round(score, 2),
+                "user_answer": item["user_answer"],
+                "correct_answer": item["correct_answer"],
+                "is_ai_corrected": True,
+                "feedback": evaluation.get("suggested_feedback", ""),
             }
+        return results
@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import random
+import re
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands x 4 rows
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(20240601)  # fixed seed: signatures must match across workers
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# Words that carry no topic signal in learner questions. Interrogatives
+# ("what", "why", "how", "explain", ...) are kept: they decide what kind of
+# answer is wanted.
+QUESTION_STOPWORDS = {
+    "a", "about", "an", "and", "are", "can", "could", "do", "does", "for", "i",
+    "in", "is", "it", "me", "of", "on", "please", "tell", "the", "to", "you",
+}
+
+# Words naming the kind of answer asked for; questions only share an answer
+# when they ask the same kind of question
+INTERROGATIVES = {
+    "what": "what",
+    "whats": "what",
+    "why": "why",
+    "how": "how",
+    "when": "when",
+    "where": "where",
+    "who": "who",
+    "which": "which",
+    "explain": "explain",
+    "mean": "mean",
+    "meaning": "mean",
+}
+
+
+def _question_tokens(question: str) -> List[str]:
+    text = (question or "").lower().replace("'", "").replace("’", "")
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def question_shingles(question: str) -> Set[str]:
+    """Word unigrams and bigrams of the question without filler words"""
+    tokens = [
+        token for token in _question_tokens(question) if token not in QUESTION_STOPWORDS
+    ]
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def question_kind(question: str) -> str:
+    """The question's interrogatives, e.g. "how" or "mean+what"; "" for none"""
+    return "+".join(
+        sorted(
+            {
+                INTERROGATIVES[token]
+                for token in _question_tokens(question)
+                if token in INTERROGATIVES
+            }
+        )
+    )
+
+
+def minhash(shingles: Set[str]) -> List[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in shingles
+    ]
+    return [
+        min((a * h + b) % MERSENNE_PRIME for h in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def estimated_similarity(first: List[int], second: List[int]) -> float:
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERMUTATIONS
+
+
+class TutorAnswerCache:
+    """
+    Tutor answers shared by learners of the same module. Questions are
+    compared by MinHash signature (estimated Jaccard similarity of their
+    shingles) with LSH banding to find candidates, so near-identical
+    questions reuse an answer instead of calling the LLM again.
+
+    Entries are keyed on the module's content_version, so editing the module
+    or its topics invalidates them. Reads never rewrite the bucket: a hit
+    only touches the entry's own last-used key, which eviction consults.
+    """
+
+    @staticmethod
+    def _cache():
+        return caches[settings.TUTOR_ANSWER_CACHE_ALIAS]
+
+    @staticmethod
+    def _key(course_id, module) -> str:
+        if module is None:
+            return f"tutor-answers:{course_id}:course"
+        return f"tutor-answers:{course_id}:{module.module_id}:v{module.content_version}"
+
+    @staticmethod
+    def _used_key(bucket_key: str, entry_id: str) -> str:
+        return f"{bucket_key}:used:{entry_id}"
+
+    @staticmethod
+    def _band_keys(signature: List[int]) -> List[str]:
+        keys = []
+        for band in range(BANDS):
+            rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+            digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    @classmethod
+    def get(cls, course_id, module, question: str) -> Optional[str]:
+        shingles = question_shingles(question)
+        if not shingles:
+            return None
+        try:
+            bucket = cls._cache().get(cls._key(course_id, module))
+        except Exception:
+            logger.exception("Tutor answer cache read failed")
+            return None
+        if not bucket:
+            return None
+
+        signature = minhash(shingles)
+        kind = question_kind(question)
+        candidates = set()
+        for band_key in cls._band_keys(signature):
+            candidates.update(bucket["bands"].get(band_key, []))
+
+        best_id, best_similarity = None, 0.0
+        for entry_id in candidates:
+            entry = bucket["entries"].get(entry_id)
+            if not entry or entry.get("kind", "") != kind:
+                continue
+            similarity = estimated_similarity(signature, entry["signature"])
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_id is None or best_similarity < settings.TUTOR_ANSWER_CACHE_THRESHOLD:
+            return None
+
+        logger.info(
+            f"Tutor answer cache hit ({best_similarity:.2f}) for '{question}'"
+        )
+        try:
+            cls._cache().set(
+                cls._used_key(cls._key(course_id, module), best_id),
+                time.time(),
+                settings.TUTOR_ANSWER_CACHE_TTL,
+            )
+        except Exception:
+            logger.exception("Tutor answer cache write failed")
+        return bucket["entries"][best_id]["answer"]
+
+    @classmethod
+    def store(cls, course_id, module, question: str, answer: str) -> None:
+        shingles = question_shingles(question)
+        if not shingles or not answer:
+            return
+        try:
+            bucket = cls._cache().get(cls._key(course_id, module)) or {
+                "entries": {},
+                "bands": {},
+            }
+        except Exception:
+            logger.exception("Tutor answer cache read failed")
+            return
+
+        signature = minhash(shingles)
+        entry_id = uuid.uuid4().hex[:12]
+        bucket["entries"][entry_id] = {
+            "question": question,
+            "answer": answer,
+            "signature": signature,
+            "kind": question_kind(question),
+            "last_used": time.time(),
+        }
+        for band_key in cls._band_keys(signature):
+            bucket["bands"].setdefault(band_key, []).append(entry_id)
+
+        # evict least recently used answers beyond the per-module limit
+        overflow = len(bucket["entries"]) - settings.TUTOR_ANSWER_CACHE_SIZE
+        if overflow > 0:
+            bucket_key = cls._key(course_id, module)
+            used_keys = {
+                key: cls._used_key(bucket_key, key) for key in bucket["entries"]
+            }
+            try:
+                used = cls._cache().get_many(list(used_keys.values()))
+            except Exception:
+                logger.exception("Tutor answer cache read failed")
+                used = {}
+            last_used = {
+                key: max(entry["last_used"], used.get(used_keys[key], 0))
+                for key, entry in bucket["entries"].items()
+            }
+            evicted = set(sorted(last_used, key=last_used.get)[:overflow])
+            for key in evicted:
+                del bucket["entries"][key]
+            try:
+                cls._cache().delete_many([used_keys[key] for key in evicted])
+            except Exception:
+                logger.exception("Tutor answer cache write failed")
+            bucket["bands"] = {
+                band_key: [key for key in ids if key not in evicted]
+                for band_key, ids in bucket["bands"].items()
+                if any(key not in evicted for key in ids)
+            }
+
+        cls._save(course_id, module, bucket)
+
+    @classmethod
+    def _save(cls, course_id, module, bucket: Dict) -> None:
+        try:
+            cls._cache().set(
+                cls._key(course_id, module), bucket, settings.TUTOR_ANSWER_CACHE_TTL
+            )
+        except Exception:
+            logger.exception("Tutor answer cache write failed")
@@ -1,6 +1,8 @@
 import logging
 import os
 from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
 from datetime import datetime
 from django.utils import timezone
 
@@ -8,7 +10,14 @@ from whatsapp.serializers import (
     UserAssessmentAttemptWithResponsesSerializer,
 )
 from whatsapp.services.ai_reponse_interpreter import AIResponseInterpreter
+from whatsapp.services.assessment_session import AttemptSession
+from whatsapp.services.item_analytics import ItemAnalyticsService
+from whatsapp.services.llm_metrics import LLMUsageService
 from whatsapp.services.messaging import WhatsAppService
+from courses.services.publishing import ContentPublishService
+from courses.services.grading_cache import ShortAnswerGradeCache
+from courses.services.mcq_matcher import McqAnswerMatcher
+from courses.services.question_versions import QuestionVersionService
 from ..models import (
     UserAssessmentAttempt,
     UserQuestionResponse,
@@ -19,6 +28,11 @@ from ..models import (
 
 logger = logging.getLogger(__name__)
 
+# AI confidence needed for an open answer to count as correct
+OPEN_ANSWER_THRESHOLD = 0.7
+
+PASSING_PERCENTAGE = 70
+
 
 class UserAssessmentService:
 
@@ -44,6 +58,7 @@ class UserAssessmentService:
     def start_assessment(user, enrollment, assessment_id):
         """Start a new assessment attempt"""
         assessment = Assessment.objects.get(pk=assessment_id)
+        totals = assessment.questions.aggregate(count=Count("pk"), marks=Sum("marks"))
 
         with transaction.atomic():
             attempt = UserAssessmentAttempt.objects.create(
@@ -51,7 +66,9 @@ class UserAssessmentService:
                 enrollment=enrollment,
                 assessment=assessment,
                 module=assessment.module,
-                total_questions=assessment.questions.count(),
+                total_questions=totals["count"],
+                max_marks=totals["marks"] or 0,
+                score=0,
                 started_at=datetime.now(),
             )
 
@@ -59,7 +76,8 @@ class UserAssessmentService:
             enrollment.current_assessment_attempt = attempt
             enrollment.save()
 
-            return attempt
+        AttemptSession.start(attempt)
+        return attempt
 
     @staticmethod
     def get_current_question(attempt):
@@ -88,37 +106,64 @@ class UserAssessmentService:
             UserQuestionResponse.objects.create(
                 attempt=attempt,
                 question=question,
-                question_text_snapshot=question.question_text,
+                question_version_id=QuestionVersionService.for_question(question),
                 question_type_snapshot=question.type,
-                options_snapshot=question.options if question.type == "mcq" else None,
-                correct_answer_snapshot=question.correct_answer,
                 user_answer=user_answer,
                 is_correct=is_correct,
+                score=question.marks if is_correct else 0,
                 answered_at=datetime.now(),
             )
 
-            # Update attempt progress
-            attempt.questions_answered += 1
-            attempt.current_question_index += 1
+            # Update attempt progress and running score
+            UserAssessmentAttempt.objects.filter(pk=attempt.pk).update(
+                questions_answered=F("questions_answered") + 1,
+                current_question_index=F("current_question_index") + 1,
+                **UserAssessmentService._score_increments(
+                    question.marks if is_correct else 0, is_correct
+                ),
+            )
+            attempt.refresh_from_db()
 
             if attempt.current_question_index >= attempt.total_questions:
                 attempt.status = "completed"
                 attempt.completed_at = datetime.now()
-                # Calculate score
-                correct_count = attempt.responses.filter(is_correct=True).count()
-                attempt.score = (correct_count / attempt.total_questions) * 100
-                attempt.passed = attempt.score >= 70  # Assuming 70% passing score
+                attempt.passed = attempt.percentage >= PASSING_PERCENTAGE
+                attempt.save(update_fields=["status", "completed_at", "passed"])
 
-            attempt.save()
-            return attempt
+        ItemAnalyticsService.record_response(
+            question, is_correct, question.marks if is_correct else 0, user_answer
+        )
+        if attempt.status == "completed":
+            ItemAnalyticsService.record_attempt(attempt)
+        return attempt
+
+    @staticmethod
+    def _score_increments(earned: float, is_correct: bool) -> dict:
+        """update() kwargs adding one graded response to the attempt's totals"""
+        increments = {"score": Coalesce(F("score"), 0.0) + (earned or 0)}
+        if is_correct:
+            increments["correct_count"] = F("correct_count") + 1
+        return increments
 
     @staticmethod
     def complete_assessment(attempt):
         """Finalize assessment completion"""
-        if attempt.status != "completed":
+        UserAssessmentService.grade_pending_responses(attempt)
+        AttemptSession.end(attempt.id)
+
+        # grading added to score/correct_count in the DB; reload them rather
+        # than saving stale in-memory totals over the increments
+        attempt.refresh_from_db(
+            fields=["status", "score", "correct_count", "max_marks"]
+        )
+        newly_completed = attempt.status != "completed"
+        if newly_completed:
             attempt.status = "completed"
-            attempt.completed_at = datetime.now()
-            attempt.save()
+            attempt.completed_at = timezone.now()
+        attempt.passed = attempt.percentage >= PASSING_PERCENTAGE
+        attempt.save(update_fields=["status", "completed_at", "passed"])
+        if newly_completed:
+            ItemAnalyticsService.record_attempt(attempt)
 
         # Update enrollment to point back to module
         enrollment = attempt.enrollment
@@ -171,25 +216,33 @@ class UserAssessmentService:
             question = assessment.questions.all()[question_index]
 
             # Evaluate the question
-            result = cls.evaluate_question(question, user_input)
+            result = cls.evaluate_for_attempt(
+                question, user_input, assessment.grading_mode
+            )
 
-            question_score = result["score"] * question.marks
+            question_score = (
+                None if result["score"] is None else result["score"] * question.marks
+            )
 
             # Save the response
             UserQuestionResponse.objects.create(
                 attempt=attempt,
                 question=question,
-                question_text_snapshot=question.question_text,
+                question_version_id=QuestionVersionService.for_question(question),
                 question_type_snapshot=question.type,
-                options_snapshot=(
-                    question.options if hasattr(question, "options") else None
-                ),
-                correct_answer_snapshot=result["correct_answer"],
                 user_answer=user_input,
                 is_correct=result["success"],
                 score=question_score,
                 answered_at=timezone.now(),
             )
+            UserAssessmentAttempt.objects.filter(pk=attempt.pk).update(
+                **cls._score_increments(
+                    question_score if result["success"] else 0, bool(result["success"])
+                )
+            )
+            ItemAnalyticsService.record_response(
+                question, result["success"], question_score, user_input
+            )
 
             return result
 
@@ -203,6 +256,58 @@ class UserAssessmentService:
             print(f"Error evaluating question: {str(e)}")
             raise
 
+    @classmethod
+    def answer_current_question(cls, attempt, user_input: str):
+        """
+        Grade the attempt's current question from its session snapshot, then
+        record the response (one insert) and advance the attempt (one update).
+        Returns the evaluation, or None when every question is answered.
+        """
+        session = AttemptSession.get(attempt)
+        question = session.question()
+        if question is None:
+            return None
+
+        result = cls.evaluate_for_attempt(question, user_input, session.grading_mode)
+        question_score = (
+            None if result["score"] is None else result["score"] * question.marks
+        )
+
+        with transaction.atomic():
+            UserQuestionResponse.objects.create(
+                attempt_id=attempt.id,
+                question_id=question.question_id,
+                question_version_id=QuestionVersionService.for_question(question),
+                question_type_snapshot=question.type,
+                user_answer=user_input,
+                is_correct=result["success"],
+                score=question_score,
+                answered_at=timezone.now(),
+            )
+            UserAssessmentAttempt.objects.filter(pk=attempt.pk).update(
+                current_question_index=F("current_question_index") + 1,
+                questions_answered=F("questions_answered") + 1,
+                **cls._score_increments(
+                    question_score if result["success"] else 0, bool(result["success"])
+                ),
+            )
+
+        ItemAnalyticsService.record_response(
+            question, result["success"], question_score, user_input
+        )
+        session.advance(question_score if result["success"] else 0)
+        attempt.current_question_index = session.index
+        attempt.questions_answered += 1
+        return result
+
+    @classmethod
+    def evaluate_for_attempt(cls, question, user_input, grading_mode: str):
+        """evaluate_question, except that deferred assessments leave open
+        answers the LLM would have to grade for grade_pending_responses"""
+        if grading_mode == "deferred" and question.type == "open":
+            return cls.evaluate_open_answer_without_llm(question, user_input)
+        return cls.evaluate_question(question, user_input)
+
     @classmethod
     def evaluate_question(cls, question, user_input):
         """Evaluate a question with AI fallback"""
@@ -218,7 +323,7 @@ class UserAssessmentService:
                     question,
                     user_input,
                     use_ai=True,  # Enable AI for open-ended questions
-                    similarity_threshold=0.7,  # Slightly lower threshold for open answers
+                    similarity_threshold=OPEN_ANSWER_THRESHOLD,  # Slightly lower threshold for open answers
                 )
             else:
                 raise ValueError(f"Unknown question type: {question.type}")
@@ -236,7 +341,8 @@ class UserAssessmentService:
         cls, question: AssessmentQuestion, user_input, use_ai_fallback=False
     ):
         """
-        Evaluate a multiple choice question with numeric/index or text-based input.
+        Evaluate a multiple choice question. Replies naming an option (number,
+        letter or text) are graded locally; the LLM only sees the rest.
         """
 
         # Identify correct option
@@ -245,27 +351,27 @@ class UserAssessmentService:
         )
         options_list = [opt["text"] for opt in question.options]
 
-        # Step 1: Convert numeric input to option text (if valid)
-        stripped_input = user_input.strip()
-        if stripped_input.isdigit():
-            index = int(stripped_input) - 1
-            if 0 <= index < len(question.options):
-                user_input = question.options[index]["text"]
-
-        # Step 2: Case-insensitive exact match with correct answer
-        if (
-            correct_option
-            and user_input.strip().lower() == correct_option["text"].lower()
-        ):
+        # Step 1: Deterministic match (number, letter, option text, phrasing)
+        index = McqAnswerMatcher.match(question, user_input)
+        if index is not None:
+            chosen = question.options[index]
+            if chosen.get("isCorrect"):
+                return {
+                    "success": True,
+                    "message": "Correct answer!",
+                    "score": 1,
+                    "user_answer": chosen["text"],
+                    "correct_answer": chosen["text"],
+                }
             return {
-                "success": True,
-                "message": "Correct answer!",
-                "score": 1,
-                "user_answer": user_input,
-                "correct_answer": correct_option["text"],
+                "success": False,
+                "message": f"Incorrect answer. The correct answer was: {correct_option['text'] if correct_option else ''}",
+                "score": 0,
+                "user_answer": chosen["text"],
+                "correct_answer": correct_option["text"] if correct_option else "",
             }
 
-        # Step 3: AI fallback if enabled
+        # Step 2: AI fallback only for replies the matcher couldn't parse
         if use_ai_fallback:
             return cls.ai_interpreter._ai_evaluate_response(
                 question=question.question_text,
@@ -274,7 +380,7 @@ class UserAssessmentService:
                 user_input=user_input,
             )
 
-        # Step 4: Default incorrect response
+        # Step 3: Default incorrect response
         return {
             "success": False,
             "message": f"Incorrect answer. The correct answer was: {correct_option['text']}",
@@ -314,14 +420,25 @@ class UserAssessmentService:
                 "is_ai_corrected": False,
             }
 
-        # If exact match fails and AI evaluation is enabled
+        # If exact match fails and AI evaluation is enabled; identical answers
+        # from other learners are graded once
         if use_ai:
-            return cls.ai_interpreter._ai_evaluate_short_answer(
+            cached = ShortAnswerGradeCache.get(question, user_input, similarity_threshold)
+            if cached is not None:
+                LLMUsageService.record_cache_hit("grading")
+                return cached
+
+            result = cls.ai_interpreter._ai_evaluate_short_answer(
                 question_text=question.question_text,
                 user_answer=user_input,
                 correct_answer=question.correct_answer,
                 threshold=similarity_threshold,
             )
+            if "error" not in result:
+                ShortAnswerGradeCache.store(
+                    question, user_input, similarity_threshold, result
+                )
+            return result
 
         # Default incorrect response
         return {
@@ -333,55 +450,133 @@ class UserAssessmentService:
             "is_ai_corrected": False,
         }
 
+    @classmethod
+    def evaluate_open_answer_without_llm(cls, question, user_input):
+        """
+        Grade an open answer from an exact match or a cached grade; otherwise
+        return a pending result (success and score None) to grade later.
+        """
+        if user_input.strip().lower() == (question.correct_answer or "").lower():
+            return cls.evaluate_short_answer_question(question, user_input, use_ai=False)
+
+        cached = ShortAnswerGradeCache.get(question, user_input, OPEN_ANSWER_THRESHOLD)
+        if cached is not None:
+            LLMUsageService.record_cache_hit("grading")
+            return cached
+
+        return {
+            "success": None,
+            "message": "Answer recorded. It will be graded when the assessment ends.",
+            "score": None,
+            "user_answer": user_input,
+            "correct_answer": question.correct_answer,
+            "is_ai_corrected": False,
+        }
+
+    @classmethod
+    def grade_pending_responses(cls, attempt) -> int:
+        """
+        Grade the attempt's ungraded open answers in one batched LLM request.
+        Answers the batch does not return are graded individually.
+        """
+        pending = list(
+            attempt.responses.filter(
+                is_correct__isnull=True, question_type_snapshot="open"
+            ).select_related("question")
+        )
+        if not pending:
+            return 0
+
+        results = cls.ai_interpreter._ai_evaluate_short_answers(
+            [
+                {
+                    "id": str(response.id),
+                    "question_text": response.question.question_text,
+                    "correct_answer": response.question.correct_answer or "",
+                    "user_answer": response.user_answer or "",
+                }
+                for response in pending
+            ],
+            OPEN_ANSWER_THRESHOLD,
+        )
+
+        for response in pending:
+            result = results.get(str(response.id))
+            if result is not None:
+                ShortAnswerGradeCache.store(
+                    response.question,
+                    response.user_answer or "",
+                    OPEN_ANSWER_THRESHOLD,
+                    result,
+                )
+            else:
+                result = cls.evaluate_short_answer_question(
+                    response.question,
+                    response.user_answer or "",
+                    use_ai=True,
+                    similarity_threshold=OPEN_ANSWER_THRESHOLD,
+                )
+            response.is_correct = result["success"]
+            response.score = result["score"] * response.question.marks
+
+        earned = sum(response.score for response in pending if response.is_correct)
+        correct = sum(1 for response in pending if response.is_correct)
+        with transaction.atomic():
+            UserQuestionResponse.objects.bulk_update(pending, ["is_correct", "score"])
+            UserAssessmentAttempt.objects.filter(pk=attempt.pk).update(
+                score=Coalesce(F("score"), 0.0) + earned,
+                correct_count=F("correct_count") + correct,
+            )
+        for response in pending:
+            ItemAnalyticsService.record_response(
+                response.question,
+                response.is_correct,
+                response.score,
+                response.user_answer,
+            )
+        logger.info(
+            f"Graded {len(pending)} deferred answers for attempt {attempt.id} "
+            f"({len(results)} in one batch)"
+        )
+        return len(pending)
+
     # Send next question to user
     @classmethod
-    def send_next_question(cls, attempt_id: str, phone_number_id):
+    def send_next_question(
+        cls, attempt_id: str, phone_number_id, attempt=None, user_waid=None
+    ):
         """
         Sends the next question in the assessment to the user.
         Handles completion when no more questions remain.
+        Callers holding the attempt and the user's WhatsApp id pass them to
+        skip the lookups; the question comes from the attempt session.
         """
         try:
-            attempt = UserAssessmentAttempt.objects.select_related("assessment").get(
-                id=attempt_id
-            )
-            user = attempt.user
-            assessment = attempt.assessment
-
-            # Get all questions and responses
-            questions = assessment.questions.all()
-            responses = attempt.responses.all()
+            if attempt is None:
+                attempt = UserAssessmentAttempt.objects.select_related("user").get(
+                    id=attempt_id
+                )
+            if user_waid is None:
+                user_waid = attempt.user.whatsapp_id
 
-            # Find the next unanswered question
-            next_index = len(responses)
+            session = AttemptSession.get(attempt)
+            next_index = session.index
+            next_question = session.question()
 
-            if next_index >= len(questions):
+            if next_question is None:
 
                 return None
 
-            # Get next question
-            next_question = questions[next_index]
-
-            # Format question based on type
-            if next_question.type == "mcq":
-                options = "\n".join(
-                    f"{i+1}. {opt['text']}"
-                    for i, opt in enumerate(next_question.options)
-                )
-                message = (
-                    f"Question {next_index+1}/{len(questions)}:\n"
-                    f"{next_question.question_text}\n\n"
-                    f"Options:\n{options}\n\n"
-                    f"Reply with the NUMBER of your answer."
-                )
-            else:
-                message = (
-                    f"Question {next_index+1}/{len(questions)}:\n"
-                    f"{next_question.question_text}\n\n"
-                    f"Please type your answer."
+            # Question text is rendered when the assessment is saved
+            segments = next_question.rendered_segments or (
+                ContentPublishService.render_question(
+                    next_question, next_index + 1, session.total
                 )
+            )
 
             # Send question via WhatsApp
-            WhatsAppService.send_message(phone_number_id, user.whatsapp_id, message)
+            for segment in segments:
+                WhatsAppService.send_message(phone_number_id, user_waid, segment)
 
             # Return question info (optional)
             return {
@@ -0,0 +1,139 @@
+import logging
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from courses.models import AssessmentQuestion
+
+logger = logging.getLogger(__name__)
+
+# Question fields evaluation and delivery need; nothing else is snapshotted
+QUESTION_FIELDS = [
+    "question_id",
+    "type",
+    "question_text",
+    "marks",
+    "options",
+    "correct_answer",
+    "answer_lookup",
+    "rendered_segments",
+    "version_id",
+]
+
+
+class AttemptSession:
+    """
+    Ordered question snapshot of one assessment attempt, taken at
+    start_assessment and kept in a cache, plus the attempt's position and
+    running score. Answering a question then needs no question, attempt or
+    response reads.
+
+    The attempt row stays the source of truth for progress: a session whose
+    index disagrees with it (another worker advanced it) is re-synced.
+    """
+
+    def __init__(
+        self,
+        attempt_id,
+        assessment_id,
+        grading_mode: str,
+        questions: List[Dict],
+        index: int = 0,
+        score: float = 0.0,
+    ):
+        self.attempt_id = str(attempt_id)
+        self.assessment_id = str(assessment_id)
+        self.grading_mode = grading_mode
+        self.questions = questions
+        self.index = index
+        self.score = score
+
+    @staticmethod
+    def _cache():
+        return caches[settings.ASSESSMENT_SESSION_CACHE_ALIAS]
+
+    @staticmethod
+    def _key(attempt_id) -> str:
+        return f"assessment-session:{attempt_id}"
+
+    @classmethod
+    def start(cls, attempt) -> "AttemptSession":
+        """Snapshot the attempt's ordered questions"""
+        questions = list(
+            AssessmentQuestion.objects.filter(assessment_id=attempt.assessment_id)
+            .order_by("order", "pk")
+            .values(*QUESTION_FIELDS)
+        )
+        for question in questions:
+            question["question_id"] = str(question["question_id"])
+        session = cls(
+            attempt.id,
+            attempt.assessment_id,
+            attempt.assessment.grading_mode,
+            questions,
+            index=attempt.current_question_index,
+            score=attempt.score or 0.0,
+        )
+        session.save()
+        return session
+
+    @classmethod
+    def get(cls, attempt) -> "AttemptSession":
+        """The attempt's session, rebuilt from the database on a cache miss"""
+        try:
+            data = cls._cache().get(cls._key(attempt.id))
+        except Exception:
+            logger.exception("Assessment session cache read failed")
+            data = None
+        if data is None:
+            return cls.start(attempt)
+
+        session = cls(**data)
+        if session.index != attempt.current_question_index:
+            session.index = attempt.current_question_index
+            session.score = attempt.score or 0.0
+        return session
+
+    def save(self) -> None:
+        try:
+            self._cache().set(
+                self._key(self.attempt_id),
+                {
+                    "attempt_id": self.attempt_id,
+                    "assessment_id": self.assessment_id,
+                    "grading_mode": self.grading_mode,
+                    "questions": self.questions,
+                    "index": self.index,
+                    "score": self.score,
+                },
+                settings.ASSESSMENT_SESSION_TTL,
+            )
+        except Exception:
+            logger.exception("Assessment session cache write failed")
+
+    @classmethod
+    def end(cls, attempt_id) -> None:
+        """Drop the session of a finished or abandoned attempt"""
+        try:
+            cls._cache().delete(cls._key(attempt_id))
+        except Exception:
+            logger.exception("Assessment session cache delete failed")
+
+    @property
+    def total(self) -> int:
+        return len(self.questions)
+
+    def question(self, index: Optional[int] = None) -> Optional[AssessmentQuestion]:
+        """Unsaved AssessmentQuestion built from the snapshot"""
+        index = self.index if index is None else index
+        if index >= self.total:
+            return None
+        return AssessmentQuestion(
+            assessment_id=self.assessment_id, **self.questions[index]
+        )
+
+    def advance(self, question_score: float) -> None:
+        self.index += 1
+        self.score += question_score or 0.0
+        self.save()
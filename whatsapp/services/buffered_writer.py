@@ -0,0 +1,74 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Callable, List
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """
+    Per-process buffer of unsaved model instances, written with bulk_create
+    by a background thread every `flush_seconds`, or as soon as `flush_size`
+    rows are waiting. Callers only append, so no request waits on the insert.
+    Whatever is still buffered when the process exits is written by an
+    atexit hook.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        get_model: Callable,
+        flush_size: Callable[[], int],
+        flush_seconds: Callable[[], float],
+    ):
+        # model and settings are resolved lazily: writers are created at import
+        self.name = name
+        self.get_model = get_model
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._buffer: List = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        atexit.register(self.flush)
+
+    def append(self, entry) -> None:
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.flush_size()
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def _ensure_thread(self) -> None:
+        # threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run, name=f"{self.name}-writer", daemon=True
+            ).start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_seconds())
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+    def flush(self) -> None:
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        try:
+            self.get_model().objects.bulk_create(entries)
+        except Exception:
+            logger.exception(f"Failed to write {len(entries)} {self.name} row(s)")
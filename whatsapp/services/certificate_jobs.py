@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def _init_render_worker():
+    """Worker processes are spawned, not forked, so set Django up again"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "whatsapp_bot.settings")
+    import django
+
+    django.setup()
+
+
+def _render(student_name, course_name, completed_at):
+    from whatsapp.services.cretificates_service import CertificateService
+
+    return CertificateService.render_documents(student_name, course_name, completed_at)
+
+
+class CertificateRenderPool:
+    """
+    Renders course completion certificates and badges off the request path.
+    WeasyPrint is CPU bound and holds the GIL, so rendering runs in a
+    process pool of CERTIFICATE_RENDER_WORKERS workers, each replaced after
+    CERTIFICATE_WORKER_MAX_TASKS renders to cap its memory. Upload and
+    delivery (WhatsApp and email) are I/O and run on a thread per worker,
+    which also bounds how many jobs are in flight; further jobs queue.
+    """
+
+    def __init__(self, workers: int, max_tasks_per_child: int):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_processes(self, reset: bool = False) -> ProcessPoolExecutor:
+        with self._lock:
+            if reset and self._processes is not None:
+                self._processes.shutdown(wait=False, cancel_futures=True)
+                self._processes = None
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_render_worker,
+                    max_tasks_per_child=self.max_tasks_per_child,
+                )
+            return self._processes
+
+    def _get_threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="certificates"
+                )
+            return self._threads
+
+    def render(self, student_name, course_name, completed_at):
+        """(certificate path, badge path), rendered by a worker process"""
+        if self.workers <= 0:
+            return _render(student_name, course_name, completed_at)
+        args = (student_name, course_name, completed_at)
+        try:
+            return self._get_processes().submit(_render, *args).result()
+        except BrokenProcessPool:
+            # a worker died (e.g. killed for memory); start a fresh pool once
+            logger.warning("Certificate render pool broken, restarting it")
+            return self._get_processes(reset=True).submit(_render, *args).result()
+
+    def submit(self, enrollment_id, phone_number_id: str, user_waid: str) -> None:
+        """Queue rendering and delivery of an enrollment's certificate and badge"""
+        if self.workers <= 0:
+            self.run(enrollment_id, phone_number_id, user_waid)
+            return
+        self._get_threads().submit(self.run, enrollment_id, phone_number_id, user_waid)
+
+    def run(self, enrollment_id, phone_number_id: str, user_waid: str) -> None:
+        from whatsapp.models import UserEnrollment
+        from whatsapp.services.cretificates_service import CertificateService
+
+        paths = ()
+        close_old_connections()
+        try:
+            enrollment = UserEnrollment.objects.select_related("user", "course").get(
+                pk=enrollment_id
+            )
+            user = enrollment.user
+            course_name = enrollment.course.course_name
+            paths = self.render(
+                user.full_name or user.whatsapp_name,
+                course_name,
+                enrollment.completed_at,
+            )
+            certificate_path, badge_path = paths
+            certificate_url = CertificateService.upload_certificate(
+                enrollment, certificate_path
+            )
+            badge_url = CertificateService.upload_badge(enrollment, badge_path)
+            self.deliver(
+                enrollment, phone_number_id, user_waid, paths, certificate_url, badge_url
+            )
+        except Exception:
+            logger.exception(f"Failed to render certificate for enrollment {enrollment_id}")
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            close_old_connections()
+
+    @staticmethod
+    def deliver(enrollment, phone_number_id, user_waid, paths, certificate_url, badge_url):
+        """Send the uploaded files on WhatsApp and the local copies by email"""
+        from whatsapp.services.emailing_service import EmailService
+        from whatsapp.services.messaging import WhatsAppService
+
+        user = enrollment.user
+        course_name = enrollment.course.course_name
+        WhatsAppService.send_file(
+            phone_number_id,
+            user_waid,
+            file_url=certificate_url,
+            filename=f"certificate_{course_name}",
+        )
+        WhatsAppService.send_file(
+            phone_number_id,
+            user_waid,
+            file_url=badge_url,
+            filename=f"badge_{course_name}",
+        )
+
+        if user.email:
+            try:
+                EmailService.send_email_with_file(
+                    subject=f"🎓 Your Certificate for {course_name}",
+                    body=(
+                        f"Dear {user.full_name},\n\n"
+                        f"Congratulations on completing the course *{course_name}*!\n\n"
+                        "Attached is your certificate of completion.\n\n"
+                        "Keep learning!\n Nikkoworkx Team"
+                    ),
+                    to=[user.email],
+                    attachments=list(paths),
+                )
+            except Exception:
+                logger.exception(f"Failed to send certificate email to {user.email}")
+
+
+certificate_pool = CertificateRenderPool(
+    workers=settings.CERTIFICATE_RENDER_WORKERS,
+    max_tasks_per_child=settings.CERTIFICATE_WORKER_MAX_TASKS,
+)
@@ -0,0 +1,301 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import unicodedata
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from whatsapp.services.cretificates_service import (
+    BADGE_DATE_FONT_SIZE,
+    BADGE_DATE_Y,
+    CertificateService,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stamp geometry or overlay drawing changes
+STAMP_LAYOUT_VERSION = 1
+
+PX_TO_PT = 0.75  # WeasyPrint writes 1 CSS px as 0.75 pt
+
+# Advance widths (1/1000 em) of the base-14 Helvetica fonts for ASCII 32..126
+_HELVETICA = (
+    "278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278 556 556 556 556 "
+    "556 556 556 556 556 556 278 278 584 584 584 556 1015 667 667 722 722 667 611 778 "
+    "722 278 500 667 556 833 722 778 667 778 722 667 611 722 667 944 667 667 611 278 "
+    "278 278 469 556 333 556 556 500 556 556 278 556 556 222 222 500 222 833 556 556 "
+    "556 556 333 500 278 556 500 722 500 500 500 334 260 334 584"
+)
+_HELVETICA_BOLD = (
+    "278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278 556 556 556 556 "
+    "556 556 556 556 556 556 333 333 584 584 584 611 975 722 722 722 722 667 611 778 "
+    "722 278 556 722 611 833 722 778 667 778 722 667 611 722 667 944 667 667 611 333 "
+    "278 333 584 556 333 556 611 556 611 556 333 611 611 278 278 556 278 889 611 611 "
+    "611 611 389 556 333 611 556 778 556 556 500 389 280 389 584"
+)
+FONT_WIDTHS = {
+    "Helvetica": [int(width) for width in _HELVETICA.split()],
+    "Helvetica-Bold": [int(width) for width in _HELVETICA_BOLD.split()],
+    "Helvetica-Oblique": [int(width) for width in _HELVETICA.split()],
+}
+FONT_ASCENT, FONT_DESCENT = 0.718, 0.207
+
+# A stamped name may shrink to this fraction of the template's font size
+# before the full renderer is used instead
+MIN_FONT_SCALE = 0.6
+
+
+def _base_char(char: str) -> str:
+    """"é" -> "e": accented Latin-1 letters take their base letter's width"""
+    return unicodedata.normalize("NFD", char)[0]
+
+
+def stampable(text: str) -> bool:
+    """Whether the base-14 fonts (WinAnsi encoding) can draw the text"""
+    try:
+        text.encode("cp1252")
+    except UnicodeEncodeError:
+        return False
+    return all(32 <= ord(_base_char(char)) <= 126 for char in text)
+
+
+def text_width(text: str, font: str, size: float) -> float:
+    widths = FONT_WIDTHS[font]
+    return sum(widths[ord(_base_char(char)) - 32] for char in text) * size / 1000
+
+
+def pdf_string(text: str) -> bytes:
+    data = text.encode("cp1252")
+    for char in (b"\\", b"(", b")"):
+        data = data.replace(char, b"\\" + char)
+    return b"(" + data + b")"
+
+
+class CertificateStamper:
+    """
+    Certificates and badges differ per learner only in name and date, so
+    each course's backgrounds are rendered once by WeasyPrint with those
+    lines left blank and cached on disk (shared by the render workers)
+    together with the geometry of the blank lines. A learner's document is
+    the cached page with a small overlay holding the text, drawn in the
+    base-14 Helvetica fonts. Text those fonts cannot draw, or a name too long
+    for its line, goes through the full WeasyPrint render instead.
+    """
+
+    _memo: Dict[str, Dict] = {}
+
+    # ---- public API ----
+
+    @classmethod
+    def certificate(cls, student_name, course_name, completed_at) -> str:
+        date = f"Issued on: {CertificateService.certificate_date(completed_at)}"
+        try:
+            if stampable(student_name) and stampable(date):
+                template = cls._template("certificate", course_name)
+                path = cls._stamp(
+                    template, {"name": student_name, "date": date}
+                )
+                if path:
+                    return path
+        except Exception:
+            logger.exception(f"Certificate stamping failed for {course_name}")
+        return CertificateService.generate_certificate(
+            student_name, course_name, completed_at
+        )
+
+    @classmethod
+    def badge(cls, student_name, badge_title, badge_date) -> str:
+        if isinstance(badge_date, str):
+            badge_date = datetime.strptime(badge_date, "%Y-%m-%d")
+        try:
+            template = cls._template("badge", badge_title)
+            path = cls._stamp(template, {"date": badge_date.strftime("%d-%m-%Y")})
+            if path:
+                return path
+        except Exception:
+            logger.exception(f"Badge stamping failed for {badge_title}")
+        return CertificateService.generate_badge(student_name, badge_title, badge_date)
+
+    # ---- cached backgrounds ----
+
+    @staticmethod
+    def _template_source(kind: str) -> str:
+        name = "certificate_template.html" if kind == "certificate" else "badge_template.html"
+        return get_template(name).template.source
+
+    @classmethod
+    def _template(cls, kind: str, course_name: str) -> Dict:
+        """{"pdf": background path, "fields": {...}} for a course, rendered
+        on first use"""
+        key = hashlib.blake2b(
+            json.dumps(
+                [STAMP_LAYOUT_VERSION, kind, course_name, cls._template_source(kind)]
+            ).encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+        if key in cls._memo and os.path.exists(cls._memo[key]["pdf"]):
+            return cls._memo[key]
+
+        directory = settings.CERTIFICATE_TEMPLATE_DIR
+        pdf_path = os.path.join(directory, f"{kind}-{key}.pdf")
+        fields_path = os.path.join(directory, f"{kind}-{key}.json")
+        if not (os.path.exists(pdf_path) and os.path.exists(fields_path)):
+            pdf, fields = cls._render_background(kind, course_name)
+            os.makedirs(directory, exist_ok=True)
+            # write-then-rename so concurrent workers never read a partial file
+            for path, data in ((pdf_path, pdf), (fields_path, json.dumps(fields).encode())):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as tmp:
+                    tmp.write(data)
+                os.replace(tmp_path, path)
+            logger.info(f"Rendered {kind} background for {course_name}")
+
+        with open(fields_path) as fields_file:
+            template = {"pdf": pdf_path, "fields": json.load(fields_file)}
+        cls._memo[key] = template
+        return template
+
+    @classmethod
+    def _render_background(cls, kind: str, course_name: str):
+        from weasyprint import HTML
+
+        if kind == "certificate":
+            document = HTML(
+                string=CertificateService.certificate_html("", course_name, "")
+            ).render()
+            page = document.pages[0]
+            fields = {
+                "name": cls._measure(page, "stamp-name"),
+                "date": cls._measure(page, "stamp-date"),
+            }
+        else:
+            document = HTML(
+                string=CertificateService.badge_html("", course_name, "")
+            ).render()
+            page = document.pages[0]
+            fields = {
+                # SVG text: centered on x, y is the baseline
+                "date": {
+                    "x": 0,
+                    "width": page.width * PX_TO_PT,
+                    "baseline": (page.height - BADGE_DATE_Y) * PX_TO_PT,
+                    "fontSize": BADGE_DATE_FONT_SIZE * PX_TO_PT,
+                    "font": "Helvetica-Oblique",
+                    "color": [0, 0, 0],
+                }
+            }
+        for field in fields.values():
+            field["pageWidth"] = page.width * PX_TO_PT
+            field["pageHeight"] = page.height * PX_TO_PT
+        return document.write_pdf(), fields
+
+    @staticmethod
+    def _measure(page, element_id: str) -> Dict:
+        """Content box and text style of the element with `element_id`, in
+        PDF points from the bottom-left of the page"""
+        # Page has no public box lookup; its layout tree is _page_box
+        box = next(
+            box
+            for box in page._page_box.descendants()
+            if box.element is not None and box.element.get("id") == element_id
+        )
+        style = box.style
+        size = style["font_size"]
+        top = box.content_box_y()
+        # centre the font's em box vertically in the (single) line box
+        baseline_from_top = (box.height - size * (FONT_ASCENT + FONT_DESCENT)) / 2 + (
+            size * FONT_ASCENT
+        )
+        return {
+            "x": box.content_box_x() * PX_TO_PT,
+            "width": box.width * PX_TO_PT,
+            "baseline": (page.height - top - baseline_from_top) * PX_TO_PT,
+            "fontSize": size * PX_TO_PT,
+            "font": "Helvetica-Bold" if style["font_weight"] >= 600 else "Helvetica",
+            "color": list(style["color"].to("srgb").coordinates),
+        }
+
+    # ---- stamping ----
+
+    @classmethod
+    def _stamp(cls, template: Dict, values: Dict[str, str]) -> Optional[str]:
+        """Cached background with `values` drawn centred on their lines;
+        None when a value does not fit"""
+        from pypdf import PdfReader, PdfWriter
+
+        overlay = cls._overlay(template["fields"], values)
+        if overlay is None:
+            return None
+
+        page = PdfReader(template["pdf"]).pages[0]
+        page.merge_page(PdfReader(io.BytesIO(overlay)).pages[0])
+        writer = PdfWriter()
+        writer.add_page(page)
+        pdf_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+        with pdf_file:
+            writer.write(pdf_file)
+        return pdf_file.name
+
+    @staticmethod
+    def _overlay(fields: Dict, values: Dict[str, str]) -> Optional[bytes]:
+        import pydyf
+
+        document = pydyf.PDF()
+        fonts = pydyf.Dictionary()
+        stream = pydyf.Stream()
+
+        for name, text in values.items():
+            field = fields[name]
+            font = field["font"]
+            size = field["fontSize"]
+            width = text_width(text, font, size)
+            if width > field["width"]:
+                size *= field["width"] / width
+                if size < field["fontSize"] * MIN_FONT_SCALE:
+                    return None
+                width = text_width(text, font, size)
+
+            if font not in fonts:
+                font_object = pydyf.Dictionary(
+                    {
+                        "Type": "/Font",
+                        "Subtype": "/Type1",
+                        "BaseFont": f"/{font}",
+                        "Encoding": "/WinAnsiEncoding",
+                    }
+                )
+                document.add_object(font_object)
+                fonts[font] = font_object.reference
+
+            stream.begin_text()
+            stream.set_color_rgb(*field["color"])
+            stream.set_font_size(font, size)
+            stream.set_text_matrix(
+                1, 0, 0, 1, field["x"] + (field["width"] - width) / 2, field["baseline"]
+            )
+            stream.show_text(pdf_string(text))
+            stream.end_text()
+
+        document.add_object(stream)
+        document.add_page(
+            pydyf.Dictionary(
+                {
+                    "Type": "/Page",
+                    "Parent": document.pages.reference,
+                    "MediaBox": pydyf.Array(
+                        [0, 0, field["pageWidth"], field["pageHeight"]]
+                    ),
+                    "Contents": stream.reference,
+                    "Resources": pydyf.Dictionary({"Font": fonts}),
+                }
+            )
+        )
+        output = io.BytesIO()
+        document.write(output)
+        return output.getvalue()
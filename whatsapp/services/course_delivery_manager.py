@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 from django.utils import timezone
+from django.conf import settings
 import os
 import tempfile
 from courses.services.course import CourseService
@@ -14,31 +15,36 @@ from whatsapp.models import (
 )
 from courses.services.modules import ModuleService
 from courses.services.assesments import AssessmentService
-from whatsapp.services.assessment_service import UserAssessmentService
+from courses.services.topics import TopicService
+from courses.services.publishing import ContentPublishService
+from courses.services.module_index import ModuleIndexService
+from courses.services.retrieval import CourseRetrievalService
+from whatsapp.services.assessment_service import (
+    PASSING_PERCENTAGE,
+    UserAssessmentService,
+)
 from whatsapp.services.cretificates_service import CertificateService
 from whatsapp.services.emailing_service import EmailService
 from whatsapp.services.module_delivery_service import ModuleDeliveryProgressService
 from whatsapp.services.post_course_manager import PostCourseManager
-import requests
 import tempfile
 from .enrollment_service import EnrollmentService
 from django.db.models import Max, Min
 from .messaging import WhatsAppService
-from whatsapp.services.ai_reponse_interpreter import AIResponseInterpreter
+from whatsapp.services.ai_reponse_interpreter import (
+    AIResponseInterpreter,
+    TUTOR_FALLBACK_REPLY,
+)
+from whatsapp.services.answer_cache import TutorAnswerCache
+from whatsapp.services.assessment_session import AttemptSession
+from whatsapp.services.certificate_jobs import certificate_pool
+from whatsapp.services.item_analytics import ItemAnalyticsService
+from whatsapp.services.llm_metrics import LLMUsageService
+from whatsapp.services.tutor_memory import TutorMemoryService, is_follow_up
 
 logger = logging.getLogger(__name__)
 
 
-def download_temp_file(url: str, suffix=".pdf") -> str:
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        for chunk in response.iter_content(chunk_size=8192):
-            tmp.write(chunk)
-        return tmp.name
-
-
 class CourseDeliveryManager:
     """Manages the delivery of course content and assessments to users"""
 
@@ -161,31 +167,11 @@ class CourseDeliveryManager:
     ):
         """Sends a detailed welcome message to the user with course information including modules"""
         course = enrollment.course
-        modules = course.modules.all()
-        num_modules = modules.count()
-
-        course_name = course.course_name
-        category = course.category
-        level = course.level
-        duration = course.duration_in_weeks
-        tags = ", ".join(course.tags) if course.tags else "None"
-
-        modules = course.modules.all()
-        module_titles = "\n".join(
-            [f"  • {i+1}. {m.title}" for i, m in enumerate(modules)]
+        segments = course.rendered_intro or ContentPublishService.render_course_intro(
+            course
         )
-
-        message = (
-            f"🎓 *Course: {course_name}*\n"
-            f"📚 *Category:* {category}\n"
-            f"📈 *Level:* {level}\n"
-            f"⏳ *Duration:* {duration} week(s)\n"
-            f"📦 *Modules:* {num_modules} module(s)\n"
-            f"🏷️ *Tags:* {tags}\n"
-            f"📖 *Modules Overview:*\n{module_titles}\n\n"
-            f"👉 Let's begin your learning journey!\n"
-        )
-        WhatsAppService.send_message(self.phone_number_id, user_waid, message)
+        for segment in segments:
+            WhatsAppService.send_message(self.phone_number_id, user_waid, segment)
 
     def get_course_progress(self, enrollment: UserEnrollment) -> str:
         course = enrollment.course
@@ -297,6 +283,7 @@ class CourseDeliveryManager:
                 )
                 enrollment.current_assessment_attempt.status = "abandoned"
                 enrollment.current_assessment_attempt.save()
+                AttemptSession.end(enrollment.current_assessment_attempt.id)
                 enrollment.current_assessment_attempt = None
                 enrollment.conversation_state = "idle"
                 enrollment.save()
@@ -504,52 +491,91 @@ class CourseDeliveryManager:
         Use AI to answer user questions based on course/module context.
         This method is kept separate from analyze/extract logic.
         """
-        course_name = enrollment.course.course_name
-        module_title = (
-            enrollment.current_module.title if enrollment.current_module else None
-        )
+        course = enrollment.course
+        current_module = enrollment.current_module
 
-        context = f"""The student is enrolled in the course '{course_name}', 
-        course title: {course_name} 
-        category: {enrollment.course.category}
-        level: {enrollment.course.level}
-        description: {enrollment.course.description}        
+        context = f"""The student is enrolled in the course '{course.course_name}',
+        category: {course.category}
+        level: {course.level}
+        description: {(course.description or "")[:500]}
         ."""
-        if module_title:
-            context += f"""They are currently on the module '{module_title}'.
-            module title: {enrollment.current_module.title}
-            content: {enrollment.current_module.content}
-            """
+        if current_module:
+            context += f"They are currently on the module '{current_module.title}'.\n"
             module_delivery = self.module_delivery_service.get_progress(
-                enrollment=enrollment, module=enrollment.current_module
+                enrollment=enrollment, module=current_module
             )
-            if module_delivery:
-                current_topic = module_delivery.current_topic
-
-                if current_topic:
-                    context += f"""
-                    Have read the topic: '{current_topic.title}'
-                    topic title: {current_topic.title}
-                    content: {current_topic.content}
-                    """
+            if module_delivery and module_delivery.current_topic:
+                context += (
+                    f"They are reading the topic '{module_delivery.current_topic.title}'.\n"
+                )
 
         try:
+            # follow-ups ("why is that?") depend on the conversation, so they
+            # neither use the shared answer cache nor search on their own
+            follow_up = is_follow_up(user_input)
+            search_query = user_input
+            if follow_up:
+                search_query = f"{TutorMemoryService.last_question(enrollment) or ''} {user_input}"
+            else:
+                cached_answer = TutorAnswerCache.get(
+                    course.course_id, current_module, user_input
+                )
+                if cached_answer:
+                    LLMUsageService.record_cache_hit("tutor")
+                    self._send_message(user_waid=user_waid, message=cached_answer)
+                    self.send_universal_continue_reply(user_waid=user_waid)
+                    TutorMemoryService.remember(
+                        enrollment, user_input, cached_answer, self.ai_interpreter
+                    )
+                    return cached_answer
+
+            # only the course passages relevant to the question, within a token budget
+            passages = CourseRetrievalService.search(
+                course,
+                search_query,
+                top_k=settings.TUTOR_CONTEXT_TOP_K,
+                token_budget=settings.TUTOR_CONTEXT_TOKEN_BUDGET,
+                prefer_module_id=current_module.module_id if current_module else None,
+            )
+            if passages:
+                context += "\nRelevant course material:\n" + "\n\n".join(
+                    f"[{passage['source']}]\n{passage['text']}" for passage in passages
+                )
+
+            # only follow-ups need the conversation; standalone answers stay
+            # history-free, so they can be shared through the answer cache
+            if follow_up:
+                history = TutorMemoryService.render(enrollment)
+                if history:
+                    context += f"\n\nConversation so far:\n{history}"
+
             ai_prompt = (
                 f"{context}\n\n"
                 f"The student asked: '{user_input}'\n"
-                "Provide a helpful, concise, and clear explanation. "
+                "Provide a helpful, concise, and clear explanation grounded in the course material above. "
                 "If the question is unrelated or unclear, politely ask them to rephrase and dont answer that unrelated question."
             )
 
             print("[USER QUESTION PROMPT]:", ai_prompt)
 
             response = self.ai_interpreter.get_ai_answer(ai_prompt)
+            answered = bool(response)
+            if answered and not follow_up:
+                TutorAnswerCache.store(
+                    course.course_id, current_module, user_input, response
+                )
+            elif not answered:
+                # deadline passed or the call failed
+                response = TUTOR_FALLBACK_REPLY
 
             self._send_message(user_waid=user_waid, message=response)
             self.send_universal_continue_reply(user_waid=user_waid)
-            return (
-                response or "That's a great question! Let me get back to you on that."
-            )
+            if answered:
+                # after sending, so folding old turns never delays the answer
+                TutorMemoryService.remember(
+                    enrollment, user_input, response, self.ai_interpreter
+                )
+            return response
 
         except Exception as e:
             logger.error(f"AI query failed: {str(e)}")
@@ -614,8 +640,10 @@ class CourseDeliveryManager:
         enrollment.save()
 
     def send_module_content(self, user_waid, module):
-        message = f"📚 *{module.title}*\n\n{module.content}"
-        self._send_message(user_waid, message)
+        segments = module.rendered_intro or ContentPublishService.render_module_intro(
+            module
+        )
+        self._send_segments(user_waid, segments)
         self.send_universal_continue_reply(user_waid=user_waid)
 
     # ---- assessment and quiz functionalities ----
@@ -706,24 +734,12 @@ class CourseDeliveryManager:
                 f"Questions answered: {attempt.questions_answered}"
             )
 
-            # Evaluate the question response
-            logger.debug(
-                f"Evaluating question response for assessment {attempt.assessment.assessment_id}"
-            )
-            evaluation_result = (
-                self.user_assessment_service.evaluate_question_for_assessment(
-                    assessment_id=attempt.assessment.assessment_id,
-                    question_index=attempt.current_question_index,
-                    user_input=response,
-                    attempt_id=attempt.id,
-                )
+            # Evaluate the response, record it and advance the attempt
+            logger.debug(f"Evaluating question response for attempt {attempt.id}")
+            evaluation_result = self.user_assessment_service.answer_current_question(
+                attempt, response
             )
             logger.debug(f"Evaluation result: {evaluation_result}")
-
-            # Update attempt progress
-            attempt.questions_answered += 1
-            attempt.current_question_index += 1
-            attempt.save()
             logger.info(
                 f"Updated attempt {attempt.id} | "
                 f"New question index: {attempt.current_question_index} | "
@@ -733,7 +749,10 @@ class CourseDeliveryManager:
             # Send next question
             logger.debug("Preparing to send next question...")
             next_question_result = self.user_assessment_service.send_next_question(
-                attempt.id, phone_number_id=self.phone_number_id
+                attempt.id,
+                phone_number_id=self.phone_number_id,
+                attempt=attempt,
+                user_waid=user_waid,
             )
 
             if next_question_result is None:
@@ -762,26 +781,19 @@ class CourseDeliveryManager:
         """Complete the assessment attempt and provide feedback"""
         try:
             user = attempt.user
-            # Get all questions and responses
-            questions = attempt.assessment.questions.all()
-            responses = attempt.responses.all()
-
-            # Assessment complete
-            score = (
-                sum((r.score if r.is_correct else 0) for r in responses)
-                if responses
-                else 0
-            )
-            total = len(questions)
+            # Deferred assessments grade their open answers now
+            self.user_assessment_service.grade_pending_responses(attempt)
+            AttemptSession.end(attempt.id)
+
+            # Score and correct count were accumulated as answers came in
+            attempt.refresh_from_db(fields=["score", "correct_count", "max_marks"])
 
             # Update attempt status
             attempt.status = "completed"
-            attempt.score = score
             attempt.completed_at = timezone.now()
-            attempt.passed = (
-                attempt.score / total * 100
-            ) >= 70  # 70% passing threshold
-            attempt.save()
+            attempt.passed = attempt.percentage >= PASSING_PERCENTAGE
+            attempt.save(update_fields=["status", "completed_at", "passed"])
+            ItemAnalyticsService.record_attempt(attempt)
 
             # # Send completion message
             # message = (
@@ -796,7 +808,7 @@ class CourseDeliveryManager:
 
             # Send results
             message = f"📝 *Assessment Complete!*\n\n"
-            message += f"Score: {attempt.score}\n"
+            message += f"Score: {attempt.score:g}/{attempt.max_marks:g}\n"
             message += (
                 f"Result: {'Passed ✅' if attempt.passed else 'Try Again ❌'}\n\n"
             )
@@ -986,8 +998,8 @@ class CourseDeliveryManager:
             print(
                 f"[DEBUG] Sending paragraph: id={paragraph.paragraph_id}, order={paragraph.order}"
             )
-            message = f"📖 *{current_topic.title}*\n\n{paragraph.content}\n\n"
-            self._send_message(user_waid, message)
+            segments = self._paragraph_segments(enrollment, current_topic, paragraph)
+            self._send_segments(user_waid, segments)
             self.send_universal_continue_reply(user_waid=user_waid)
         elif (
             topic_delivery_progress
@@ -1011,6 +1023,27 @@ class CourseDeliveryManager:
                 )
                 self.send_universal_assessment_reply(user_waid=user_waid)
 
+    def _paragraph_chunk(self, enrollment: UserEnrollment, topic, paragraph) -> list:
+        """Paragraphs delivered together with `paragraph` in the course's delivery mode"""
+        if enrollment.course.delivery_mode == "chunked":
+            return TopicService.get_paragraph_chunk(topic, paragraph)
+        return [paragraph]
+
+    def _paragraph_segments(self, enrollment: UserEnrollment, topic, paragraph) -> list:
+        """Message segments for `paragraph`, pre-rendered at publish time when available"""
+        paragraphs = self._paragraph_chunk(enrollment, topic, paragraph)
+        if len(paragraphs) > 1:
+            segments = (topic.rendered_chunks or {}).get(
+                str(paragraphs[-1].paragraph_id)
+            )
+        else:
+            segments = paragraphs[0].rendered_segments
+        return segments or ContentPublishService.render_paragraphs(topic, paragraphs)
+
+    def _send_segments(self, user_waid: str, segments: list) -> None:
+        for segment in segments:
+            self._send_message(user_waid, segment)
+
     def complete_module_and_continue(self, user_waid: str, module: Module) -> None:
         """Complete the current module and move to the next one"""
         try:
@@ -1021,27 +1054,20 @@ class CourseDeliveryManager:
                 return self._handle_no_active_enrollment(user_waid, user)
 
             # Calculate progress
-            all_modules = self.module_service.get_all_modules(
-                course_id=enrollment.course.course_id
-            )
+            module_index = ModuleIndexService.get_index(enrollment.course_id)
 
-            if not all_modules["success"] or not all_modules["data"]:
+            if not module_index.total:
                 self._send_message(user_waid, "⚠️ Failed to load course modules.")
                 return
 
-            total_modules = len(all_modules["data"])
-            current_order = module.order
-            next_order = current_order + 1
-
-            # Find next module
-            next_module_data = next(
-                (m for m in all_modules["data"] if m["order"] == next_order), None
-            )
+            next_module_id = module_index.next_id(module.module_id)
 
-            if next_module_data:
-                next_module = Module.objects.get(module_id=next_module_data["moduleId"])
+            if next_module_id:
+                next_module = Module.objects.get(module_id=next_module_id)
                 enrollment.current_module = next_module
-                enrollment.progress = next_order / total_modules
+                enrollment.progress = (
+                    module_index.position(next_module_id) / module_index.total
+                )
                 enrollment.conversation_state = "offer_quiz_or_content"
                 enrollment.save()
                 self.module_delivery_service.get_or_create_progress(
@@ -1072,14 +1098,6 @@ class CourseDeliveryManager:
             enrollment.completed_at = timezone.now()
             enrollment.save()
 
-            certificate_url = self.ceritficates_service.generate_and_upload_certificate(
-                enrollment=enrollment
-            )
-
-            badge_url = self.ceritficates_service.generate_and_upload_badge(
-                enrollment=enrollment
-            )
-
             # Clear active enrollment
             user = enrollment.user
             user.active_enrollment = None
@@ -1088,53 +1106,12 @@ class CourseDeliveryManager:
             # Send completion message
             message = f"🎉 *Course Completed!*\n\n"
             message += f"Congratulations on completing course: {enrollment.course.course_name}!\n\n"
+            message += "Your certificate and badge are being prepared and will be sent to you shortly."
 
             self._send_message(user_waid, message)
 
-            self.whatsapp_service.send_file(
-                self.phone_number_id,
-                user.whatsapp_id,
-                file_url=certificate_url,
-                filename=f"certificate_{enrollment.course.course_name}",
-            )
-            self.whatsapp_service.send_file(
-                self.phone_number_id,
-                user.whatsapp_id,
-                file_url=badge_url,
-                filename=f"badge_{enrollment.course.course_name}",
-            )
-
-            if user.email:
-                subject = f"🎓 Your Certificate for {enrollment.course.course_name}"
-                body = (
-                    f"Dear {user.full_name},\n\n"
-                    f"Congratulations on completing the course *{enrollment.course.course_name}*!\n\n"
-                    "Attached is your certificate of completion.\n\n"
-                    "Keep learning!\n Nikkoworkx Team"
-                )
-
-                temp_file_path = None
-                try:
-                    # Download certificate locally
-                    temp_file_path = download_temp_file(certificate_url, suffix=".pdf")
-                    temp_badge_path = download_temp_file(badge_url, suffix=".pdf")
-
-                    # Send email with attachment
-                    self.email_service.send_email_with_file(
-                        subject=subject,
-                        body=body,
-                        to=[user.email],
-                        attachments=[temp_file_path, temp_badge_path],
-                    )
-
-                except Exception:
-                    logger.exception(
-                        f"Failed to send certificate email to {user.email}"
-                    )
-                finally:
-                    # Cleanup local file
-                    if temp_file_path and os.path.exists(temp_file_path):
-                        os.remove(temp_file_path)
+            # Rendered and delivered by the certificate worker pool
+            certificate_pool.submit(enrollment.id, self.phone_number_id, user.whatsapp_id)
 
             self.post_course_manager.start(user_waid=user_waid)
 
@@ -1202,8 +1179,10 @@ class CourseDeliveryManager:
                         topic_progress.current_paragraph = last_para
                         topic_progress.state = "content_delivering"
                         topic_progress.save()
-                        message = f"📖 *{prev_topic.title}*\n\n{last_para.content}"
-                        self._send_message(user_waid, message)
+                        segments = self._paragraph_segments(
+                            enrollment, prev_topic, last_para
+                        )
+                        self._send_segments(user_waid, segments)
                         self.send_universal_continue_reply(user_waid=user_waid)
                         module_progress.current_topic = prev_topic
                         module_progress.state = "content_delivering"
@@ -1222,18 +1201,26 @@ class CourseDeliveryManager:
             if topic_state == "content_delivering":
                 current_para = topic_progress.current_paragraph
                 if current_para:
+                    first_para = self._paragraph_chunk(
+                        enrollment, current_topic, current_para
+                    )[0]
                     prev_para = (
-                        current_topic.paragraphs.filter(order__lt=current_para.order)
+                        current_topic.paragraphs.filter(order__lt=first_para.order)
                         .order_by("-order")
                         .first()
                     )
                     if prev_para:
                         topic_progress.current_paragraph = prev_para
-                        if prev_para.order == 1:
+                        prev_chunk = self._paragraph_chunk(
+                            enrollment, current_topic, prev_para
+                        )
+                        if prev_chunk[0].order == 1:
                             topic_progress.state = "not_started"
                         topic_progress.save()
-                        message = f"📖 *{current_topic.title}*\n\n{prev_para.content}"
-                        self._send_message(user_waid, message)
+                        segments = self._paragraph_segments(
+                            enrollment, current_topic, prev_para
+                        )
+                        self._send_segments(user_waid, segments)
                         self.send_universal_continue_reply(user_waid=user_waid)
                         return
                     else:
@@ -1253,10 +1240,10 @@ class CourseDeliveryManager:
                                 )
                                 topic_progress.current_paragraph = last_para
                                 topic_progress.save()
-                                message = (
-                                    f"📖 *{prev_topic.title}*\n\n{last_para.content}"
+                                segments = self._paragraph_segments(
+                                    enrollment, prev_topic, last_para
                                 )
-                                self._send_message(user_waid, message)
+                                self._send_segments(user_waid, segments)
                                 self.send_universal_continue_reply(user_waid=user_waid)
                                 return
                 self.send_module_content(user_waid=user_waid, module=current_module)
@@ -1275,8 +1262,10 @@ class CourseDeliveryManager:
                     topic_progress.current_paragraph = last_para
                     topic_progress.state = "content_delivering"
                     topic_progress.save()
-                    message = f"📖 *{current_topic.title}*\n\n{last_para.content}"
-                    self._send_message(user_waid, message)
+                    segments = self._paragraph_segments(
+                        enrollment, current_topic, last_para
+                    )
+                    self._send_segments(user_waid, segments)
                     self.send_universal_continue_reply(user_waid=user_waid)
                 else:
                     self._send_message(user_waid, "⚠️ No paragraphs in this topic.")
@@ -1301,8 +1290,10 @@ class CourseDeliveryManager:
                     module_progress.current_topic = last_topic
                     module_progress.state = "content_delivering"
                     module_progress.save()
-                    message = f"📖 *{last_topic.title}*\n\n{last_para.content}"
-                    self._send_message(user_waid, message)
+                    segments = self._paragraph_segments(
+                        enrollment, last_topic, last_para
+                    )
+                    self._send_segments(user_waid, segments)
                     self.send_universal_assessment_reply(user_waid=user_waid)
                     return
             self.send_module_content(user_waid=user_waid, module=current_module)
@@ -1,13 +1,15 @@
 import tempfile
-import boto3
 import os
 from django.template.loader import render_to_string
-from weasyprint import HTML
 from whatsapp_bot import settings
 from datetime import datetime
 from whatsapp.models import UserEnrollment
 import textwrap
 
+# Badge date line (SVG user units = CSS px on the 500px badge page)
+BADGE_DATE_Y = 420
+BADGE_DATE_FONT_SIZE = 22
+
 
 class CertificateService:
     @staticmethod
@@ -16,14 +18,10 @@ class CertificateService:
         Generate a PDF certificate for the given student and course.
         Returns the local file path.
         """
-        html_string = render_to_string(
-            "certificate_template.html",
-            {
-                "student_name": student_name,
-                "course_name": course_name,
-                "date": completed_at,
-                "date": datetime.now().strftime("%B %d, %Y"),
-            },
+        from weasyprint import HTML
+
+        html_string = CertificateService.certificate_html(
+            student_name, course_name, CertificateService.certificate_date(completed_at)
         )
 
         html = HTML(string=html_string)
@@ -32,6 +30,22 @@ class CertificateService:
 
         return pdf_file.name  # Path to generated PDF
 
+    @staticmethod
+    def certificate_date(completed_at):
+        return datetime.now().strftime("%B %d, %Y")
+
+    @staticmethod
+    def certificate_html(student_name, course_name, date):
+        """Certificate page; empty name/date leave their lines blank"""
+        return render_to_string(
+            "certificate_template.html",
+            {
+                "student_name": student_name,
+                "course_name": course_name,
+                "date": date,
+            },
+        )
+
     @staticmethod
     def wrap_text(text, max_width=30, max_font_size=36, min_font_size=14):
         """
@@ -60,12 +74,26 @@ class CertificateService:
         """
         Generate a badge PDF with inline SVG.
         """
+        from weasyprint import HTML
+
         if isinstance(badge_date, str):
             badge_date = datetime.strptime(badge_date, "%Y-%m-%d")
 
         # Format date as dd-mm-yyyy
         formatted_date = badge_date.strftime("%d-%m-%Y")
 
+        html_string = CertificateService.badge_html(
+            student_name, badge_title, formatted_date
+        )
+        html = HTML(string=html_string)
+        pdf_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+        html.write_pdf(target=pdf_file.name)
+
+        return pdf_file.name
+
+    @staticmethod
+    def badge_html(student_name, badge_title, formatted_date):
+        """Badge page with inline SVG; an empty date leaves the date line blank"""
         # Wrap and resize title
         title_lines, title_font_size = CertificateService.wrap_text(badge_title)
 
@@ -115,11 +143,11 @@ class CertificateService:
             </text>
             
             <text x="50%" y="380" font-style="italic" font-family="Brush Script MT, cursive" font-size="22" text-anchor="middle" fill="black">Next Step Foundation</text>
-            <text id="badgeDate" x="50%" y="420" font-style="italic" font-family="Brush Script MT, cursive" font-size="22" text-anchor="middle" fill="black">{formatted_date}</text>
+            <text id="badgeDate" x="50%" y="{BADGE_DATE_Y}" font-style="italic" font-family="Brush Script MT, cursive" font-size="{BADGE_DATE_FONT_SIZE}" text-anchor="middle" fill="black">{formatted_date}</text>
         </svg>
         """
 
-        html_string = render_to_string(
+        return render_to_string(
             "badge_template.html",
             {
                 "student_name": student_name,
@@ -127,11 +155,39 @@ class CertificateService:
             },
         )
 
-        html = HTML(string=html_string)
-        pdf_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        html.write_pdf(target=pdf_file.name)
+    @staticmethod
+    def render_documents(student_name, course_name, completed_at):
+        """
+        Render the certificate and badge PDFs; returns their local paths.
+        Runs in a certificate render worker process. Both are stamped onto
+        the course's cached backgrounds.
+        """
+        from whatsapp.services.certificate_stamping import CertificateStamper
 
-        return pdf_file.name
+        certificate_path = CertificateStamper.certificate(
+            student_name, course_name, completed_at
+        )
+        badge_path = CertificateStamper.badge(student_name, course_name, completed_at)
+        return certificate_path, badge_path
+
+    @staticmethod
+    def upload_certificate(enrollment: UserEnrollment, pdf_path: str) -> str:
+        """Upload a rendered certificate and record its URL on the enrollment"""
+        s3_key = f"certificates/{enrollment.user.id}/{enrollment.course.course_id}/{datetime.now().strftime('%Y%m%d')}.pdf"
+        certificate_url = CertificateService.upload_to_s3(pdf_path, s3_key)
+        enrollment.certificate_earned = True
+        enrollment.certificate_url = certificate_url
+        enrollment.save(update_fields=["certificate_earned", "certificate_url"])
+        return certificate_url
+
+    @staticmethod
+    def upload_badge(enrollment: UserEnrollment, pdf_path: str) -> str:
+        """Upload a rendered badge and record its URL on the enrollment"""
+        s3_key = f"badges/{enrollment.user.id}/{enrollment.course.course_id}/{datetime.now().strftime('%Y%m%d')}.pdf"
+        badge_url = CertificateService.upload_to_s3(pdf_path, s3_key)
+        enrollment.badge_url = badge_url
+        enrollment.save(update_fields=["badge_url"])
+        return badge_url
 
     @staticmethod
     def upload_to_s3(file_path, s3_key):
@@ -139,6 +195,8 @@ class CertificateService:
         Uploads the given file to S3 and returns the public URL.
         s3_key is the path/key in the bucket (e.g., 'certificates/cert1.pdf')
         """
+        import boto3
+
         s3_client = boto3.client(
             "s3",
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
@@ -179,18 +237,7 @@ class CertificateService:
         )
 
         try:
-            # Create S3 key with a structured path
-            s3_key = f"certificates/{enrollment.user.id}/{enrollment.course.course_id}/{datetime.now().strftime('%Y%m%d')}.pdf"
-
-            # Upload to S3
-            certificate_url = CertificateService.upload_to_s3(pdf_path, s3_key)
-
-            # Update enrollment record
-            enrollment.certificate_earned = True
-            enrollment.certificate_url = certificate_url
-            enrollment.save()
-
-            return certificate_url
+            return CertificateService.upload_certificate(enrollment, pdf_path)
 
         except Exception as e:
             # Log error and cleanup
@@ -224,16 +271,7 @@ class CertificateService:
         )
 
         try:
-            # Create S3 key with a structured path
-            s3_key = f"badges/{enrollment.user.id}/{enrollment.course.course_id}/{datetime.now().strftime('%Y%m%d')}.pdf"
-
-            # Upload to S3
-            badge_url = CertificateService.upload_to_s3(pdf_path, s3_key)
-
-            enrollment.badge_url = badge_url
-            enrollment.save()
-
-            return badge_url
+            return CertificateService.upload_badge(enrollment, pdf_path)
 
         except Exception as e:
             # Log error and cleanup
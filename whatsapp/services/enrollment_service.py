@@ -1,5 +1,6 @@
 from django.db import transaction
 from datetime import datetime
+from courses.services.module_index import ModuleIndexService
 from ..models import UserEnrollment, Course, Module, WhatsappUser
 
 
@@ -71,16 +72,10 @@ class EnrollmentService:
             current_module = enrollment.current_module
             print("current module:", current_module)
 
-            if not current_module:
-                # Return the first module in order
-                next_module = enrollment.course.modules.order_by("order").first()
-            else:
-                # Return the next module with higher order
-                next_module = (
-                    enrollment.course.modules.filter(order__gt=current_module.order)
-                    .order_by("order")
-                    .first()
-                )
+            # first module when none is current, otherwise the one after it
+            next_module = ModuleIndexService.get_next_module(
+                enrollment.course_id, current_module
+            )
 
             if not next_module:
                 print(f"No next module found for enrollment: {enrollment.id}")
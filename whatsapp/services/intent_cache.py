@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from django.core.cache import caches
+
+from whatsapp.services.intent_classifier import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class LRUTTLCache:
+    """Thread-safe bounded LRU whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IntentDecisionCache:
+    """
+    Intent decisions keyed by (normalized text, conversation state).
+    A process-local LRU sits in front of an optional shared Django cache so
+    decisions made by one worker are reused by all of them.
+    """
+
+    COUNTERS = ("hits", "misses", "saved_ms")
+
+    def __init__(self, max_size: int, ttl: int, shared_alias: Optional[str] = None):
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._local = LRUTTLCache(max_size, ttl)
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._counter_lock = threading.Lock()
+
+    @property
+    def _shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    @staticmethod
+    def _key(user_input: str, current_state: Optional[str]) -> str:
+        text = normalize_text(user_input)
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return f"intent-decision:{current_state or 'none'}:{digest}"
+
+    def get(self, user_input: str, current_state: Optional[str]) -> Optional[str]:
+        key = self._key(user_input, current_state)
+        entry = self._local.get(key)
+        if entry is None and self._shared is not None:
+            try:
+                entry = self._shared.get(key)
+            except Exception:
+                logger.exception("Shared intent cache read failed")
+            if entry is not None:
+                self._local.set(key, entry)
+
+        if entry is None:
+            self._count(misses=1)
+            return None
+        self._count(hits=1, saved_ms=int(entry["latency_ms"]))
+        return entry["intent"]
+
+    def set(
+        self,
+        user_input: str,
+        current_state: Optional[str],
+        intent: str,
+        latency_ms: float,
+    ) -> None:
+        """Store a decision with the LLM latency a later hit will save"""
+        key = self._key(user_input, current_state)
+        entry = {"intent": intent, "latency_ms": latency_ms}
+        self._local.set(key, entry)
+        if self._shared is not None:
+            try:
+                self._shared.set(key, entry, self.ttl)
+            except Exception:
+                logger.exception("Shared intent cache write failed")
+
+    def _count(self, **increments) -> None:
+        with self._counter_lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+        if self._shared is not None:
+            for name, value in increments.items():
+                key = f"intent-decision-stats:{name}"
+                try:
+                    # add() is a no-op when the counter exists
+                    self._shared.add(key, 0, None)
+                    self._shared.incr(key, value)
+                except Exception:
+                    logger.exception("Shared intent cache counter update failed")
+
+    def stats(self) -> Dict:
+        """Hit rate and LLM latency saved, across workers when a shared cache is used"""
+        counters = dict(self._counters)
+        scope = "process"
+        if self._shared is not None:
+            try:
+                shared = self._shared.get_many(
+                    [f"intent-decision-stats:{name}" for name in self.COUNTERS]
+                )
+                counters = {
+                    name: shared.get(f"intent-decision-stats:{name}", 0)
+                    for name in self.COUNTERS
+                }
+                scope = "shared"
+            except Exception:
+                logger.exception("Shared intent cache stats read failed")
+
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "scope": scope,
+            "localEntries": len(self._local),
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hitRate": counters["hits"] / lookups if lookups else 0.0,
+            "latencySavedMs": counters["saved_ms"],
+        }
@@ -0,0 +1,464 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from whatsapp.services.buffered_writer import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+VALID_INTENTS = {
+    "greeting",
+    "continue",
+    "assessment",
+    "module",
+    "question",
+    "cancel",
+    "prev",
+    "home",
+    "course-intro",
+    "course-progress",
+    "unknown",
+}
+
+INTENT_KEYWORDS = {
+    "continue": [
+        "next",
+        "ready",
+        "continue",
+        "go",
+        "go ahead",
+        "move on",
+        "start",
+        "proceed",
+    ],
+    "assessment": [
+        "assessment",
+        "quiz",
+        "test",
+        "exam",
+        "start quiz",
+        "start test",
+    ],
+    "module": ["module", "lesson", "study", "content", "chapter", "material"],
+    "prev": ["prev", "previous", "last", "back", "earlier"],
+    "home": ["home", "menu", "main menu", "options", "more options"],
+    "course-intro": [
+        "intro",
+        "introduction",
+        "course intro",
+        "course-intro",
+        "course introduction",
+        "about course",
+    ],
+    "course-progress": [
+        "progress",
+        "status",
+        "my journey",
+        "course progress",
+        "course-progress",
+        "how am i doing",
+    ],
+    "cancel": ["cancel", "stop", "exit", "quit", "end", "pause"],
+}
+
+# Chat shorthand rewritten before matching
+SHORTHAND = {
+    "nxt": "next",
+    "nex": "next",
+    "cont": "continue",
+    "contd": "continue",
+    "pls": "please",
+    "plz": "please",
+    "prv": "prev",
+    "k": "ok",
+    "kk": "ok",
+    "okk": "ok",
+    "okay": "ok",
+    "whats": "what is",
+    "lets": "let us",
+}
+
+# Politeness and filler words ignored by keyword matching
+FILLER_WORDS = {"ok", "please", "now", "then", "yes", "sure", "let", "us", "the", "a"}
+
+# Typo matches ("contnue") are a hint for when the LLM is unavailable, never
+# confident enough to route on their own (INTENT_CONFIDENCE_THRESHOLD is 0.75)
+TYPO_CONFIDENCE = 0.6
+# Shorter keywords have too many one-edit neighbours ("start"/"stars")
+TYPO_MIN_KEYWORD_LENGTH = 5
+
+# Below this many logged examples the n-gram model is not trusted
+MIN_TRAINING_SAMPLES = 50
+# Training weight per decision source: keyword self-labels only restate the
+# keyword rules, so LLM decisions carry most of what the model learns
+SAMPLE_WEIGHTS = {"llm": 1.0, "keyword": 0.2}
+# Weighted samples an intent needs before the model may predict it
+MIN_CLASS_SUPPORT = 10.0
+# Probability lead the best intent needs over the runner-up
+MIN_PREDICTION_MARGIN = 0.4
+# Retrain from the decision log at most this often (seconds)
+RETRAIN_INTERVAL = 30 * 60
+# Most recent decisions used for training
+TRAINING_WINDOW = 20000
+
+
+class IntentPrediction(NamedTuple):
+    intent: str
+    confidence: float
+    source: str  # "keyword" | "model" | "none"
+
+
+def within_one_edit(first: str, second: str) -> bool:
+    """One insertion, deletion, substitution or adjacent swap apart (or equal)"""
+    if abs(len(first) - len(second)) > 1:
+        return False
+    if len(first) == len(second):
+        diffs = [i for i, (a, b) in enumerate(zip(first, second)) if a != b]
+        if len(diffs) <= 1:
+            return True
+        i, j = diffs[0], diffs[-1]
+        return (
+            len(diffs) == 2
+            and j == i + 1
+            and first[i] == second[j]
+            and first[j] == second[i]
+        )
+    shorter, longer = sorted((first, second), key=len)
+    for i in range(len(shorter)):
+        if shorter[i] != longer[i]:
+            return shorter[i:] == longer[i + 1 :]
+    return True
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and expand chat shorthand"""
+    text = (text or "").lower().replace("'", "").replace("’", "")
+    tokens = re.findall(r"[a-z0-9-]+", text)
+    return " ".join(SHORTHAND.get(token, token) for token in tokens)
+
+
+class NGramIntentModel:
+    """Multinomial naive Bayes over word uni/bigrams and character trigrams"""
+
+    def __init__(self):
+        # weighted counts, see SAMPLE_WEIGHTS
+        self.class_counts: Counter = Counter()
+        self.feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.feature_totals: Counter = Counter()
+        self.vocabulary = set()
+
+    @property
+    def size(self) -> int:
+        return sum(self.class_counts.values())
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        tokens = text.split()
+        features = list(tokens)
+        features += [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+        for token in tokens:
+            padded = f"#{token}#"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return features
+
+    def fit(self, samples: List[Tuple[str, str, float]]) -> "NGramIntentModel":
+        for text, intent, weight in samples:
+            self.class_counts[intent] += weight
+            for feature in self.features(text):
+                self.feature_counts[intent][feature] += weight
+                self.feature_totals[intent] += weight
+                self.vocabulary.add(feature)
+        return self
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Most likely intent and its probability; (None, 0.0) unless the
+        intent has enough support and clearly beats the runner-up"""
+        features = [f for f in self.features(text) if f in self.vocabulary]
+        if not features or not self.class_counts:
+            return None, 0.0
+
+        vocabulary_size = len(self.vocabulary)
+        scores = {}
+        for intent, count in self.class_counts.items():
+            score = math.log(count / self.size)
+            denominator = self.feature_totals[intent] + vocabulary_size
+            counts = self.feature_counts[intent]
+            for feature in features:
+                score += math.log((counts[feature] + 1) / denominator)
+            scores[intent] = score
+
+        # softmax over log scores
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        best = ranked[0]
+        top = scores[best]
+        total = sum(math.exp(score - top) for score in scores.values())
+        confidence = 1 / total
+        runner_up = (
+            math.exp(scores[ranked[1]] - top) / total if len(ranked) > 1 else 0.0
+        )
+
+        # naive Bayes is overconfident; only trust well-supported, clear wins
+        if self.class_counts[best] < MIN_CLASS_SUPPORT:
+            return None, 0.0
+        if confidence - runner_up < MIN_PREDICTION_MARGIN:
+            return None, 0.0
+        return best, confidence
+
+
+class IntentClassifier:
+    """
+    In-process intent classifier used before falling back to the LLM.
+    Keyword matching handles the fixed vocabulary; the n-gram model learns
+    everything else from logged keyword and LLM decisions.
+    """
+
+    def __init__(self):
+        self._phrases = {
+            phrase: intent
+            for intent, phrases in INTENT_KEYWORDS.items()
+            for phrase in phrases
+        }
+        self._model: Optional[NGramIntentModel] = None
+        self._trained_at = 0.0
+        self._training = False
+        self._lock = threading.Lock()
+
+    def classify(self, user_input: str) -> IntentPrediction:
+        text = normalize_text(user_input)
+        if not text:
+            return IntentPrediction("unknown", 0.0, "none")
+
+        keyword = self._match_keywords(text, is_question="?" in (user_input or ""))
+        if keyword:
+            return keyword
+
+        model = self._get_model()
+        if model:
+            intent, confidence = model.predict(text)
+            if intent:
+                return IntentPrediction(intent, round(confidence, 3), "model")
+
+        typo = self._match_typo(text)
+        if typo:
+            return typo
+
+        return IntentPrediction("unknown", 0.0, "none")
+
+    def _match_keywords(self, text: str, is_question: bool) -> Optional[IntentPrediction]:
+        if text in self._phrases:
+            return IntentPrediction(self._phrases[text], 1.0, "keyword")
+
+        core_tokens = [t for t in text.split() if t not in FILLER_WORDS]
+        core = " ".join(core_tokens)
+        if not core:
+            return None
+        if core in self._phrases:
+            return IntentPrediction(self._phrases[core], 0.95, "keyword")
+
+        # short commands made only of one intent's keywords: "next go",
+        # "quiz test"; any other word ("stop sign meaning") goes to the LLM
+        if len(core_tokens) <= 3 and not is_question:
+            if all(t in self._phrases for t in core_tokens):
+                intents = {self._phrases[t] for t in core_tokens}
+                if len(intents) == 1:
+                    return IntentPrediction(intents.pop(), 0.8, "keyword")
+
+        return None
+
+    def _match_typo(self, text: str) -> Optional[IntentPrediction]:
+        """A single word one edit away from one intent's keyword: "contnue",
+        "previus". Below the routing threshold; "contest" is not "content"."""
+        core_tokens = [t for t in text.split() if t not in FILLER_WORDS]
+        if len(core_tokens) != 1:
+            return None
+        intents = {
+            intent
+            for phrase, intent in self._phrases.items()
+            if " " not in phrase
+            and len(phrase) >= TYPO_MIN_KEYWORD_LENGTH
+            and within_one_edit(core_tokens[0], phrase)
+        }
+        if len(intents) != 1:
+            return None
+        return IntentPrediction(intents.pop(), TYPO_CONFIDENCE, "keyword")
+
+    def _model_is_stale(self) -> bool:
+        return not self._trained_at or (
+            time.monotonic() - self._trained_at > RETRAIN_INTERVAL
+        )
+
+    def _get_model(self) -> Optional[NGramIntentModel]:
+        """Current model; a stale one keeps serving while a background thread
+        retrains, so no request waits on training"""
+        if self._model_is_stale():
+            with self._lock:
+                start = self._model_is_stale() and not self._training
+                if start:
+                    self._training = True
+            if start:
+                threading.Thread(
+                    target=self._retrain, name="intent-model-trainer", daemon=True
+                ).start()
+        return self._model
+
+    def _retrain(self) -> None:
+        from django.db import close_old_connections
+
+        try:
+            model = self.train()
+            with self._lock:
+                self._model = model
+                self._trained_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._training = False
+            close_old_connections()
+
+    @staticmethod
+    def load_training_samples(
+        limit: int = TRAINING_WINDOW,
+    ) -> List[Tuple[str, str, float]]:
+        """(text, intent, weight) for the most recent keyword and LLM decisions"""
+        from whatsapp.models import IntentDecisionLog
+
+        rows = (
+            IntentDecisionLog.objects.filter(source__in=list(SAMPLE_WEIGHTS))
+            .order_by("-created_at")
+            .values_list("text", "intent", "source")[:limit]
+        )
+        return [
+            (text, intent, SAMPLE_WEIGHTS[source])
+            for text, intent, source in rows
+            if intent in VALID_INTENTS
+        ]
+
+    @classmethod
+    def train(cls) -> Optional[NGramIntentModel]:
+        """Build the n-gram model from logged decisions, None if too few"""
+        try:
+            samples = cls.load_training_samples()
+        except Exception:
+            logger.exception("Could not load intent training samples")
+            return None
+        if len(samples) < MIN_TRAINING_SAMPLES:
+            return None
+        logger.info(f"Trained intent model on {len(samples)} logged decisions")
+        return NGramIntentModel().fit(samples)
+
+    @classmethod
+    def record(
+        cls,
+        user_input: str,
+        current_state: Optional[str],
+        intent: str,
+        source: str,
+        confidence: Optional[float] = None,
+    ) -> None:
+        """Log a decision; LLM and keyword decisions become training data.
+        Rows are buffered and written in batches off the request path."""
+        from django.utils import timezone
+        from whatsapp.models import IntentDecisionLog
+
+        decision_log.append(
+            IntentDecisionLog(
+                text=normalize_text(user_input)[:255],
+                conversation_state=current_state,
+                intent=intent,
+                source=source,
+                confidence=confidence,
+                created_at=timezone.now(),
+            )
+        )
+
+    @staticmethod
+    def prune(days: int) -> int:
+        """Delete decisions older than `days`; returns how many were deleted"""
+        from django.utils import timezone
+        from whatsapp.models import IntentDecisionLog
+
+        cutoff = timezone.now() - timezone.timedelta(days=days)
+        deleted, _ = IntentDecisionLog.objects.filter(created_at__lt=cutoff).delete()
+        return deleted
+
+
+def _decision_log_model():
+    from whatsapp.models import IntentDecisionLog
+
+    return IntentDecisionLog
+
+
+decision_log = BufferedWriter(
+    "intent-decisions",
+    get_model=_decision_log_model,
+    flush_size=lambda: settings.INTENT_LOG_FLUSH_SIZE,
+    flush_seconds=lambda: settings.INTENT_LOG_FLUSH_SECONDS,
+)
+
+
+intent_classifier = IntentClassifier()
+
+
+class IntentMetricsService:
+    @staticmethod
+    def get_metrics(days: int = 7) -> Dict:
+        """Decision counts per source and the LLM fallback rate, overall and per day"""
+        from django.db.models import Avg, Count
+        from django.db.models.functions import TruncDate
+        from django.utils import timezone
+        from whatsapp.models import IntentDecisionLog
+
+        try:
+            decision_log.flush()
+            since = timezone.now() - timezone.timedelta(days=days)
+            decisions = IntentDecisionLog.objects.filter(created_at__gte=since)
+
+            by_source = {
+                row["source"]: {
+                    "count": row["count"],
+                    "avgConfidence": row["avg_confidence"],
+                }
+                for row in decisions.values("source").annotate(
+                    count=Count("id"), avg_confidence=Avg("confidence")
+                )
+            }
+            total = sum(source["count"] for source in by_source.values())
+            fallbacks = sum(
+                by_source.get(source, {}).get("count", 0) for source in ("llm", "error")
+            )
+
+            daily: Dict[str, Counter] = defaultdict(Counter)
+            for row in (
+                decisions.annotate(day=TruncDate("created_at"))
+                .values("day", "source")
+                .annotate(count=Count("id"))
+            ):
+                daily[str(row["day"])][row["source"]] += row["count"]
+
+            return {
+                "success": True,
+                "data": {
+                    "days": days,
+                    "totalDecisions": total,
+                    "llmFallbacks": fallbacks,
+                    "llmFallbackRate": fallbacks / total if total else 0.0,
+                    "bySource": by_source,
+                    "daily": [
+                        {
+                            "date": day,
+                            "total": sum(counts.values()),
+                            "llmFallbackRate": (counts["llm"] + counts["error"])
+                            / sum(counts.values()),
+                        }
+                        for day, counts in sorted(daily.items())
+                    ],
+                },
+            }
+        except Exception as e:
+            logger.exception("Error computing intent metrics")
+            return {"success": False, "data": None, "error": str(e)}
@@ -0,0 +1,162 @@
+import logging
+import math
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from courses.services.mcq_matcher import McqAnswerMatcher, normalize_answer
+from whatsapp.models import QuestionItemStats
+
+logger = logging.getLogger(__name__)
+
+# Wrong answers tracked per question, and how many the API reports
+WRONG_ANSWER_SLOTS = 20
+TOP_WRONG_ANSWERS = 5
+ANSWER_MAX_CHARS = 100
+
+
+def answer_key(question, user_input: str) -> str:
+    """MCQ replies count under the chosen option's text, so "2", "b" and
+    the option itself are one answer; open answers are normalized"""
+    if question.type == "mcq":
+        index = McqAnswerMatcher.match(question, user_input)
+        if index is not None:
+            return question.options[index]["text"][:ANSWER_MAX_CHARS]
+    return normalize_answer(user_input)[:ANSWER_MAX_CHARS]
+
+
+def count_answer(counts: Dict[str, int], answer: str) -> Dict[str, int]:
+    """
+    Space-saving top-k count: a new answer arriving when every slot is taken
+    replaces the least frequent one and inherits its count, so frequent
+    answers are never evicted and counts are over-estimated by at most the
+    evicted count.
+    """
+    counts = dict(counts)
+    if answer in counts:
+        counts[answer] += 1
+    elif len(counts) < WRONG_ANSWER_SLOTS:
+        counts[answer] = 1
+    else:
+        evicted = min(counts, key=counts.get)
+        counts[answer] = counts.pop(evicted) + 1
+    return counts
+
+
+class ItemAnalyticsService:
+    """
+    Per-question difficulty, mean score, discrimination and frequent wrong
+    answers, maintained in QuestionItemStats as responses come in.
+    """
+
+    @staticmethod
+    def record_response(
+        question, is_correct: Optional[bool], score: float, user_input: str
+    ) -> None:
+        """Count one graded response; pending (ungraded) responses are
+        counted when grade_pending_responses grades them"""
+        if is_correct is None:
+            return
+        try:
+            with transaction.atomic():
+                stats, _ = QuestionItemStats.objects.select_for_update().get_or_create(
+                    question_id=question.question_id,
+                    defaults={"assessment_id": question.assessment_id},
+                )
+                stats.attempts += 1
+                stats.score_sum += score or 0
+                if is_correct:
+                    stats.correct_count += 1
+                else:
+                    stats.wrong_answers = count_answer(
+                        stats.wrong_answers, answer_key(question, user_input or "")
+                    )
+                stats.save()
+        except Exception:
+            logger.exception(f"Failed to record item stats for {question.question_id}")
+
+    @staticmethod
+    def record_attempt(attempt) -> None:
+        """Add a completed attempt's percentage to the discrimination sums of
+        each question it answered (one UPDATE per outcome)"""
+        try:
+            total = attempt.percentage
+            outcomes = {True: [], False: []}
+            for question_id, is_correct in attempt.responses.filter(
+                is_correct__isnull=False
+            ).values_list("question_id", "is_correct"):
+                outcomes[is_correct].append(question_id)
+
+            for is_correct, question_ids in outcomes.items():
+                if not question_ids:
+                    continue
+                QuestionItemStats.objects.filter(question_id__in=question_ids).update(
+                    completed_attempts=F("completed_attempts") + 1,
+                    completed_correct=F("completed_correct") + int(is_correct),
+                    total_sum=F("total_sum") + total,
+                    total_sq_sum=F("total_sq_sum") + total * total,
+                    correct_total_sum=F("correct_total_sum") + (total if is_correct else 0),
+                )
+        except Exception:
+            logger.exception(f"Failed to record item stats for attempt {attempt.id}")
+
+    @staticmethod
+    def discrimination(stats) -> Optional[float]:
+        """Point-biserial correlation between answering the item correctly
+        and the attempt percentage; None until it is defined"""
+        n = stats.completed_attempts
+        correct = stats.completed_correct
+        item_var = n * correct - correct * correct
+        total_var = n * stats.total_sq_sum - stats.total_sum ** 2
+        if n < 2 or item_var <= 0 or total_var <= 0:
+            return None
+        covariance = n * stats.correct_total_sum - correct * stats.total_sum
+        return covariance / math.sqrt(item_var * total_var)
+
+    @classmethod
+    def to_dict(cls, stats) -> Dict:
+        question = stats.question
+        discrimination = cls.discrimination(stats)
+        wrong = sorted(stats.wrong_answers.items(), key=lambda item: -item[1])
+        return {
+            "questionId": stats.question_id,
+            "order": question.order,
+            "type": question.type,
+            "questionText": question.question_text,
+            "marks": question.marks,
+            "attempts": stats.attempts,
+            "correctCount": stats.correct_count,
+            "difficulty": (
+                stats.correct_count / stats.attempts if stats.attempts else None
+            ),
+            "meanScore": stats.score_sum / stats.attempts if stats.attempts else None,
+            "discrimination": (
+                round(discrimination, 3) if discrimination is not None else None
+            ),
+            "completedAttempts": stats.completed_attempts,
+            "topWrongAnswers": [
+                {"answer": answer, "count": count}
+                for answer, count in wrong[:TOP_WRONG_ANSWERS]
+            ],
+        }
+
+    @classmethod
+    def get_assessment_stats(cls, assessment_id) -> Dict:
+        """Item statistics of every answered question of an assessment"""
+        try:
+            rows = (
+                QuestionItemStats.objects.filter(assessment_id=assessment_id)
+                .select_related("question")
+                .order_by("question__order")
+            )
+            return {
+                "success": True,
+                "data": {
+                    "assessmentId": assessment_id,
+                    "questions": [cls.to_dict(stats) for stats in rows],
+                },
+            }
+        except Exception as e:
+            logger.exception("Error retrieving item statistics")
+            return {"success": False, "data": None, "error": str(e)}
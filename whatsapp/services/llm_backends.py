@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import random
+import re
+from difflib import SequenceMatcher
+from itertools import cycle
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from courses.services.retrieval import estimate_tokens
+from whatsapp.services.intent_classifier import intent_classifier
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend:
+    """
+    Where chat completions come from. `complete` is awaited on the LLM
+    runtime's event loop and returns an object shaped like an OpenAI chat
+    completion (choices[0].message.content, usage.prompt_tokens, ...).
+    """
+
+    name = "base"
+
+    async def complete(self, call_site: str, **kwargs):
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        Async OpenAI client, created on first use so importing this module (and
+        every service holding an interpreter) does not pay for the openai/httpx
+        import. Only used on the runtime's event loop.
+        """
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(api_key=self.api_key, max_retries=1)
+        return self._client
+
+    async def complete(self, call_site: str, **kwargs):
+        return await self.client.chat.completions.create(**kwargs)
+
+
+class ScriptedLLMError(RuntimeError):
+    """Failure injected by ScriptedBackend"""
+
+
+class ScriptedBackend(LLMBackend):
+    """
+    Offline stand-in for load tests, benchmarks and CI. Replies come from a
+    script ({call_site: reply or [replies]}) when one is given, otherwise from
+    simple rules per call site that return the JSON each caller expects.
+    Latency and failures are injected from the configured rates; a "timeout"
+    sleeps past any deadline.
+    """
+
+    name = "scripted"
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        failure_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        seed: Optional[int] = None,
+        script: Optional[Dict] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self._random = random.Random(seed)
+        self._script = {
+            call_site: cycle(replies if isinstance(replies, list) else [replies])
+            for call_site, replies in (script or {}).items()
+        }
+
+    async def complete(self, call_site: str, **kwargs):
+        roll = self._random.random()
+        delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+
+        if roll < self.timeout_rate:
+            await asyncio.sleep(3600)  # cancelled by the runtime's deadline
+        if roll < self.timeout_rate + self.failure_rate:
+            raise ScriptedLLMError(f"injected failure at {call_site}")
+
+        messages = kwargs.get("messages", [])
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+        if call_site in self._script:
+            content = next(self._script[call_site])
+            if not isinstance(content, str):
+                content = json.dumps(content)
+        else:
+            content = self._rule_reply(call_site, system, user)
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(system + user),
+                completion_tokens=estimate_tokens(content),
+            ),
+        )
+
+    @staticmethod
+    def _field(text: str, label: str) -> str:
+        match = re.search(rf"{label}:\s*(.*)", text)
+        return match.group(1).strip() if match else ""
+
+    @staticmethod
+    def _grade(answer: str, reference: str) -> Dict:
+        score = round(SequenceMatcher(None, answer.lower(), reference.lower()).ratio(), 2)
+        return {
+            "is_correct": score >= 0.7,
+            "score": score,
+            "confidence": score,
+            "explanation": "Scripted grade from text similarity.",
+            "suggested_feedback": "",
+        }
+
+    def _rule_reply(self, call_site: str, system: str, user: str) -> str:
+        if call_site == "intent":
+            return intent_classifier.classify(user).intent
+
+        if call_site == "extract":
+            answer = self._field(user, "User Response") or None
+            return json.dumps({"answer": answer, "message_to_user": ""})
+
+        if call_site == "decision":
+            steps = json.loads(self._field(user, "Possible Next Steps") or "[]")
+            return json.dumps(
+                {"next_step": steps[0] if steps else None, "message_to_user": ""}
+            )
+
+        if call_site == "grading":
+            reference = self._field(system, "Reference Answer") or self._field(
+                system, "Correct answer"
+            )
+            answer = self._field(user, "Student's answer") or self._field(
+                user, "User response"
+            )
+            return json.dumps(self._grade(answer, reference))
+
+        if call_site == "grading_batch":
+            return json.dumps(
+                {
+                    "results": [
+                        {
+                            "id": item["id"],
+                            **self._grade(item["student_answer"], item["reference_answer"]),
+                        }
+                        for item in json.loads(user)
+                    ]
+                }
+            )
+
+        if call_site == "summary":
+            previous = self._field(user, "Existing summary")
+            asked = "; ".join(re.findall(r"Student: (.*)", user))
+            if previous and previous != "(none)":
+                return f"{previous}; {asked}"
+            return f"The student asked about: {asked}"
+
+        question = self._field(user, "The student asked") or user.strip()[-200:]
+        return f"(Scripted tutor answer) {question[:200]}"
+
+
+def get_llm_backend(api_key: str) -> LLMBackend:
+    """The backend named by settings.LLM_BACKEND"""
+    if settings.LLM_BACKEND == "scripted":
+        script = None
+        if settings.LLM_SCRIPT_PATH:
+            with open(settings.LLM_SCRIPT_PATH) as script_file:
+                script = json.load(script_file)
+        return ScriptedBackend(
+            latency_ms=settings.LLM_SCRIPTED_LATENCY_MS,
+            jitter_ms=settings.LLM_SCRIPTED_JITTER_MS,
+            failure_rate=settings.LLM_SCRIPTED_FAILURE_RATE,
+            timeout_rate=settings.LLM_SCRIPTED_TIMEOUT_RATE,
+            seed=settings.LLM_SCRIPTED_SEED,
+            script=script,
+        )
+    if settings.LLM_BACKEND != "openai":
+        raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND}")
+    return OpenAIBackend(api_key=api_key)
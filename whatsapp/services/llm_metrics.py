@@ -0,0 +1,171 @@
+import logging
+from collections import defaultdict
+from typing import Dict
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
+
+from whatsapp.services.buffered_writer import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+
+def _call_log_model():
+    from whatsapp.models import LLMCallLog
+
+    return LLMCallLog
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost from LLM_PRICING; unknown models cost 0"""
+    prompt_price, completion_price = settings.LLM_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class LLMUsageService:
+    """
+    Records every LLM completion (call site, model, latency, tokens, outcome)
+    and every answer served from a cache instead of the LLM. Rows are
+    buffered per process and written with bulk_create by a background thread
+    so recording stays off the request's critical path.
+    """
+
+    _writer = BufferedWriter(
+        "llm-metrics",
+        get_model=_call_log_model,
+        flush_size=lambda: settings.LLM_METRICS_FLUSH_SIZE,
+        flush_seconds=lambda: settings.LLM_METRICS_FLUSH_SECONDS,
+    )
+
+    @classmethod
+    def record(
+        cls,
+        call_site: str,
+        model: str,
+        outcome: str,
+        latency_ms: float = 0,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        from whatsapp.models import LLMCallLog
+
+        entry = LLMCallLog(
+            call_site=call_site,
+            model=model or "",
+            outcome=outcome,
+            latency_ms=int(latency_ms),
+            prompt_tokens=prompt_tokens or 0,
+            completion_tokens=completion_tokens or 0,
+            created_at=timezone.now(),
+        )
+        cls._writer.append(entry)
+
+    @classmethod
+    def record_completion(cls, call_site: str, model: str, latency_ms: float, response) -> None:
+        usage = getattr(response, "usage", None)
+        cls.record(
+            call_site,
+            model,
+            "ok",
+            latency_ms,
+            getattr(usage, "prompt_tokens", 0),
+            getattr(usage, "completion_tokens", 0),
+        )
+
+    @classmethod
+    def record_cache_hit(cls, call_site: str) -> None:
+        cls.record(call_site, "", "cache_hit")
+
+    @classmethod
+    def flush(cls) -> None:
+        cls._writer.flush()
+
+    @classmethod
+    def get_usage(cls, days: int = 7) -> Dict:
+        """Calls, cache hits, latency, tokens and estimated cost per call site and model"""
+        from whatsapp.models import LLMCallLog
+
+        try:
+            cls.flush()
+            since = timezone.now() - timezone.timedelta(days=days)
+            rows = (
+                LLMCallLog.objects.filter(created_at__gte=since)
+                .values("call_site", "model")
+                .annotate(
+                    calls=Count("id", filter=~Q(outcome="cache_hit")),
+                    failures=Count("id", filter=Q(outcome__in=["timeout", "error"])),
+                    cache_hits=Count("id", filter=Q(outcome="cache_hit")),
+                    avg_latency=Avg("latency_ms", filter=~Q(outcome="cache_hit")),
+                    max_latency=Max("latency_ms"),
+                    prompt_tokens=Sum("prompt_tokens"),
+                    completion_tokens=Sum("completion_tokens"),
+                )
+            )
+
+            by_site = defaultdict(
+                lambda: {
+                    "calls": 0,
+                    "failures": 0,
+                    "cacheHits": 0,
+                    "totalLatencyMs": 0.0,
+                    "maxLatencyMs": 0,
+                    "promptTokens": 0,
+                    "completionTokens": 0,
+                    "costUsd": 0.0,
+                    "models": {},
+                }
+            )
+            for row in rows:
+                site = by_site[row["call_site"]]
+                cost = estimate_cost(
+                    row["model"], row["prompt_tokens"] or 0, row["completion_tokens"] or 0
+                )
+                site["calls"] += row["calls"]
+                site["failures"] += row["failures"]
+                site["cacheHits"] += row["cache_hits"]
+                site["totalLatencyMs"] += (row["avg_latency"] or 0) * row["calls"]
+                site["maxLatencyMs"] = max(site["maxLatencyMs"], row["max_latency"] or 0)
+                site["promptTokens"] += row["prompt_tokens"] or 0
+                site["completionTokens"] += row["completion_tokens"] or 0
+                site["costUsd"] += cost
+                if row["model"]:
+                    site["models"][row["model"]] = {"calls": row["calls"], "costUsd": round(cost, 4)}
+
+            call_sites = []
+            for name, site in by_site.items():
+                lookups = site["calls"] + site["cacheHits"]
+                call_sites.append(
+                    {
+                        "callSite": name,
+                        "calls": site["calls"],
+                        "failures": site["failures"],
+                        "cacheHits": site["cacheHits"],
+                        "cacheHitRate": site["cacheHits"] / lookups if lookups else 0.0,
+                        "avgLatencyMs": (
+                            round(site["totalLatencyMs"] / site["calls"])
+                            if site["calls"]
+                            else 0
+                        ),
+                        "maxLatencyMs": site["maxLatencyMs"],
+                        "totalLatencyMs": round(site["totalLatencyMs"]),
+                        "promptTokens": site["promptTokens"],
+                        "completionTokens": site["completionTokens"],
+                        "costUsd": round(site["costUsd"], 4),
+                        "models": site["models"],
+                    }
+                )
+            call_sites.sort(key=lambda site: site["costUsd"], reverse=True)
+
+            return {
+                "success": True,
+                "data": {
+                    "days": days,
+                    "totalCalls": sum(site["calls"] for site in call_sites),
+                    "totalCostUsd": round(sum(site["costUsd"] for site in call_sites), 4),
+                    "callSites": call_sites,
+                },
+            }
+        except Exception as e:
+            logger.exception("Error computing LLM usage")
+            return {"success": False, "data": None, "error": str(e)}
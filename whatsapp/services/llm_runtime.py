@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """An LLM call did not finish before its deadline"""
+
+
+class LLMRuntime:
+    """
+    One event loop thread per process that runs every LLM call. Synchronous
+    callers block for at most the call's deadline, and a semaphore bounds how
+    many calls are in flight at once; waiting for a slot counts against the
+    deadline too.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="llm-runtime", daemon=True
+                ).start()
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+            return self._loop
+
+    def run(self, call: Callable[[], Awaitable], deadline: float, label: str = "llm"):
+        """Run `call()` on the LLM loop; raise LLMDeadlineExceeded after `deadline` seconds"""
+        loop = self._get_loop()
+
+        async def limited():
+            async with self._semaphore:
+                return await call()
+
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(limited(), deadline), loop
+        )
+        try:
+            # the loop enforces the deadline; the extra second only guards
+            # against a wedged loop
+            return future.result(timeout=deadline + 1)
+        except TimeoutError:
+            future.cancel()
+            logger.warning(f"LLM call '{label}' exceeded its {deadline}s deadline")
+            raise LLMDeadlineExceeded(f"{label} exceeded {deadline}s")
@@ -1,79 +1,164 @@
 from django.utils import timezone
 from django.db.models import Max
 from courses.models import Module, Topic
-from whatsapp.models import (
-    TopicDeliveryProgress,
-    UserEnrollment,
-    ModuleDeliveryProgress,
-)
+from courses.services.topics import TopicService
+from whatsapp.models import UserEnrollment
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class ModuleProgress:
+    """
+    Progress of one module, read from and written to the enrollment cursor.
+    Exposes the fields callers used on the old ModuleDeliveryProgress rows
+    (`module`, `current_topic`, `state`, `last_updated`, `save()`).
+    """
+
+    def __init__(self, enrollment: UserEnrollment, module: Module):
+        self.enrollment = enrollment
+        self.module = module
+        self.state = enrollment.module_states.get(str(module.module_id), "not_started")
+        cursor_topic = enrollment.cursor_topic
+        self.current_topic = (
+            cursor_topic
+            if cursor_topic and cursor_topic.module_id == module.module_id
+            else None
+        )
+        self.last_updated = enrollment.last_accessed
+
+    def save(self):
+        enrollment = self.enrollment
+        enrollment.module_states[str(self.module.module_id)] = self.state
+
+        if self.current_topic is not None:
+            if enrollment.cursor_topic_id != self.current_topic.topic_id:
+                enrollment.cursor_topic = self.current_topic
+                enrollment.cursor_paragraph = None
+                enrollment.cursor_topic_state = (
+                    "content_delivered"
+                    if enrollment.has_completed_topic(self.current_topic)
+                    else "not_started"
+                )
+        elif (
+            enrollment.cursor_topic
+            and enrollment.cursor_topic.module_id == self.module.module_id
+        ):
+            enrollment.cursor_topic = None
+            enrollment.cursor_paragraph = None
+            enrollment.cursor_topic_state = "not_started"
+
+        enrollment.save(
+            update_fields=[
+                "module_states",
+                "cursor_topic",
+                "cursor_paragraph",
+                "cursor_topic_state",
+                "last_accessed",
+            ]
+        )
+
+    def __str__(self):
+        return f"{self.enrollment.user} - {self.module} ({self.state})"
+
+
+class TopicProgress:
+    """
+    Progress of one topic. The cursor topic carries its own state and
+    paragraph; any other topic is either delivered (bit set) or not started.
+    Saving a topic's progress moves the cursor onto it.
+    """
+
+    def __init__(self, enrollment: UserEnrollment, topic: Topic):
+        self.enrollment = enrollment
+        self.topic = topic
+        if enrollment.cursor_topic_id == topic.topic_id:
+            self.state = enrollment.cursor_topic_state
+            self.current_paragraph = enrollment.cursor_paragraph
+        else:
+            self.state = (
+                "content_delivered"
+                if enrollment.has_completed_topic(topic)
+                else "not_started"
+            )
+            self.current_paragraph = None
+        self.last_updated = enrollment.last_accessed
+
+    def save(self):
+        enrollment = self.enrollment
+        enrollment.cursor_topic = self.topic
+        enrollment.cursor_paragraph = self.current_paragraph
+        enrollment.cursor_topic_state = self.state
+        enrollment.set_topic_completed(
+            self.topic, self.state == "content_delivered"
+        )
+        enrollment.save(
+            update_fields=[
+                "cursor_topic",
+                "cursor_paragraph",
+                "cursor_topic_state",
+                "completed_topics",
+                "last_accessed",
+            ]
+        )
+
+    def __str__(self):
+        return f"{self.enrollment.user} - {self.topic} ({self.state})"
+
+
 class ModuleDeliveryProgressService:
     @staticmethod
     def get_or_create_progress(
         enrollment: UserEnrollment, module: Module
-    ) -> ModuleDeliveryProgress:
+    ) -> ModuleProgress:
         """
-        Ensure there is a ModuleDeliveryProgress entry for this enrollment & module.
+        Ensure the enrollment tracks a state for this module.
         """
-        progress, created = ModuleDeliveryProgress.objects.get_or_create(
-            enrollment=enrollment, module=module
-        )
-        if created:
+        progress = ModuleProgress(enrollment, module)
+        if str(module.module_id) not in enrollment.module_states:
+            progress.save()
             logger.info(f"Created new progress entry for {enrollment.user} - {module}")
         return progress
 
     @staticmethod
     def get_or_create_topic_progress(
         enrollment: UserEnrollment, topic: Topic
-    ) -> TopicDeliveryProgress:
+    ) -> TopicProgress:
         """
-        Ensure there is a ModuleDeliveryProgress entry for this enrollment & module.
+        Progress for this enrollment & topic. Nothing is stored until it is saved.
         """
-        progress, created = TopicDeliveryProgress.objects.get_or_create(
-            enrollment=enrollment, topic=topic
-        )
-        if created:
-            logger.info(
-                f"Created new progress entry for {enrollment.user} - {topic.title}"
-            )
-        return progress
+        return TopicProgress(enrollment, topic)
 
     @staticmethod
     def get_progress(
         enrollment: UserEnrollment, module: Module
-    ) -> ModuleDeliveryProgress | None:
+    ) -> ModuleProgress | None:
         """
-        Return the existing ModuleDeliveryProgress entry for this enrollment & module.
+        Return the progress for this enrollment & module if any was recorded.
         Does not create a new one.
         """
-        try:
-            return ModuleDeliveryProgress.objects.get(
-                enrollment=enrollment, module=module
-            )
-        except ModuleDeliveryProgress.DoesNotExist:
+        if str(module.module_id) not in enrollment.module_states:
             return None
+        return ModuleProgress(enrollment, module)
 
     @staticmethod
     def get_topic_progress(
         enrollment: UserEnrollment, topic: Topic
-    ) -> TopicDeliveryProgress | None:
+    ) -> TopicProgress | None:
         """
-        Return the existing ModuleDeliveryProgress entry for this enrollment & module.
-        Does not create a new one.
+        Return the progress for this enrollment & topic if the topic is under
+        the cursor or already delivered. Does not create a new one.
         """
-        try:
-            return TopicDeliveryProgress.objects.get(enrollment=enrollment, topic=topic)
-        except TopicDeliveryProgress.DoesNotExist:
-            return None
+        if enrollment.cursor_topic_id == topic.topic_id or (
+            enrollment.has_completed_topic(topic)
+        ):
+            return TopicProgress(enrollment, topic)
+        return None
 
     @staticmethod
     def deliver_next_topic(
         enrollment: UserEnrollment, module: Module
-    ) -> ModuleDeliveryProgress:
+    ) -> ModuleProgress:
         """
         Deliver the next topic in the module for the given enrollment.
         Updates current_topic and state.
@@ -144,6 +229,10 @@ class ModuleDeliveryProgressService:
             # Start with the first topic
             next_para = paragraphs.first()
 
+        if next_para and enrollment.course.delivery_mode == "chunked":
+            # progress points at the last paragraph of the chunk being sent
+            next_para = TopicService.get_paragraph_chunk(topic, next_para)[-1]
+
         if next_para:
             progress.current_paragraph = next_para
             progress.state = "content_delivering"  # still delivering content
@@ -167,7 +256,7 @@ class ModuleDeliveryProgressService:
     @staticmethod
     def update_state(
         enrollment: UserEnrollment, module: Module, new_state: str
-    ) -> ModuleDeliveryProgress:
+    ) -> ModuleProgress:
         """
         Update the state of module delivery progress for a given enrollment & module.
         """
@@ -186,12 +275,32 @@ class ModuleDeliveryProgressService:
 
     @staticmethod
     def get_modules_by_state(enrollment: UserEnrollment, state: str):
-        return ModuleDeliveryProgress.objects.filter(enrollment=enrollment, state=state)
+        module_ids = [
+            module_id
+            for module_id, module_state in enrollment.module_states.items()
+            if module_state == state
+        ]
+        return [
+            ModuleProgress(enrollment, module)
+            for module in Module.objects.filter(module_id__in=module_ids)
+        ]
 
     @staticmethod
     def reset_progress(enrollment: UserEnrollment):
-        ModuleDeliveryProgress.objects.filter(enrollment=enrollment).update(
-            state="not_started", current_topic=None, last_updated=timezone.now()
+        enrollment.module_states = {
+            module_id: "not_started" for module_id in enrollment.module_states
+        }
+        enrollment.cursor_topic = None
+        enrollment.cursor_paragraph = None
+        enrollment.cursor_topic_state = "not_started"
+        enrollment.save(
+            update_fields=[
+                "module_states",
+                "cursor_topic",
+                "cursor_paragraph",
+                "cursor_topic_state",
+                "last_accessed",
+            ]
         )
         logger.info(f"Reset module progress for user {enrollment.user}")
 
@@ -8,6 +8,11 @@ from django.utils import timezone
 
 from whatsapp.services.ai_reponse_interpreter import AIResponseInterpreter
 from whatsapp.services.emailing_service import EmailService
+from whatsapp.services.onboarding_validators import (
+    extract_email,
+    extract_otp,
+    normalize_full_name,
+)
 from .messaging import WhatsAppService
 from .orientation_manager import OrientationManager
 
@@ -17,9 +22,18 @@ logger = logging.getLogger(__name__)
 class OnboardingManager:
     """Manages the user onboarding process"""
 
+    # The validator parses well-formed replies; the LLM only sees the rest
     ONBOARDING_QUESTIONS = [
-        {"question": "What is your full name?", "property": "full_name"},
-        {"question": "What is your email address?", "property": "email"},
+        {
+            "question": "What is your full name?",
+            "property": "full_name",
+            "validator": normalize_full_name,
+        },
+        {
+            "question": "What is your email address?",
+            "property": "email",
+            "validator": extract_email,
+        },
     ]
 
     interpreter = AIResponseInterpreter(api_key=os.getenv("OPENAI_API_KEY"))
@@ -83,12 +97,17 @@ class OnboardingManager:
                 return cls._complete_onboarding(phone_number_id, user_waid)
 
             question = cls.ONBOARDING_QUESTIONS[current_step]["question"]
+            validator = cls.ONBOARDING_QUESTIONS[current_step]["validator"]
 
-            result = cls.interpreter.extract_answer(
-                question=question,
-                response=user_response.strip(),
-                environment_context="User is answering onboarding questions. Validate the response.",
-            )
+            answer = validator(user_response.strip())
+            if answer:
+                result = {"answer": answer, "message_to_user": ""}
+            else:
+                result = cls.interpreter.extract_answer(
+                    question=question,
+                    response=user_response.strip(),
+                    environment_context="User is answering onboarding questions. Validate the response.",
+                )
 
             if result["answer"]:
                 property_name = cls.ONBOARDING_QUESTIONS[current_step]["property"]
@@ -172,10 +191,11 @@ class OnboardingManager:
                 "Please provide your new email address:",
             )
 
-        # Normal OTP entry
+        # Normal OTP entry ("123 456" and "code: 123456" count too)
+        code = extract_otp(response) or response
         if (
             user.otp_code
-            and response == user.otp_code
+            and code == user.otp_code
             and user.otp_expires_at > timezone.now()
         ):
             user.email_verified = True
@@ -0,0 +1,58 @@
+import re
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+
+NAME_PREFIXES = re.compile(
+    r"^(?:my (?:full )?name is|my names are|name\s*:|i am|i'm|im|it's|its|this is|call me)\s+",
+    re.IGNORECASE,
+)
+NAME_TOKEN = re.compile(r"^[^\W\d_]+(?:['’.-][^\W\d_]*)*$")
+
+# Replies that look like words but not like a name; these go to the LLM
+NOT_NAME_WORDS = {
+    "a", "am", "and", "are", "dont", "don't", "hello", "help", "hey", "hi",
+    "how", "i", "is", "know", "my", "name", "no", "not", "ok", "okay",
+    "please", "skip", "sure", "the", "what", "why", "yes", "you",
+}
+
+
+def extract_email(response: str) -> Optional[str]:
+    """The single email address in the reply, with its domain lowercased"""
+    matches = {match.rstrip(".") for match in EMAIL_PATTERN.findall(response or "")}
+    if len(matches) != 1:
+        return None
+    local, _, domain = matches.pop().rpartition("@")
+    email = f"{local}@{domain.lower()}"
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def normalize_full_name(response: str) -> Optional[str]:
+    """
+    "my name is jane  doe" -> "Jane Doe". Needs two to five name-like words;
+    casing is only changed when the reply is all lower or all upper case.
+    """
+    text = " ".join((response or "").split()).strip(" .!")
+    text = NAME_PREFIXES.sub("", text)
+    tokens = text.split(" ")
+    if not 2 <= len(tokens) <= 5:
+        return None
+    for token in tokens:
+        if not NAME_TOKEN.match(token) or token.lower() in NOT_NAME_WORDS:
+            return None
+    if text.islower() or text.isupper():
+        text = " ".join(token.title() for token in tokens)
+    return text
+
+
+def extract_otp(response: str, length: int = 6) -> Optional[str]:
+    """The code in replies like "123 456" or "my code is 123456" """
+    digits = re.sub(r"\D", "", response or "")
+    return digits if len(digits) == length else None
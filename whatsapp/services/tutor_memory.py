@@ -0,0 +1,103 @@
+import logging
+import re
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from courses.services.retrieval import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Short questions with one of these words lean on the previous turn
+FOLLOW_UP_WORDS = {
+    "above", "again", "another", "example", "further", "it", "more",
+    "previous", "same", "that", "these", "they", "this", "those", "why",
+}
+
+
+def is_follow_up(question: str) -> bool:
+    words = re.findall(r"[a-z']+", (question or "").lower())
+    return 0 < len(words) <= 8 and any(word in FOLLOW_UP_WORDS for word in words)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4  # same ratio as estimate_tokens
+    return text if len(text) <= max_chars else text[: max_chars - 3].rstrip() + "..."
+
+
+class TutorMemoryService:
+    """
+    Bounded tutor conversation memory on UserEnrollment.tutor_memory: recent
+    exchanges verbatim (answers truncated) and a summary of everything older.
+    Turns accumulate up to twice TUTOR_MEMORY_MAX_TURNS, then all but the
+    last TUTOR_MEMORY_MAX_TURNS are folded into the summary in one LLM call,
+    so summarizing happens once every TUTOR_MEMORY_MAX_TURNS questions rather
+    than on each one. The rendered memory never exceeds
+    TUTOR_MEMORY_TOKEN_BUDGET however long the learner has been chatting.
+    """
+
+    @staticmethod
+    def _memory(enrollment) -> Dict:
+        memory = enrollment.tutor_memory or {}
+        return {
+            "summary": memory.get("summary", ""),
+            "turns": list(memory.get("turns", [])),
+            "folded": memory.get("folded", 0),
+        }
+
+    @classmethod
+    def render(cls, enrollment) -> str:
+        """Summary and recent turns for the tutor prompt, newest turns kept first"""
+        memory = cls._memory(enrollment)
+        budget = settings.TUTOR_MEMORY_TOKEN_BUDGET
+
+        summary = ""
+        if memory["summary"]:
+            summary = "Summary of earlier conversation: " + truncate_to_tokens(
+                memory["summary"], settings.TUTOR_MEMORY_SUMMARY_TOKENS
+            )
+            budget -= estimate_tokens(summary)
+
+        recent = []
+        for turn in reversed(memory["turns"]):
+            line = f"Student: {turn['q']}\nTutor: {turn['a']}"
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            recent.insert(0, line)
+            budget -= cost
+
+        return "\n".join(part for part in [summary, *recent] if part)
+
+    @classmethod
+    def last_question(cls, enrollment) -> Optional[str]:
+        turns = cls._memory(enrollment)["turns"]
+        return turns[-1]["q"] if turns else None
+
+    @classmethod
+    def remember(cls, enrollment, question: str, answer: str, interpreter) -> None:
+        """Append a turn; once the window has doubled, fold its older half
+        into the summary"""
+        memory = cls._memory(enrollment)
+        memory["turns"].append(
+            {"q": question[:300], "a": answer[: settings.TUTOR_MEMORY_ANSWER_CHARS]}
+        )
+
+        window = settings.TUTOR_MEMORY_MAX_TURNS
+        if len(memory["turns"]) > 2 * window:
+            overflow = len(memory["turns"]) - window
+            folded, memory["turns"] = memory["turns"][:overflow], memory["turns"][overflow:]
+            summary = interpreter.summarize_conversation(
+                memory["summary"], folded, settings.TUTOR_MEMORY_SUMMARY_TOKENS
+            )
+            if summary is None:
+                # LLM unavailable: keep the questions so the topics survive
+                asked = "; ".join(turn["q"] for turn in folded)
+                summary = f"{memory['summary']} Also asked: {asked}".strip()
+            memory["summary"] = truncate_to_tokens(
+                summary, settings.TUTOR_MEMORY_SUMMARY_TOKENS
+            )
+            memory["folded"] += len(folded)
+
+        enrollment.tutor_memory = memory
+        enrollment.save(update_fields=["tutor_memory"])
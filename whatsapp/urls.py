@@ -2,6 +2,9 @@ from django.urls import path, include
 from .views import (
     AssessmentAttempts,
     AutomationRuleViewSet,
+    IntentMetricsView,
+    ItemAnalyticsView,
+    LLMUsageView,
     WhatsAppBroadcastView,
     WhatsAppWebhookView,
     WhatsAppUserView,
@@ -34,5 +37,12 @@ urlpatterns = [
         WhatsAppBroadcastView.as_view(),
         name="whatsapp-broadcast",
     ),
+    path("intent-metrics/", IntentMetricsView.as_view(), name="intent-metrics"),
+    path("llm-usage/", LLMUsageView.as_view(), name="llm-usage"),
+    path(
+        "item-analytics/<str:assessment_id>/",
+        ItemAnalyticsView.as_view(),
+        name="item-analytics",
+    ),
     path("", include(router.urls)),
 ]
@@ -23,6 +23,10 @@ from .services.user import WhatsappUserService
 from .services.messaging import WhatsAppService
 from .services.onboarding_manager import OnboardingManager
 from .services.orientation_manager import OrientationManager
+from .services.intent_classifier import IntentMetricsService
+from .services.item_analytics import ItemAnalyticsService
+from .services.llm_metrics import LLMUsageService
+from .services.ai_reponse_interpreter import AIResponseInterpreter
 from .models import AutomationRule, UserAssessmentAttempt, UserEnrollment, WhatsappUser
 
 import asyncio
@@ -436,6 +440,65 @@ class AssessmentAttempts(APIView):
             )
 
 
+@method_decorator(csrf_exempt, name="dispatch")
+class IntentMetricsView(APIView):
+    """Local intent classifier, decision cache and LLM fallback metrics"""
+
+    permission_classes = []
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            return Response(
+                {"success": False, "error": "days must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = IntentMetricsService.get_metrics(days=days)
+        if result["success"]:
+            result["data"]["cache"] = AIResponseInterpreter.decision_cache.stats()
+            return Response(result, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class LLMUsageView(APIView):
+    """LLM calls, cache hits, latency, tokens and estimated cost per call site"""
+
+    permission_classes = []
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            return Response(
+                {"success": False, "error": "days must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = LLMUsageService.get_usage(days=days)
+        if result["success"]:
+            return Response(result, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ItemAnalyticsView(APIView):
+    """Per-question difficulty, discrimination and common wrong answers"""
+
+    permission_classes = []
+    authentication_classes = []
+
+    def get(self, request, assessment_id):
+        result = ItemAnalyticsService.get_assessment_stats(assessment_id)
+        if result["success"]:
+            return Response(result, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class WhatsAppBroadcastView(APIView):
     permission_classes = []
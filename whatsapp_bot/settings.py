@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -106,6 +107,19 @@ DATABASES = {
     }
 }
 
+# Optional cache shared by all workers, e.g. redis://host:6379/0 (needs the
+# redis package). Without it every process keeps its own caches.
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL")
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+if SHARED_CACHE_URL:
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": SHARED_CACHE_URL,
+    }
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://localhost:4173",
@@ -181,6 +195,83 @@ WHATSAPP_WEBHOOK_URL = os.getenv(
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# LLM calls in flight per process, and the seconds each call site may take
+# before it falls back (keyword intent, canned tutor reply, ...)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_DEADLINES = {
+    "intent": float(os.getenv("LLM_DEADLINE_INTENT", "3")),
+    "tutor": float(os.getenv("LLM_DEADLINE_TUTOR", "20")),
+    "extract": float(os.getenv("LLM_DEADLINE_EXTRACT", "8")),
+    "grading": float(os.getenv("LLM_DEADLINE_GRADING", "10")),
+    "grading_batch": float(os.getenv("LLM_DEADLINE_GRADING_BATCH", "30")),
+    "summary": float(os.getenv("LLM_DEADLINE_SUMMARY", "10")),
+    "default": float(os.getenv("LLM_DEADLINE_DEFAULT", "15")),
+}
+
+# "openai", or "scripted" for the offline stand-in used in load tests and CI
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_SCRIPTED_LATENCY_MS = float(os.getenv("LLM_SCRIPTED_LATENCY_MS", "0"))
+LLM_SCRIPTED_JITTER_MS = float(os.getenv("LLM_SCRIPTED_JITTER_MS", "0"))
+LLM_SCRIPTED_FAILURE_RATE = float(os.getenv("LLM_SCRIPTED_FAILURE_RATE", "0"))
+LLM_SCRIPTED_TIMEOUT_RATE = float(os.getenv("LLM_SCRIPTED_TIMEOUT_RATE", "0"))
+LLM_SCRIPTED_SEED = int(os.getenv("LLM_SCRIPTED_SEED")) if os.getenv("LLM_SCRIPTED_SEED") else None
+# optional JSON file of {call_site: reply or [replies]} for the scripted backend
+LLM_SCRIPT_PATH = os.getenv("LLM_SCRIPT_PATH")
+
+# USD per 1K prompt / completion tokens, for the LLM usage report
+LLM_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+# LLM call metrics are written in batches of this size, or after this many seconds
+LLM_METRICS_FLUSH_SIZE = int(os.getenv("LLM_METRICS_FLUSH_SIZE", "50"))
+LLM_METRICS_FLUSH_SECONDS = int(os.getenv("LLM_METRICS_FLUSH_SECONDS", "30"))
+
+# Local intent classifier predictions at or above this confidence skip the LLM
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+# Intent decisions are logged in batches of this size, or after this many
+# seconds, and pruned after INTENT_LOG_RETENTION_DAYS (prune_intent_decisions)
+INTENT_LOG_FLUSH_SIZE = int(os.getenv("INTENT_LOG_FLUSH_SIZE", "100"))
+INTENT_LOG_FLUSH_SECONDS = int(os.getenv("INTENT_LOG_FLUSH_SECONDS", "30"))
+INTENT_LOG_RETENTION_DAYS = int(os.getenv("INTENT_LOG_RETENTION_DAYS", "90"))
+
+# Course passages retrieved for each tutor answer
+TUTOR_CONTEXT_TOP_K = int(os.getenv("TUTOR_CONTEXT_TOP_K", "5"))
+TUTOR_CONTEXT_TOKEN_BUDGET = int(os.getenv("TUTOR_CONTEXT_TOKEN_BUDGET", "800"))
+
+# Question snapshot and progress of in-progress assessment attempts
+ASSESSMENT_SESSION_CACHE_ALIAS = os.getenv("ASSESSMENT_SESSION_CACHE_ALIAS", "default")
+ASSESSMENT_SESSION_TTL = int(os.getenv("ASSESSMENT_SESSION_TTL", str(6 * 60 * 60)))
+
+# Tutor conversation memory per enrollment: recent turns kept verbatim, older
+# turns folded into a summary; both rendered within the token budget
+TUTOR_MEMORY_MAX_TURNS = int(os.getenv("TUTOR_MEMORY_MAX_TURNS", "4"))
+TUTOR_MEMORY_TOKEN_BUDGET = int(os.getenv("TUTOR_MEMORY_TOKEN_BUDGET", "400"))
+TUTOR_MEMORY_SUMMARY_TOKENS = int(os.getenv("TUTOR_MEMORY_SUMMARY_TOKENS", "150"))
+TUTOR_MEMORY_ANSWER_CHARS = int(os.getenv("TUTOR_MEMORY_ANSWER_CHARS", "500"))
+
+# Tutor answers reused for near-duplicate questions within a module
+TUTOR_ANSWER_CACHE_ALIAS = "shared" if SHARED_CACHE_URL else "default"
+TUTOR_ANSWER_CACHE_THRESHOLD = float(os.getenv("TUTOR_ANSWER_CACHE_THRESHOLD", "0.8"))
+TUTOR_ANSWER_CACHE_SIZE = int(os.getenv("TUTOR_ANSWER_CACHE_SIZE", "200"))
+TUTOR_ANSWER_CACHE_TTL = int(os.getenv("TUTOR_ANSWER_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+# LLM intent decisions cached per (normalized text, conversation state)
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "5000"))
+INTENT_CACHE_TTL = int(os.getenv("INTENT_CACHE_TTL", str(24 * 60 * 60)))
+INTENT_CACHE_ALIAS = "shared" if SHARED_CACHE_URL else None
+
+# Certificate/badge rendering runs in a process pool off the request path;
+# workers are replaced after CERTIFICATE_WORKER_MAX_TASKS jobs to cap memory.
+# 0 workers renders in the calling thread.
+CERTIFICATE_RENDER_WORKERS = int(os.getenv("CERTIFICATE_RENDER_WORKERS", "2"))
+CERTIFICATE_WORKER_MAX_TASKS = int(os.getenv("CERTIFICATE_WORKER_MAX_TASKS", "20"))
+# Per-course certificate/badge backgrounds rendered once and stamped per learner
+CERTIFICATE_TEMPLATE_DIR = os.getenv(
+    "CERTIFICATE_TEMPLATE_DIR",
+    os.path.join(tempfile.gettempdir(), "certificate-templates"),
+)
+
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION")